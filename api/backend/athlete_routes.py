@@ -1,10 +1,11 @@
 from flask import Blueprint, jsonify
 from backend.db import get_db_connection
-import datetime
+from backend.cache import cached
 
 student_athlete_bp = Blueprint('student_athlete', __name__)
 
 @student_athlete_bp.route('/athlete/bmi', methods=['GET'])
+@cached(ttl=300, tags=('athletes',))
 def get_athlete_bmi():
     """
     API route to calculate BMI from body data (dynamic version).
@@ -35,6 +36,7 @@ def get_athlete_bmi():
 
 
 @student_athlete_bp.route('/athlete/maintenance_calories', methods=['GET'])
+@cached(ttl=300, tags=('athletes',))
 def get_athlete_maintenance_calories():
     """
     API route to estimate daily maintenance calories.
@@ -135,11 +137,7 @@ def get_athlete_daily_macro_breakdown():
         cursor.execute(query)
         data = cursor.fetchall()
 
-        # If log_date is returned as a datetime object, convert to string
-        for row in data:
-            if 'log_date' in row and isinstance(row['log_date'], (datetime.date, datetime.datetime)):
-                row['log_date'] = row['log_date'].strftime('%Y-%m-%d')
-
+        # log_date is encoded as YYYY-MM-DD by the app's JSON encoder
         return jsonify(data), 200
 
     except Exception as e:
@@ -178,15 +176,7 @@ def get_athlete_workout_plan_intake():
         cursor.execute(query)
         data = cursor.fetchall()
 
-        # Convert date fields to string if necessary
-        for row in data:
-            if 'start_date' in row and isinstance(row['start_date'], (datetime.date, datetime.datetime)):
-                row['start_date'] = row['start_date'].strftime('%Y-%m-%d')
-            if 'end_date' in row and isinstance(row['end_date'], (datetime.date, datetime.datetime)):
-                row['end_date'] = row['end_date'].strftime('%Y-%m-%d')
-            if 'log_date' in row and isinstance(row['log_date'], (datetime.date, datetime.datetime)):
-                row['log_date'] = row['log_date'].strftime('%Y-%m-%d')
-
+        # Date fields are encoded as YYYY-MM-DD by the app's JSON encoder
         return jsonify(data), 200
 
     except Exception as e:
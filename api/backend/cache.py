@@ -0,0 +1,259 @@
+########################################################
+# In-process response cache for read routes
+########################################################
+#
+# Usage on a blueprint route:
+#
+#     @clients_bp.route('/clients/stats', methods=['GET'])
+#     @cached(ttl=60, tags=('clients', 'system_performance'))
+#     def get_client_stats(): ...
+#
+#     @clients_bp.route('/clients/<int:client_id>', methods=['PUT'])
+#     @invalidates('clients')
+#     def update_client(client_id): ...
+#
+# Entries are keyed by path + query string and only successful (200)
+# responses are stored. Concurrent misses on the same key are coalesced:
+# one request computes the response while the others wait for it. The cache
+# lives in each API process; set RESPONSE_CACHE_ENABLED=false to bypass it.
+#
+# Invalidation reaches every process: invalidate() drops the local entries
+# and bumps the tags' rows in CacheTagVersion (migration 18). Before serving
+# from its cache, each process reads that small table at most once per
+# RESPONSE_CACHE_SYNC_INTERVAL seconds and drops the entries of every tag
+# whose version moved. Other processes may therefore serve an invalidated
+# entry for up to one sync interval. While the database is unreachable,
+# entries only expire by their TTL. With the cache disabled, write routes
+# do not touch CacheTagVersion at all.
+
+import os
+import threading
+import time
+from functools import wraps
+from flask import current_app, request
+
+
+class _Flight:
+    """A response currently being computed for a key"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.entry = None
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, wait_timeout=30, sync_interval=1.0):
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.sync_interval = sync_interval
+        self._entries = {}      # key -> (expires_at, tags, (body, status, mimetype))
+        self._inflight = {}     # key -> _Flight
+        self._generations = {}  # tag -> invalidation counter
+        self._shared_versions = None  # tag -> CacheTagVersion.Version at the last sync
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'invalidations': 0, 'remote_invalidations': 0,
+                       'evictions': 0}
+
+    def _tag_generations(self, tags):
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _evict(self, now):
+        """Make room for one entry: drop expired entries, else the one expiring first. Caller holds the lock."""
+        expired = [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+            expired.append(None)
+        self._stats['evictions'] += len(expired)
+
+    def get_or_compute(self, key, ttl, tags, compute):
+        """
+        Return (entry, hit) for key, calling compute() on a miss.
+        compute returns a (body, status, mimetype) tuple; only status 200 is stored.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached_entry = self._entries.get(key)
+            if cached_entry and cached_entry[0] > now:
+                self._stats['hits'] += 1
+                return cached_entry[2], True
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._stats['misses'] += 1
+                generations = self._tag_generations(tags)
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.event.wait(self.wait_timeout)
+            if flight.entry is not None:
+                return flight.entry, True
+            # The leader's response was not cacheable; compute our own
+            return compute(), False
+
+        entry = None
+        try:
+            entry = compute()
+            if entry[1] == 200:
+                with self._lock:
+                    # Skip storing if a write invalidated one of our tags meanwhile
+                    if self._tag_generations(tags) == generations:
+                        if key not in self._entries and len(self._entries) >= self.max_entries:
+                            self._evict(time.monotonic())
+                        self._entries[key] = (time.monotonic() + ttl, tags, entry)
+                flight.entry = entry
+            return entry, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _drop_tags(self, tags):
+        """Drop this process's entries carrying any of the tags. Caller holds the lock."""
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+        stale = [key for key, (_, entry_tags, _) in self._entries.items() if tags.intersection(entry_tags)]
+        for key in stale:
+            del self._entries[key]
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the tags, in this process now and in the others at their next sync"""
+        tags = set(tags)
+        with self._lock:
+            self._drop_tags(tags)
+            self._stats['invalidations'] += 1
+        self._publish(sorted(tags))
+
+    def _publish(self, tags):
+        """Bump the tags' shared versions so the other processes drop their entries too"""
+        from backend.db import get_db_connection
+        try:
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    INSERT INTO CacheTagVersion (Tag, Version)
+                    VALUES {', '.join(['(%s, 1)'] * len(tags))}
+                    ON DUPLICATE KEY UPDATE Version = Version + 1
+                """, tags)
+                conn.commit()
+                cursor.close()
+            finally:
+                conn.close()
+        except Exception:
+            pass  # the write itself succeeded; other processes' entries still expire by TTL
+
+    def sync(self):
+        """
+        Drop the entries of tags another process invalidated. Reads
+        CacheTagVersion at most once per sync_interval; concurrent callers
+        do not wait for a sync in progress.
+        """
+        if time.monotonic() < self._next_sync or not self._sync_lock.acquire(blocking=False):
+            return
+        from backend.db import get_db_connection
+        try:
+            self._next_sync = time.monotonic() + self.sync_interval
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT Tag, Version FROM CacheTagVersion")
+                versions = {row['Tag']: row['Version'] for row in cursor.fetchall()}
+                cursor.close()
+            finally:
+                conn.close()
+        except Exception:
+            return  # database unreachable: keep serving until the entries expire
+        finally:
+            self._sync_lock.release()
+
+        with self._lock:
+            known = self._shared_versions or {}
+            changed = {tag for tag, version in versions.items() if known.get(tag) != version}
+            if changed:
+                # On the first sync every tag counts as changed: entries cached before it are dropped
+                self._drop_tags(changed)
+                if self._shared_versions is not None:
+                    self._stats['remote_invalidations'] += 1
+            self._shared_versions = versions
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_after_fork(self):
+        """Start a forked worker with an empty cache and fresh locks (another thread may have held them)"""
+        self._entries = {}
+        self._inflight = {}
+        self._generations = {}
+        self._shared_versions = None
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stats = dict.fromkeys(self._stats, 0)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'hit_ratio': round(self._stats['hits'] / lookups, 3) if lookups else None,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024)),
+    sync_interval=float(os.getenv('RESPONSE_CACHE_SYNC_INTERVAL', 1)),
+)
+os.register_at_fork(after_in_child=response_cache.reset_after_fork)
+
+
+def cache_enabled():
+    return os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def cached(ttl, tags=()):
+    """Cache a GET route's successful responses for ttl seconds under the given tags"""
+    tags = tuple(tags)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not cache_enabled():
+                return view(*args, **kwargs)
+
+            def compute():
+                response = current_app.make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, response.mimetype
+
+            # Apply other processes' invalidations first (throttled to one read per sync interval)
+            response_cache.sync()
+            key = request.full_path
+            (body, status, mimetype), hit = response_cache.get_or_compute(key, ttl, tags, compute)
+            response = current_app.response_class(body, status=status, mimetype=mimetype)
+            response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidates(*tags):
+    """Invalidate the given cache tags after a write route succeeds"""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = current_app.make_response(view(*args, **kwargs))
+            # Nothing is cached anywhere with the cache disabled: skip the CacheTagVersion write
+            if response.status_code < 400 and cache_enabled():
+                response_cache.invalidate(*tags)
+            return response
+        return wrapper
+    return decorator
@@ -1,10 +1,119 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from backend.db import get_db_connection
-import datetime
+from backend.cache import cached
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import os
+import time
 
 ceo_bp = Blueprint('ceo', __name__)
 
+# The query behind each CEO dashboard panel. Rows are returned as they come
+# from the database; the app's JSON encoder formats DATE columns as
+# YYYY-MM-DD, DATETIME columns as YYYY-MM-DD HH:MM:SS and DECIMALs as numbers.
+CEO_PANELS = {
+    'key_metrics': "SELECT * FROM CEODashboardKeyMetrics",
+    'growth_trend': "SELECT * FROM CEODashboardGrowthTrend ORDER BY Date",
+    'engagement_indicators': "SELECT * FROM CEOEngagementIndicators",
+    'daily_active_users': "SELECT * FROM CEODailyActiveUsers ORDER BY Date",
+    'client_activity': "SELECT * FROM CEOClientActivity",
+    'financial_indicators': "SELECT * FROM CEOFinancialIndicators",
+    'revenue_trend': "SELECT * FROM CEORevenueTrend ORDER BY Month",
+    'expense_breakdown': "SELECT * FROM CEOExpenseBreakdown",
+    'performance_indicators': "SELECT * FROM CEOSystemPerformanceIndicators",
+    'api_response_time': "SELECT Time, ResponseTime FROM CEOAPIResponseTime ORDER BY Time",
+    'user_traffic': "SELECT * FROM CEOUserTraffic ORDER BY Hour",
+}
+
+# Panels of a dashboard request are loaded concurrently, each on its own pooled connection
+PANEL_WORKERS = 4
+_panel_executor = ThreadPoolExecutor(max_workers=PANEL_WORKERS, thread_name_prefix='ceo-panel')
+
+
+def _new_panel_executor_after_fork():
+    # Executor threads do not survive fork; a forked worker needs its own
+    global _panel_executor
+    _panel_executor = ThreadPoolExecutor(max_workers=PANEL_WORKERS, thread_name_prefix='ceo-panel')
+
+
+os.register_at_fork(after_in_child=_new_panel_executor_after_fork)
+
+# CEO tables are refreshed by reporting jobs, not by API writes, so responses only expire by TTL
+CEO_CACHE_TTL = 300
+
+
+def fetch_panel(name):
+    """Run the query behind one CEO dashboard panel and return its rows"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CEO_PANELS[name])
+        data = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return data
+
+
+def _timed_fetch_panel(name):
+    start = time.perf_counter()
+    try:
+        return fetch_panel(name), None, (time.perf_counter() - start) * 1000
+    except Exception as e:
+        return None, str(e), (time.perf_counter() - start) * 1000
+
+
+@ceo_bp.route('/ceo/dashboard', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
+def get_ceo_dashboard():
+    """
+    API route to load several CEO dashboard panels in one request.
+    Query parameters:
+        panels: comma-separated panel names (defaults to all panels).
+    Returns:
+        A JSON response with the rows of every requested panel, the panels
+        that failed, and per-panel timings in milliseconds. The status is
+        207 when only some panels loaded, so partial dashboards are not cached.
+    """
+    requested = request.args.get('panels')
+    names = [n.strip() for n in requested.split(',') if n.strip()] if requested else list(CEO_PANELS)
+
+    unknown = [n for n in names if n not in CEO_PANELS]
+    if unknown:
+        return jsonify({
+            "error": f"Unknown panels: {', '.join(unknown)}",
+            "available_panels": list(CEO_PANELS)
+        }), 400
+
+    names = list(dict.fromkeys(names))
+    start = time.perf_counter()
+    # Each worker runs in a copy of the request context so its SQL counts towards this request
+    futures = [_panel_executor.submit(contextvars.copy_context().run, _timed_fetch_panel, name)
+               for name in names]
+    results = [future.result() for future in futures]
+
+    panels, errors, timings = {}, {}, {}
+    for name, (data, error, elapsed_ms) in zip(names, results):
+        timings[name] = round(elapsed_ms, 2)
+        if error is None:
+            panels[name] = data
+        else:
+            errors[name] = error
+
+    payload = {
+        "panels": panels,
+        "errors": errors,
+        "meta": {
+            "timings_ms": timings,
+            "total_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    }
+    if not panels:
+        return jsonify(payload), 500
+    return jsonify(payload), 207 if errors else 200
+
 @ceo_bp.route('/ceo/key_metrics', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_key_metrics():
     """
     API route to get key metrics for the CEO dashboard.
@@ -12,18 +121,12 @@ def get_ceo_key_metrics():
         A JSON response containing key metrics data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEODashboardKeyMetrics")
-        data = cursor.fetchall()
-        return jsonify(data), 200
+        return jsonify(fetch_panel('key_metrics')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/growth_trend', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_growth_trend():
     """
     API route to get growth trend data for the CEO dashboard.
@@ -31,22 +134,12 @@ def get_ceo_growth_trend():
         A JSON response containing growth trend data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEODashboardGrowthTrend ORDER BY Date")
-        data = cursor.fetchall()
-        
-        for row in data:
-            row['Date'] = row['Date'].strftime('%Y-%m-%d')
-        
-        return jsonify(data), 200
+        return jsonify(fetch_panel('growth_trend')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/engagement_indicators', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_engagement_indicators():
     """
     API route to get key engagement indicators for the CEO dashboard.
@@ -54,18 +147,12 @@ def get_ceo_engagement_indicators():
         A JSON response containing engagement indicators data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEOEngagementIndicators")
-        data = cursor.fetchall()
-        return jsonify(data), 200
+        return jsonify(fetch_panel('engagement_indicators')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/daily_active_users', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_daily_active_users():
     """
     API route to get daily active users data.
@@ -73,22 +160,12 @@ def get_ceo_daily_active_users():
         A JSON response containing daily active users data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEODailyActiveUsers ORDER BY Date")
-        data = cursor.fetchall()
-        
-        for row in data:
-            row['Date'] = row['Date'].strftime('%Y-%m-%d')
-        
-        return jsonify(data), 200
+        return jsonify(fetch_panel('daily_active_users')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/client_activity', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_client_activity():
     """
     API route to get client activity data.
@@ -96,22 +173,12 @@ def get_ceo_client_activity():
         A JSON response containing client activity data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEOClientActivity")
-        data = cursor.fetchall()
-        
-        for row in data:
-            row['LastLogin'] = row['LastLogin'].strftime('%Y-%m-%d')
-        
-        return jsonify(data), 200
+        return jsonify(fetch_panel('client_activity')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/financial_indicators', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_financial_indicators():
     """
     API route to get financial indicators.
@@ -119,18 +186,12 @@ def get_ceo_financial_indicators():
         A JSON response containing financial indicators data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEOFinancialIndicators")
-        data = cursor.fetchall()
-        return jsonify(data), 200
+        return jsonify(fetch_panel('financial_indicators')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/revenue_trend', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_revenue_trend():
     """
     API route to get revenue trend data.
@@ -138,22 +199,12 @@ def get_ceo_revenue_trend():
         A JSON response containing revenue trend data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEORevenueTrend ORDER BY Month")
-        data = cursor.fetchall()
-        
-        for row in data:
-            row['Month'] = row['Month'].strftime('%Y-%m-%d')
-        
-        return jsonify(data), 200
+        return jsonify(fetch_panel('revenue_trend')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/expense_breakdown', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_expense_breakdown():
     """
     API route to get expense breakdown data.
@@ -161,18 +212,12 @@ def get_ceo_expense_breakdown():
         A JSON response containing expense breakdown data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEOExpenseBreakdown")
-        data = cursor.fetchall()
-        return jsonify(data), 200
+        return jsonify(fetch_panel('expense_breakdown')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/performance_indicators', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_performance_indicators():
     """
     API route to get system performance indicators.
@@ -180,18 +225,12 @@ def get_ceo_performance_indicators():
         A JSON response containing system performance indicators data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEOSystemPerformanceIndicators")
-        data = cursor.fetchall()
-        return jsonify(data), 200
+        return jsonify(fetch_panel('performance_indicators')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/api_response_time', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_api_response_time():
     """
     API route to get API response time data.
@@ -199,22 +238,12 @@ def get_ceo_api_response_time():
         A JSON response containing API response time data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEOAPIResponseTime ORDER BY Time")
-        data = cursor.fetchall()
-        
-        for row in data:
-            row['Time'] = row['Time'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        return jsonify(data), 200
+        return jsonify(fetch_panel('api_response_time')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
 
 @ceo_bp.route('/ceo/user_traffic', methods=['GET'])
+@cached(ttl=CEO_CACHE_TTL, tags=('ceo',))
 def get_ceo_user_traffic():
     """
     API route to get user traffic data.
@@ -222,13 +251,6 @@ def get_ceo_user_traffic():
         A JSON response containing user traffic data.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM CEOUserTraffic ORDER BY Hour")
-        data = cursor.fetchall()
-        return jsonify(data), 200
+        return jsonify(fetch_panel('user_traffic')), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
@@ -3,17 +3,36 @@
 ########################################################
 
 from flask import Blueprint, request, jsonify
-from datetime import datetime 
+from datetime import datetime, timedelta
 import pymysql
 from backend.db import get_db_connection
+from backend.cache import cached, invalidates
+from backend.pagination import (CURSOR_ERRORS, DEFAULT_PAGE_SIZE, parse_page_args, parse_fields, encode_cursor,
+                                decode_cursor)
+from backend.clients.search import MATCH_MODES, age_filter, ranked_search, substring_filter
+from backend.clients.counters import count_client, move_client, read_client_counts
+from backend.meals.nutrient_catalog import nutrient_catalog
+from backend.serialization import CLIENT, CLIENT_WITH_AGE, NUTRITION_PLAN
 
 # Create the blueprint
 clients_bp = Blueprint('clients', __name__)
 
+# Nutrients averaged per client on the nutrition dashboard, with their result columns
+DASHBOARD_MACROS = [('Protein', 'avg_protein'), ('Carbohydrates', 'avg_carbs'), ('Fat', 'avg_fat'),
+                    ('Fiber', 'avg_fiber')]
+
 # Route to get all clients
 @clients_bp.route('/clients', methods=['GET'])
 def get_all_clients():
-    """Retrieve all clients or filter by query parameters"""
+    """
+    Retrieve all clients or filter by query parameters.
+
+    Pass limit (and then the returned next_cursor as cursor) to page through
+    the clients by ID; the response becomes {"items": [...], "next_cursor": ...}.
+    fields=id,name limits the keys returned for each client.
+    """
+    conn = None
+    cursor = None
     try:
         # Get query parameters
         name = request.args.get('name', '')
@@ -21,22 +40,32 @@ def get_all_clients():
         include_archived = request.args.get('include_archived', 'false').lower() == 'true'
         only_archived = request.args.get('only_archived', 'false').lower() == 'true'
         
+        try:
+            paginate, limit, after = parse_page_args(request.args)
+            fields = parse_fields(request.args.get('fields'), CLIENT.keys)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            after_id = int(decode_cursor(after, 1)[0]) if after else None
+        except CURSOR_ERRORS:
+            return jsonify({"error": "Invalid cursor"}), 400
+        
         # Connect to the database
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Base query
-        query = "SELECT * FROM Client WHERE 1=1"
+        # Select only the requested columns (ID is always needed for the cursor)
+        mapper = CLIENT.only(fields)
+        columns = ['ID'] + [column for column in mapper.columns() if column != 'ID']
+        query = f"SELECT {', '.join(columns)} FROM Client WHERE 1=1"
         params = []
         
-        # Add filters if provided
-        if name:
-            query += " AND Name LIKE %s"
-            params.append(f"%{name}%")
-        
-        if email:
-            query += " AND Email LIKE %s"
-            params.append(f"%{email}%")
+        # Add filters if provided (substring matches through the search index)
+        for column, term in (('Name', name), ('Email', email)):
+            if term:
+                condition, condition_params = substring_filter(column, term)
+                query += f" AND {condition}"
+                params.extend(condition_params)
         
         # Handle archived status filtering
         if only_archived:
@@ -44,29 +73,39 @@ def get_all_clients():
         elif not include_archived:
             query += " AND is_archived = FALSE"
         
+        # Keyset pagination: continue after the last ID of the previous page
+        if after_id is not None:
+            query += " AND ID > %s"
+            params.append(after_id)
+        
+        query += " ORDER BY ID"
+        if paginate:
+            # One extra row tells us whether there is a next page
+            query += " LIMIT %s"
+            params.append(limit + 1)
+        
         # Execute the query
         cursor.execute(query, params)
         clients = cursor.fetchall()
         
-        # Format the result
-        result = []
-        for client in clients:
-            result.append({
-                'id': client['ID'],
-                'name': client['Name'],
-                'dob': client['DOB'].strftime('%Y-%m-%d') if client['DOB'] else None,
-                'email': client['Email'],
-                'is_archived': bool(client['is_archived'])
-            })
+        if not paginate:
+            return jsonify(mapper.many(clients)), 200
         
-        return jsonify(result), 200
+        has_more = len(clients) > limit
+        clients = clients[:limit]
+        return jsonify({
+            "items": mapper.many(clients),
+            "next_cursor": encode_cursor(clients[-1]['ID']) if has_more else None
+        }), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
     finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 # Route to get a specific client by ID
 @clients_bp.route('/clients/<int:client_id>', methods=['GET'])
@@ -82,15 +121,7 @@ def get_client(client_id):
         if not client:
             return jsonify({"error": "Client not found"}), 404
         
-        result = {
-            'id': client['ID'],
-            'name': client['Name'],
-            'dob': client['DOB'].strftime('%Y-%m-%d') if client['DOB'] else None,
-            'email': client['Email'],
-            'is_archived': bool(client['is_archived'])
-        }
-        
-        return jsonify(result), 200
+        return jsonify(CLIENT(client)), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -101,6 +132,7 @@ def get_client(client_id):
 
 # Route to add a new client
 @clients_bp.route('/clients', methods=['POST'])
+@invalidates('clients')
 def add_client():
     """Add a new client during onboarding"""
     try:
@@ -130,6 +162,7 @@ def add_client():
         query = "INSERT INTO Client (Name, DOB, Email, is_archived) VALUES (%s, %s, %s, %s)"
         is_archived = data.get('is_archived', False)
         cursor.execute(query, (data['name'], dob, data['email'], is_archived))
+        count_client(cursor, is_archived)
         conn.commit()
         
         # Get the ID of the newly created client
@@ -152,6 +185,7 @@ def add_client():
 
 # Route to update a client
 @clients_bp.route('/clients/<int:client_id>', methods=['PUT'])
+@invalidates('clients')
 def update_client(client_id):
     """Update client details (contact info, status, etc.)"""
     try:
@@ -164,9 +198,10 @@ def update_client(client_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Check if client exists
-        cursor.execute("SELECT ID FROM Client WHERE ID = %s", (client_id,))
-        if not cursor.fetchone():
+        # Check if client exists (locking it keeps ClientCounts in step with concurrent writes)
+        cursor.execute("SELECT ID, is_archived FROM Client WHERE ID = %s FOR UPDATE", (client_id,))
+        client = cursor.fetchone()
+        if not client:
             return jsonify({"error": "Client not found"}), 404
         
         # Check email uniqueness if updating email
@@ -209,10 +244,14 @@ def update_client(client_id):
         # Execute update
         query = f"UPDATE Client SET {', '.join(update_fields)} WHERE ID = %s"
         cursor.execute(query, params)
+        updated = cursor.rowcount
+        
+        if 'is_archived' in data and bool(data['is_archived']) != bool(client['is_archived']):
+            move_client(cursor, data['is_archived'])
         conn.commit()
         
         # Check if anything was updated
-        if cursor.rowcount == 0:
+        if updated == 0:
             return jsonify({"message": "No changes made"}), 200
         
         return jsonify({"message": "Client updated successfully"}), 200
@@ -229,15 +268,17 @@ def update_client(client_id):
 
 # Route to delete a client
 @clients_bp.route('/clients/<int:client_id>', methods=['DELETE'])
+@invalidates('clients')
 def delete_client(client_id):
     """Remove or archive inactive clients"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Check if client exists
-        cursor.execute("SELECT ID FROM Client WHERE ID = %s", (client_id,))
-        if not cursor.fetchone():
+        # Check if client exists (locking it keeps ClientCounts in step with concurrent writes)
+        cursor.execute("SELECT ID, is_archived FROM Client WHERE ID = %s FOR UPDATE", (client_id,))
+        client = cursor.fetchone()
+        if not client:
             return jsonify({"error": "Client not found"}), 404
         
         # Check if client has associated data (meal logs, nutrition plans, reports)
@@ -251,6 +292,8 @@ def delete_client(client_id):
         if result and result['total'] > 0:
             # There are associated records, so we should not delete but archive instead
             cursor.execute("UPDATE Client SET is_archived = TRUE WHERE ID = %s", (client_id,))
+            if not client['is_archived']:
+                move_client(cursor, True)
             conn.commit()
             return jsonify({
                 "message": "Client has associated data and was archived instead of deleted",
@@ -260,6 +303,7 @@ def delete_client(client_id):
         
         # Delete the client
         cursor.execute("DELETE FROM Client WHERE ID = %s", (client_id,))
+        count_client(cursor, client['is_archived'], -1)
         conn.commit()
         
         return jsonify({"message": "Client deleted successfully"}), 200
@@ -276,14 +320,15 @@ def delete_client(client_id):
 
 # Route to archive a client
 @clients_bp.route('/clients/<int:client_id>/archive', methods=['PUT'])
+@invalidates('clients')
 def archive_client(client_id):
     """Archive a client to keep workspace organized"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Check if client exists
-        cursor.execute("SELECT ID, is_archived FROM Client WHERE ID = %s", (client_id,))
+        # Check if client exists (locking it keeps ClientCounts in step with concurrent writes)
+        cursor.execute("SELECT ID, is_archived FROM Client WHERE ID = %s FOR UPDATE", (client_id,))
         client = cursor.fetchone()
         
         if not client:
@@ -294,6 +339,7 @@ def archive_client(client_id):
         
         # Archive the client
         cursor.execute("UPDATE Client SET is_archived = TRUE WHERE ID = %s", (client_id,))
+        move_client(cursor, True)
         conn.commit()
         
         return jsonify({"message": "Client archived successfully"}), 200
@@ -310,14 +356,15 @@ def archive_client(client_id):
 
 # Route to restore an archived client
 @clients_bp.route('/clients/<int:client_id>/restore', methods=['PUT'])
+@invalidates('clients')
 def restore_client(client_id):
     """Restore an archived client"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Check if client exists
-        cursor.execute("SELECT ID, is_archived FROM Client WHERE ID = %s", (client_id,))
+        # Check if client exists (locking it keeps ClientCounts in step with concurrent writes)
+        cursor.execute("SELECT ID, is_archived FROM Client WHERE ID = %s FOR UPDATE", (client_id,))
         client = cursor.fetchone()
         
         if not client:
@@ -328,6 +375,7 @@ def restore_client(client_id):
         
         # Restore the client
         cursor.execute("UPDATE Client SET is_archived = FALSE WHERE ID = %s", (client_id,))
+        move_client(cursor, False)
         conn.commit()
         
         return jsonify({"message": "Client restored successfully"}), 200
@@ -345,44 +393,75 @@ def restore_client(client_id):
 # Route to search clients
 @clients_bp.route('/clients/search', methods=['GET'])
 def search_clients():
-    """Search clients with more advanced filters"""
+    """
+    Search clients with more advanced filters.
+
+    name/email keep only clients whose name/email contains the text and
+    min_age/max_age bound the age in whole years; filters combine. q
+    searches name and email together and returns the best `limit` (default
+    100) matches ranked exact > prefix > substring > fuzzy; match=prefix,
+    substring (default) or fuzzy sets how q has to match.
+
+    Without q, pass limit (and then the returned next_cursor as cursor) to
+    page through the matches by ID; the response becomes
+    {"items": [...], "next_cursor": ...}.
+    """
+    conn = None
+    cursor = None
     try:
         # Get query parameters
         name = request.args.get('name', '')
         email = request.args.get('email', '')
-        min_age = request.args.get('min_age')
-        max_age = request.args.get('max_age')
+        q = request.args.get('q', '').strip()
+        match = request.args.get('match', 'substring')
         include_archived = request.args.get('include_archived', 'false').lower() == 'true'
         only_archived = request.args.get('only_archived', 'false').lower() == 'true'
         
+        if match not in MATCH_MODES:
+            return jsonify({"error": f"match must be one of {', '.join(MATCH_MODES)}"}), 400
+        try:
+            min_age = int(request.args['min_age']) if request.args.get('min_age') else None
+            max_age = int(request.args['max_age']) if request.args.get('max_age') else None
+        except ValueError:
+            return jsonify({"error": "min_age and max_age must be integers"}), 400
+        try:
+            paginate, limit, after = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            after_id = int(decode_cursor(after, 1)[0]) if after else None
+        except CURSOR_ERRORS:
+            return jsonify({"error": "Invalid cursor"}), 400
+        if q and after is not None:
+            return jsonify({"error": "cursor cannot be combined with q; ranked results return the best limit matches"}), 400
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Base query using year calculation for age filtering
-        query = """
-            SELECT *, 
-            TIMESTAMPDIFF(YEAR, DOB, CURDATE()) as age 
-            FROM Client 
-            WHERE 1=1
-        """
+        # Age is only computed for the returned rows; filtering uses the DOB range
+        select = "SELECT ID, Name, DOB, Email, is_archived, TIMESTAMPDIFF(YEAR, DOB, CURDATE()) AS age"
+        query = " FROM Client WHERE 1=1"
+        select_params = []
         params = []
         
         # Add filters
-        if name:
-            query += " AND Name LIKE %s"
-            params.append(f"%{name}%")
-        
-        if email:
-            query += " AND Email LIKE %s"
-            params.append(f"%{email}%")
-        
-        if min_age:
-            query += " AND TIMESTAMPDIFF(YEAR, DOB, CURDATE()) >= %s"
-            params.append(int(min_age))
-        
-        if max_age:
-            query += " AND TIMESTAMPDIFF(YEAR, DOB, CURDATE()) <= %s"
-            params.append(int(max_age))
+        for column, term in (('Name', name), ('Email', email)):
+            if term:
+                condition, condition_params = substring_filter(column, term)
+                query += f" AND {condition}"
+                params.extend(condition_params)
+        
+        if q:
+            condition, condition_params, rank, rank_params = ranked_search(q, match)
+            select += f", {rank}"
+            select_params.extend(rank_params)
+            query += f" AND {condition}"
+            params.extend(condition_params)
+        
+        if min_age is not None or max_age is not None:
+            condition, condition_params = age_filter(min_age, max_age)
+            query += f" AND {condition}"
+            params.extend(condition_params)
             
         # Handle archived status filtering
         if only_archived:
@@ -390,79 +469,88 @@ def search_clients():
         elif not include_archived:
             query += " AND is_archived = FALSE"
         
+        if q:
+            # Ranked searches return the best matches first
+            query += " ORDER BY match_rank DESC, relevance DESC, ID LIMIT %s"
+            params.append(limit or DEFAULT_PAGE_SIZE)
+        else:
+            # Keyset pagination: continue after the last ID of the previous page
+            if after_id is not None:
+                query += " AND ID > %s"
+                params.append(after_id)
+            query += " ORDER BY ID"
+            if paginate:
+                # One extra row tells us whether there is a next page
+                query += " LIMIT %s"
+                params.append(limit + 1)
+        
         # Execute the query
-        cursor.execute(query, params)
+        cursor.execute(select + query, select_params + params)
         clients = cursor.fetchall()
         
-        # Format the result
-        result = []
-        for client in clients:
-            result.append({
-                'id': client['ID'],
-                'name': client['Name'],
-                'dob': client['DOB'].strftime('%Y-%m-%d') if client['DOB'] else None,
-                'email': client['Email'],
-                'age': client['age'],
-                'is_archived': bool(client['is_archived'])
-            })
+        if q or not paginate:
+            return jsonify(CLIENT_WITH_AGE.many(clients)), 200
         
-        return jsonify(result), 200
+        has_more = len(clients) > limit
+        clients = clients[:limit]
+        return jsonify({
+            "items": CLIENT_WITH_AGE.many(clients),
+            "next_cursor": encode_cursor(clients[-1]['ID']) if has_more else None
+        }), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
     finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 # Route to get system stats (for admin dashboard)
 @clients_bp.route('/clients/stats', methods=['GET'])
+@cached(ttl=60, tags=('clients', 'system_performance'))
 def get_client_stats():
-    """Get client statistics for System Admin dashboard"""
+    """
+    Get client statistics for System Admin dashboard.
+
+    Client totals come from the ClientCounts counters the client write
+    routes maintain; new clients and the trend come from one range scan
+    over SystemPerformance for the from_date..to_date window (default:
+    this month). Responses are cached per window.
+    """
+    conn = None
+    cursor = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Get time range parameters
-        from_date = request.args.get('from_date', datetime.now().replace(day=1).strftime('%Y-%m-%d'))
-        to_date = request.args.get('to_date', datetime.now().strftime('%Y-%m-%d'))
+        try:
+            from_date = datetime.strptime(request.args.get('from_date') or
+                                          datetime.now().replace(day=1).strftime('%Y-%m-%d'), '%Y-%m-%d')
+            to_date = datetime.strptime(request.args.get('to_date') or
+                                        datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
-        # Get total clients count
-        cursor.execute("SELECT COUNT(*) as total FROM Client WHERE is_archived = FALSE")
-        total_clients = cursor.fetchone()['total']
-        
-        # Get archived clients count
-        cursor.execute("SELECT COUNT(*) as total FROM Client WHERE is_archived = TRUE")
-        total_archived = cursor.fetchone()['total']
-        
-        # Get new clients count (assuming SystemPerformance table tracks this)
-        cursor.execute("""
-            SELECT SUM(New_Clients) as new_clients
-            FROM SystemPerformance
-            WHERE DATE(Timestamp) BETWEEN %s AND %s
-        """, (from_date, to_date))
+        conn = get_db_connection()
+        cursor = conn.cursor()
         
-        new_clients_result = cursor.fetchone()
-        new_clients = new_clients_result['new_clients'] if new_clients_result and new_clients_result['new_clients'] else 0
+        # Active and archived totals from the maintained counters
+        total_clients, total_archived = read_client_counts(cursor)
         
-        # Get existing clients data
+        # Half-open window so the Timestamp index can be used
         cursor.execute("""
             SELECT 
                 DATE(Timestamp) as date,
                 Existing_Clients as existing_clients,
                 New_Clients as new_clients
             FROM SystemPerformance
-            WHERE DATE(Timestamp) BETWEEN %s AND %s
+            WHERE Timestamp >= %s AND Timestamp < %s
             ORDER BY Timestamp
-        """, (from_date, to_date))
-        
-        trend_data = []
-        for row in cursor.fetchall():
-            trend_data.append({
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'existing_clients': row['existing_clients'],
-                'new_clients': row['new_clients']
-            })
+        """, (from_date, to_date + timedelta(days=1)))
+        
+        # Rows already carry the response keys; dates are encoded by the app's JSON encoder
+        trend_data = cursor.fetchall()
+        new_clients = sum(row['new_clients'] or 0 for row in trend_data)
         
         return jsonify({
             'total_clients': total_clients,
@@ -476,8 +564,10 @@ def get_client_stats():
         return jsonify({"error": str(e)}), 500
     
     finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 # Route to get nutrition metrics dashboard
 @clients_bp.route('/clients/nutrition-dashboard', methods=['GET'])
@@ -498,76 +588,97 @@ def get_nutrition_dashboard():
         cursor.execute(query)
         clients = cursor.fetchall()
         
+        # Restrict the per-client aggregates below to the same set of clients
+        client_filter = "" if include_archived else " AND c.is_archived = FALSE"
+        
+        # Get the latest nutrition plan of every client
+        cursor.execute(f"""
+            SELECT ranked.ClientID, ranked.ID, ranked.StartDate, ranked.EndDate, ranked.CaloriesGoal
+            FROM (
+                SELECT np.ClientID, np.ID, np.StartDate, np.EndDate, np.CaloriesGoal,
+                       ROW_NUMBER() OVER (PARTITION BY np.ClientID ORDER BY np.StartDate DESC) AS rn
+                FROM NutritionPlan np
+                JOIN Client c ON c.ID = np.ClientID
+                WHERE 1=1{client_filter}
+            ) ranked
+            WHERE ranked.rn = 1
+        """)
+        latest_plans = {row['ClientID']: row for row in cursor.fetchall()}
+        
+        # Calculate the average macronutrients (canonical units) of every client, pivoting on catalog type IDs
+        macro_ids = nutrient_catalog.ids_named(cursor, [name for name, _ in DASHBOARD_MACROS])
+        pivots, pivot_params = [], []
+        for name, column in DASHBOARD_MACROS:
+            type_ids = macro_ids[name] or [0]  # no such type yet: matches no row
+            pivots.append(f"AVG(CASE WHEN n.NutrientTypeID IN ({', '.join(['%s'] * len(type_ids))}) "
+                          f"THEN n.CanonicalQuantity ELSE NULL END) as {column}")
+            pivot_params.extend(type_ids)
+        cursor.execute(f"""
+            SELECT 
+                ml.ClientID,
+                {', '.join(pivots)},
+                COUNT(DISTINCT ml.ID) as total_meals
+            FROM MealLog ml
+            JOIN Nutrient n ON ml.ID = n.MealLogID
+            JOIN Client c ON c.ID = ml.ClientID
+            WHERE ml.Datetime >= DATE_SUB(NOW(), INTERVAL %s DAY){client_filter}
+            GROUP BY ml.ClientID
+        """, pivot_params + [days])
+        metrics_by_client = {row['ClientID']: row for row in cursor.fetchall()}
+        
+        # Get latest deficiency alerts from progress reports - REMOVED due to removal of progress reports functionality
+        
+        # Get meal log activity of every client
+        cursor.execute(f"""
+            SELECT ml.ClientID, COUNT(*) as log_count, MAX(ml.Datetime) as last_logged
+            FROM MealLog ml
+            JOIN Client c ON c.ID = ml.ClientID
+            WHERE ml.Datetime >= DATE_SUB(NOW(), INTERVAL %s DAY){client_filter}
+            GROUP BY ml.ClientID
+        """, (days,))
+        activity_by_client = {row['ClientID']: row for row in cursor.fetchall()}
+        
+        now = datetime.now()
+        today = now.date()
+        min_log_count = days / 7  # Less than 1 log per week on average is flagged
+        empty_metrics = {'avg_protein': None, 'avg_carbs': None, 'avg_fat': None,
+                         'avg_fiber': None, 'total_meals': 0}
+        empty_activity = {'log_count': 0, 'last_logged': None}
+        
+        # Combine everything and compute adherence flags in a single pass
         result = []
-        
-        # For each client, get nutrition metrics
         for client in clients:
             client_id = client['ID']
-            
-            # Get latest nutrition plan
-            cursor.execute("""
-                SELECT ID, StartDate, EndDate, CaloriesGoal
-                FROM NutritionPlan
-                WHERE ClientID = %s
-                ORDER BY StartDate DESC
-                LIMIT 1
-            """, (client_id,))
-            latest_plan = cursor.fetchone()
-            
-            # Calculate the average macronutrients
-            cursor.execute("""
-                SELECT 
-                    AVG(CASE WHEN n.Name = 'Protein' THEN n.Quantity ELSE NULL END) as avg_protein,
-                    AVG(CASE WHEN n.Name = 'Carbohydrates' THEN n.Quantity ELSE NULL END) as avg_carbs,
-                    AVG(CASE WHEN n.Name = 'Fat' THEN n.Quantity ELSE NULL END) as avg_fat,
-                    AVG(CASE WHEN n.Name = 'Fiber' THEN n.Quantity ELSE NULL END) as avg_fiber,
-                    COUNT(DISTINCT ml.ID) as total_meals
-                FROM MealLog ml
-                JOIN Nutrient n ON ml.ID = n.MealLogID
-                WHERE ml.ClientID = %s AND ml.Datetime >= DATE_SUB(NOW(), INTERVAL %s DAY)
-            """, (client_id, days))
-            
-            metrics = cursor.fetchone()
-            
-            # Get latest deficiency alerts from progress reports - REMOVED due to removal of progress reports functionality
-            # cursor.execute("""
-            #     SELECT ID, CreatedDate, DeficiencyAlerts
-            #     FROM ProgressReport
-            #     WHERE ClientID = %s AND DeficiencyAlerts IS NOT NULL
-            #     ORDER BY CreatedDate DESC
-            #     LIMIT 1
-            # """, (client_id,))
-            # latest_report = cursor.fetchone()
-            latest_report = None
-            
-            # Get meal log activity
-            cursor.execute("""
-                SELECT COUNT(*) as log_count, MAX(Datetime) as last_logged
-                FROM MealLog
-                WHERE ClientID = %s AND Datetime >= DATE_SUB(NOW(), INTERVAL %s DAY)
-            """, (client_id, days))
-            
-            activity = cursor.fetchone()
+            latest_plan = latest_plans.get(client_id)
+            metrics = metrics_by_client.get(client_id, empty_metrics)
+            activity = activity_by_client.get(client_id, empty_activity)
+            last_logged = activity['last_logged']
+            days_since_last_log = (now - last_logged).days if last_logged else None
             
             # Calculate age
             age = None
             if client['DOB']:
-                today = datetime.now().date()
                 dob = client['DOB']
                 age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
             
+            # Add adherence flags/alerts
+            adherence_issues = []
+            
+            # No meal logs in last 7 days
+            if days_since_last_log is None or days_since_last_log > 7:
+                adherence_issues.append("No meal logs in last 7 days")
+            
+            # Low meal log count
+            if activity['log_count'] < min_log_count:
+                adherence_issues.append("Low meal logging activity")
+            
             # Format client data with nutrition metrics
-            client_data = {
-                'id': client['ID'],
+            result.append({
+                'id': client_id,
                 'name': client['Name'],
                 'email': client['Email'],
                 'age': age,
-                'nutrition_plan': {
-                    'id': latest_plan['ID'] if latest_plan else None,
-                    'start_date': latest_plan['StartDate'].strftime('%Y-%m-%d') if latest_plan and latest_plan['StartDate'] else None,
-                    'end_date': latest_plan['EndDate'].strftime('%Y-%m-%d') if latest_plan and latest_plan['EndDate'] else None,
-                    'calories_goal': latest_plan['CaloriesGoal'] if latest_plan else None
-                } if latest_plan else None,
+                'nutrition_plan': NUTRITION_PLAN(latest_plan) if latest_plan else None,
                 'metrics': {
                     'avg_protein': float(metrics['avg_protein']) if metrics['avg_protein'] else 0,
                     'avg_carbs': float(metrics['avg_carbs']) if metrics['avg_carbs'] else 0,
@@ -577,32 +688,14 @@ def get_nutrition_dashboard():
                 },
                 'activity': {
                     'log_count': activity['log_count'] or 0,
-                    'last_logged': activity['last_logged'].strftime('%Y-%m-%d %H:%M:%S') if activity['last_logged'] else None,
-                    'days_since_last_log': (datetime.now() - activity['last_logged']).days if activity['last_logged'] else None
+                    'last_logged': last_logged,
+                    'days_since_last_log': days_since_last_log
                 },
                 'alerts': {
-                    'deficiencies': latest_report['DeficiencyAlerts'] if latest_report else None,
-                    'report_date': latest_report['CreatedDate'].strftime('%Y-%m-%d') if latest_report and latest_report['CreatedDate'] else None
-                } if latest_report else None,
+                    'adherence_issues': adherence_issues if adherence_issues else None
+                },
                 'tracking_period': f"Last {days} days"
-            }
-            
-            # Add adherence flags/alerts
-            adherence_issues = []
-            
-            # No meal logs in last 7 days
-            if not activity['last_logged'] or (datetime.now() - activity['last_logged']).days > 7:
-                adherence_issues.append("No meal logs in last 7 days")
-            
-            # Low meal log count
-            if activity['log_count'] < (days / 7):  # Less than 1 log per week on average
-                adherence_issues.append("Low meal logging activity")
-            
-            # Add issues to client data
-            client_data['alerts'] = client_data.get('alerts', {}) or {}
-            client_data['alerts']['adherence_issues'] = adherence_issues if adherence_issues else None
-            
-            result.append(client_data)
+            })
         
         return jsonify(result), 200
     
@@ -0,0 +1,59 @@
+########################################################
+# Maintained client counts (ClientCounts)
+########################################################
+#
+# ClientCounts holds one row per Client.is_archived value with the number
+# of clients in that state, so /api/clients/stats reads two rows instead of
+# counting the Client table. The client create/update/delete/archive/restore
+# routes adjust it in the same transaction as their own write;
+# rebuild_client_counts() recounts it from Client:
+#
+#     python -m backend.clients.counters
+
+
+def count_client(cursor, is_archived, delta=1):
+    """Add delta clients (negative to remove) to the is_archived bucket"""
+    cursor.execute("UPDATE ClientCounts SET Total = Total + %s WHERE is_archived = %s",
+                   (delta, bool(is_archived)))
+
+
+def move_client(cursor, to_archived):
+    """Move one client between the active and archived buckets"""
+    cursor.execute("UPDATE ClientCounts SET Total = Total + IF(is_archived = %s, 1, -1)",
+                   (bool(to_archived),))
+
+
+def read_client_counts(cursor):
+    """Return (active, archived) client counts"""
+    cursor.execute("SELECT is_archived, Total FROM ClientCounts")
+    counts = {bool(row['is_archived']): row['Total'] for row in cursor.fetchall()}
+    return counts.get(False, 0), counts.get(True, 0)
+
+
+def rebuild_client_counts(cursor):
+    """Recount ClientCounts from the Client table"""
+    cursor.execute("""
+        INSERT INTO ClientCounts (is_archived, Total)
+        SELECT * FROM (
+            SELECT states.is_archived, COUNT(c.ID) AS counted
+            FROM (SELECT FALSE AS is_archived UNION ALL SELECT TRUE) states
+            LEFT JOIN Client c ON c.is_archived = states.is_archived
+            GROUP BY states.is_archived
+        ) AS recount
+        ON DUPLICATE KEY UPDATE Total = recount.counted
+    """)
+
+
+if __name__ == '__main__':
+    from backend.db import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        rebuild_client_counts(cursor)
+        conn.commit()
+        active, archived = read_client_counts(cursor)
+        print(f"Rebuilt ClientCounts: {active} active, {archived} archived")
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,112 @@
+########################################################
+# Client name/email search
+########################################################
+#
+# Migration 09 adds an ngram FULLTEXT index on Client (Name, Email) and a
+# B-tree index on Client.Name. InnoDB maintains both on every client
+# INSERT/UPDATE/DELETE, so the client routes need no extra bookkeeping and
+# every API worker process searches the same, always current index.
+#
+# Match modes:
+#
+#   prefix     Name/Email LIKE 'ann%'  -> range scans on idx_client_name and
+#              the unique Email index
+#   substring  the term as an ngram phrase, '"ann"' IN BOOLEAN MODE, finds
+#              the rows containing "ann"; the LIKE '%ann%' next to it only
+#              re-checks those candidates (and the column the term is for)
+#   fuzzy      the term IN NATURAL LANGUAGE MODE matches every row that
+#              shares a bigram with it, so typos like "jonh" still match
+#
+# Terms shorter than NGRAM_TOKEN_SIZE have no ngram to look up. They are
+# matched with a plain LIKE (prefix mode 'a%', other modes '%a%'), which
+# scans the client table but returns the same rows as a longer term would.
+#
+# Age bounds become a DOB range (age_filter) so migration 10's
+# (is_archived, DOB) index can serve them instead of computing every
+# client's age.
+
+MATCH_MODES = ('prefix', 'substring', 'fuzzy')
+
+# MySQL's default ngram_token_size, which migration 09 builds the index with
+NGRAM_TOKEN_SIZE = 2
+
+# Name and Email are indexed together; MATCH() must name exactly these columns
+FULLTEXT_COLUMNS = 'Name, Email'
+
+
+def _like_escape(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _phrase(term):
+    # Inside a quoted phrase the boolean operators are literal; only quotes need removing
+    return '"' + term.replace('"', ' ') + '"'
+
+
+def _indexable(term):
+    return len(term.strip()) >= NGRAM_TOKEN_SIZE
+
+
+def substring_filter(column, term):
+    """
+    SQL condition (and params) for "column contains term" that the
+    FULLTEXT index can answer; used by the name/email list filters.
+    """
+    if not _indexable(term):
+        return f"{column} LIKE %s", ['%' + _like_escape(term) + '%']
+    return (f"(MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE) AND {column} LIKE %s)",
+            [_phrase(term), '%' + _like_escape(term) + '%'])
+
+
+def ranked_search(term, mode='substring'):
+    """
+    Condition and ranking for a free-text search over name and email.
+
+    Returns (where_sql, where_params, rank_sql, rank_params); rank_sql
+    selects match_rank (3 exact, 2 prefix, 1 substring, 0 fuzzy) and
+    relevance (the FULLTEXT score) to ORDER BY, best first.
+    """
+    prefix = _like_escape(term) + '%'
+    contains = '%' + _like_escape(term) + '%'
+    if mode == 'prefix':
+        where_sql, where_params = "(Name LIKE %s OR Email LIKE %s)", [prefix, prefix]
+    elif not _indexable(term):
+        where_sql, where_params = "(Name LIKE %s OR Email LIKE %s)", [contains, contains]
+    elif mode == 'substring':
+        where_sql = (f"MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE) "
+                     f"AND (Name LIKE %s OR Email LIKE %s)")
+        where_params = [_phrase(term), contains, contains]
+    else:
+        where_sql, where_params = f"MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN NATURAL LANGUAGE MODE)", [term]
+
+    rank_sql = f"""
+        CASE
+            WHEN Name = %s OR Email = %s THEN 3
+            WHEN Name LIKE %s OR Email LIKE %s THEN 2
+            WHEN Name LIKE %s OR Email LIKE %s THEN 1
+            ELSE 0
+        END AS match_rank,
+        MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN NATURAL LANGUAGE MODE) AS relevance
+    """
+    rank_params = [term, term, prefix, prefix, contains, contains, term]
+    return where_sql, where_params, rank_sql, rank_params
+
+
+def age_filter(min_age=None, max_age=None):
+    """
+    SQL condition (and params) for min_age <= age <= max_age in whole years,
+    written as a range on DOB:
+
+        age >= min_age  <=>  DOB <= CURDATE() - INTERVAL min_age YEAR
+        age <= max_age  <=>  DOB >  CURDATE() - INTERVAL (max_age + 1) YEAR
+
+    which matches TIMESTAMPDIFF(YEAR, DOB, CURDATE()), 29 February included.
+    """
+    conditions, params = [], []
+    if min_age is not None:
+        conditions.append("DOB <= CURDATE() - INTERVAL %s YEAR")
+        params.append(min_age)
+    if max_age is not None:
+        conditions.append("DOB > CURDATE() - INTERVAL %s YEAR")
+        params.append(max_age + 1)
+    return ' AND '.join(conditions), params
@@ -1,15 +1,214 @@
 import pymysql
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from pymysql.constants import SERVER_STATUS
+from backend.metrics import InstrumentedCursor
 
 # Load environment variables if not already loaded
 load_dotenv()
 
-def get_db_connection():
+
+class PoolTimeoutError(pymysql.err.OperationalError):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class InstrumentedConnection:
+    """
+    Thin wrapper around a pymysql connection whose cursors report SQL
+    activity to the per-request metrics (see backend/metrics.py).
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args):
+        return InstrumentedCursor(self._raw.cursor(*args))
+
+    def close(self):
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PooledConnection(InstrumentedConnection):
     """
-    Create and return a connection to the MySQL database
+    Connection handed out by the pool. Routes use it exactly like a normal
+    connection; close() gives the connection back to the pool instead of
+    tearing down the socket.
     """
-    connection = pymysql.connect(
+
+    def __init__(self, pool, raw):
+        super().__init__(raw)
+        self._pool = pool
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections.
+
+    - keeps at least min_size idle connections around once warmed up
+    - never opens more than max_size connections at the same time
+    - drops idle connections that have not been used for idle_timeout seconds
+    - pings every connection on checkout and replaces dead ones
+    - when all connections are busy, waits up to checkout_timeout seconds
+    """
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=10,
+                 idle_timeout=300, checkout_timeout=10):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = []  # list of (connection, last_used) pairs, most recent last
+        self._size = 0   # connections currently open (idle + checked out)
+        self._cond = threading.Condition()
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'failed_pings': 0,
+        }
+
+    def _connect(self):
+        conn = pymysql.connect(**self.connect_kwargs)
+        with self._cond:
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['connections_closed'] += 1
+            self._cond.notify()
+
+    def _reap_idle(self):
+        """Close idle connections past idle_timeout, keeping min_size. Caller holds the lock."""
+        now = time.monotonic()
+        expired = []
+        while len(self._idle) > 0 and self._size - len(expired) > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.pop(0)
+            expired.append(conn)
+        return expired
+
+    def acquire(self):
+        """Check out a live connection, opening a new one if the pool has room"""
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        while True:
+            conn = None
+            with self._cond:
+                for stale in self._reap_idle():
+                    self._size -= 1
+                    self._stats['connections_closed'] += 1
+                    try:
+                        stale.close()
+                    except Exception:
+                        pass
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    # One wait per checkout, however many times this one wakes up
+                    if not waited:
+                        waited = True
+                        self._stats['waits'] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        if not self._idle and self._size >= self.max_size:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeoutError(
+                                f"No database connection available after {self.checkout_timeout}s"
+                            )
+                    continue
+
+            if conn is None:
+                # We reserved a slot above; open the connection outside the lock
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    with self._cond:
+                        self._stats['failed_pings'] += 1
+                    self._discard(conn)
+                    continue
+
+            with self._cond:
+                self._stats['checkouts'] += 1
+            return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted"""
+        try:
+            if conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones are closed when released)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._stats['connections_closed'] += len(idle)
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            }
+
+
+def _connect_kwargs():
+    return dict(
         host=os.getenv('DB_HOST', 'db'),
         user=os.getenv('DB_USER', 'root'),
         password=os.getenv('MYSQL_ROOT_PASSWORD', ''),
@@ -17,4 +216,61 @@ def get_db_connection():
         charset='utf8mb4',
         cursorclass=pymysql.cursors.DictCursor
     )
-    return connection 
\ No newline at end of file
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _forget_pool_after_fork():
+    """
+    Give a freshly forked worker process its own pool. Inherited connections
+    share their sockets with the parent, so they are dropped without being
+    closed (closing would send QUIT on the parent's connection).
+    """
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect_kwargs(),
+                    min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+                    max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                    idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+                    checkout_timeout=float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 10)),
+                )
+    return _pool
+
+
+def get_pool_stats():
+    """Return the pool counters, or None when pooling is disabled"""
+    if not pool_enabled():
+        return None
+    return get_pool().stats()
+
+
+def pool_enabled():
+    return os.getenv('DB_POOL_ENABLED', 'true').lower() == 'true'
+
+
+def get_db_connection():
+    """
+    Return a connection to the MySQL database.
+
+    Connections come from a shared pool; calling close() on the returned
+    object hands it back. Set DB_POOL_ENABLED=false to open a fresh
+    connection per call instead.
+    """
+    if not pool_enabled():
+        return InstrumentedConnection(pymysql.connect(**_connect_kwargs()))
+    return get_pool().acquire()
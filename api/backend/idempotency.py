@@ -0,0 +1,343 @@
+########################################################
+# Idempotency keys for retry-safe write routes
+########################################################
+#
+# Usage on a blueprint route:
+#
+#     @meals_bp.route('/meal-logs', methods=['POST'])
+#     @idempotent
+#     def add_meal_log(): ...
+#
+# A client that may retry sends a unique "Idempotency-Key" header (e.g. a
+# UUID per meal submission). The first request with a key runs the route
+# and its response is stored; every repeat of the same method, path and key
+# within IDEMPOTENCY_TTL seconds gets that stored response back (with an
+# "Idempotent-Replayed: true" header) without running the route again.
+# Reusing a key for a different request body is rejected with 422.
+#
+# Keys live in the IdempotencyKey table (migration 12), one row per
+# sha256(method, path, key) primary key, so every API process sees them.
+# Recently completed keys are also kept in memory so most retries never
+# reach the database. Concurrent requests with the same key wait for the
+# first one: in-process through an event, across processes by polling the
+# key's row, for up to IDEMPOTENCY_WAIT seconds before answering 409.
+#
+# Responses with a 5xx status are not stored, so the client can retry them.
+# A claim left unfinished by a crashed worker is taken over after
+# IDEMPOTENCY_LOCK_TIMEOUT seconds. If storing a response fails after the
+# route committed, the response is still returned and replayed from memory,
+# and the process writes it to the key row on its next claim. Requests
+# without the header behave as before.
+#
+# POST /meal-logs in write-behind mode does not use this table: its keys are
+# kept with the journal entries (backend/meals/write_behind.py), so keyed
+# meals are acknowledged without MySQL too.
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import pymysql
+from flask import current_app, jsonify, request
+
+from backend.db import get_db_connection
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# How often a process deletes expired keys, and how many per statement
+PURGE_INTERVAL = 300
+PURGE_BATCH = 1000
+
+
+class _StoredResponse:
+    __slots__ = ('request_hash', 'status', 'content_type', 'body', 'expires_at')
+
+    def __init__(self, request_hash, status, content_type, body, expires_at):
+        self.request_hash = request_hash
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    def __init__(self, ttl=86400, max_entries=10000, wait_timeout=10, lock_timeout=60):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.lock_timeout = lock_timeout
+        self._recent = OrderedDict()  # key hash -> _StoredResponse, oldest first
+        self._inflight = {}           # key hash -> threading.Event
+        self._unsaved = {}            # key hash -> _StoredResponse not yet written to its row
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self._stats = {'executed': 0, 'replayed': 0, 'memory_hits': 0, 'conflicts': 0}
+
+    ########################################################
+    # In-memory recent keys
+    ########################################################
+
+    def _recent_response(self, key_hash):
+        with self._lock:
+            stored = self._recent.get(key_hash)
+            if stored is None:
+                return None
+            if stored.expires_at <= time.time():
+                del self._recent[key_hash]
+                return None
+            self._recent.move_to_end(key_hash)
+            self._stats['memory_hits'] += 1
+            return stored
+
+    def _remember(self, key_hash, stored):
+        with self._lock:
+            self._recent[key_hash] = stored
+            self._recent.move_to_end(key_hash)
+            while len(self._recent) > self.max_entries:
+                self._recent.popitem(last=False)
+
+    ########################################################
+    # Key table
+    ########################################################
+
+    def _claim(self, key_hash, request_hash):
+        """
+        Try to take the key for this request. Returns ('claimed', None),
+        ('done', stored response) or ('running', None) when another request
+        holds it.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            self._save_unsaved(conn, cursor)
+            self._maybe_purge(conn, cursor)
+            while True:
+                try:
+                    cursor.execute("""
+                        INSERT INTO IdempotencyKey (KeyHash, RequestHash, CreatedAt, ExpiresAt)
+                        VALUES (%s, %s, NOW(), NOW() + INTERVAL %s SECOND)
+                    """, (key_hash, request_hash, self.ttl))
+                    conn.commit()
+                    return 'claimed', None
+                except pymysql.IntegrityError:
+                    conn.rollback()
+
+                cursor.execute("""
+                    SELECT RequestHash, Status, ContentType, Body,
+                           TIMESTAMPDIFF(SECOND, NOW(), ExpiresAt) AS ttl_left,
+                           ExpiresAt <= NOW() AS expired,
+                           CreatedAt < NOW() - INTERVAL %s SECOND AS abandoned
+                    FROM IdempotencyKey
+                    WHERE KeyHash = %s
+                """, (self.lock_timeout, key_hash))
+                row = cursor.fetchone()
+                conn.commit()
+                if row is None:
+                    continue  # purged in between; insert again
+
+                if row['expired'] or (row['Status'] is None and row['abandoned']):
+                    # Take over an expired key or a claim whose request never finished
+                    cursor.execute("""
+                        UPDATE IdempotencyKey
+                        SET RequestHash = %s, Status = NULL, ContentType = NULL, Body = NULL,
+                            CreatedAt = NOW(), ExpiresAt = NOW() + INTERVAL %s SECOND
+                        WHERE KeyHash = %s
+                          AND (ExpiresAt <= NOW() OR (Status IS NULL AND CreatedAt < NOW() - INTERVAL %s SECOND))
+                    """, (request_hash, self.ttl, key_hash, self.lock_timeout))
+                    conn.commit()
+                    if cursor.rowcount == 1:
+                        return 'claimed', None
+                    continue
+
+                if row['Status'] is None:
+                    return 'running', None
+                return 'done', _StoredResponse(bytes(row['RequestHash']), row['Status'], row['ContentType'],
+                                               bytes(row['Body'] or b''), time.time() + row['ttl_left'])
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _store(self, cursor, key_hash, stored):
+        cursor.execute("""
+            UPDATE IdempotencyKey SET Status = %s, ContentType = %s, Body = %s
+            WHERE KeyHash = %s
+        """, (stored.status, stored.content_type, stored.body, key_hash))
+
+    def _complete(self, key_hash, stored):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            self._store(cursor, key_hash, stored)
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _save_unsaved(self, conn, cursor):
+        """Write the responses whose _complete failed, before their claims look abandoned"""
+        with self._lock:
+            unsaved = list(self._unsaved.items())
+        for key_hash, stored in unsaved:
+            self._store(cursor, key_hash, stored)
+            conn.commit()
+            with self._lock:
+                if self._unsaved.get(key_hash) is stored:
+                    del self._unsaved[key_hash]
+
+    def _release(self, key_hash):
+        """Drop an unfinished claim so the request can be retried"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM IdempotencyKey WHERE KeyHash = %s AND Status IS NULL", (key_hash,))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _maybe_purge(self, conn, cursor):
+        """Delete a batch of expired keys at most once per PURGE_INTERVAL"""
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + PURGE_INTERVAL
+        cursor.execute("DELETE FROM IdempotencyKey WHERE ExpiresAt <= NOW() LIMIT %s", (PURGE_BATCH,))
+        conn.commit()
+
+    ########################################################
+    # Request handling
+    ########################################################
+
+    def _replay(self, stored, request_hash):
+        if stored.request_hash != request_hash:
+            with self._lock:
+                self._stats['conflicts'] += 1
+            return jsonify({"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"}), 422
+        with self._lock:
+            self._stats['replayed'] += 1
+        response = current_app.response_class(stored.body, status=stored.status, content_type=stored.content_type)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def run(self, key_hash, request_hash, compute):
+        """Return the stored response for key_hash, or compute() and store it"""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            stored = self._recent_response(key_hash)
+            if stored is not None:
+                return self._replay(stored, request_hash)
+
+            with self._lock:
+                flight = self._inflight.get(key_hash)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key_hash] = threading.Event()
+
+            if not leader:
+                # Same key in flight in this process: wait for it, then look again
+                if not flight.wait(max(deadline - time.monotonic(), 0)):
+                    return self._still_running()
+                continue
+
+            try:
+                while True:
+                    state, stored = self._claim(key_hash, request_hash)
+                    if state != 'running':
+                        break
+                    # Another process is running this key; poll its row
+                    if time.monotonic() >= deadline:
+                        return self._still_running()
+                    time.sleep(0.05)
+
+                if state == 'done':
+                    self._remember(key_hash, stored)
+                    return self._replay(stored, request_hash)
+
+                try:
+                    response = compute()
+                except Exception:
+                    self._release(key_hash)
+                    raise
+                if response.status_code >= 500:
+                    self._release(key_hash)
+                    return response
+
+                stored = _StoredResponse(request_hash, response.status_code, response.content_type,
+                                         response.get_data(), time.time() + self.ttl)
+                try:
+                    self._complete(key_hash, stored)
+                except Exception as e:
+                    # The route's write is committed: answer it, replay it from
+                    # memory and write the key row on this process's next claim
+                    current_app.logger.warning("Could not store idempotent response: %s", e)
+                    with self._lock:
+                        self._unsaved[key_hash] = stored
+                self._remember(key_hash, stored)
+                with self._lock:
+                    self._stats['executed'] += 1
+                return response
+            finally:
+                with self._lock:
+                    self._inflight.pop(key_hash, None)
+                flight.set()
+
+    def _still_running(self):
+        return jsonify({"error": f"A request with this {IDEMPOTENCY_HEADER} is still being processed"}), 409
+
+    def reset_after_fork(self):
+        """Start a forked worker with empty state and a fresh lock (another thread may have held it)"""
+        self._recent = OrderedDict()
+        self._inflight = {}
+        self._unsaved = {}
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self._stats = dict.fromkeys(self._stats, 0)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'recent_keys': len(self._recent), 'unsaved_keys': len(self._unsaved)}
+
+
+idempotency_store = IdempotencyStore(
+    ttl=int(os.getenv('IDEMPOTENCY_TTL', 86400)),
+    max_entries=int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 10000)),
+    wait_timeout=float(os.getenv('IDEMPOTENCY_WAIT', 10)),
+    lock_timeout=int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', 60)),
+)
+os.register_at_fork(after_in_child=idempotency_store.reset_after_fork)
+
+
+def request_key_hashes():
+    """
+    (key hash, request hash) for the current request's Idempotency-Key, or
+    None without the header. Raises ValueError for a key over MAX_KEY_LENGTH.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters")
+    key_hash = hashlib.sha256(f"{request.method} {request.path}\n{key}".encode()).digest()
+    request_hash = hashlib.sha256(request.get_data()).digest()
+    return key_hash, request_hash
+
+
+def idempotent(view):
+    """Make a write route replay its first response for repeated Idempotency-Key headers"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            hashes = request_key_hashes()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if hashes is None:
+            return view(*args, **kwargs)
+
+        key_hash, request_hash = hashes
+        return idempotency_store.run(
+            key_hash, request_hash, lambda: current_app.make_response(view(*args, **kwargs)))
+    return wrapper
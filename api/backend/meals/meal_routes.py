@@ -2,18 +2,191 @@
 # MealLog Routes Blueprint
 ########################################################
 
-from flask import Blueprint, request, jsonify
-from datetime import datetime 
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+import csv
+import io
+import json
+import sqlite3
 import pymysql
 from backend.db import get_db_connection
+from backend.idempotency import IDEMPOTENCY_HEADER, idempotent, request_key_hashes
+from backend.meals.write_behind import meal_queue
+from backend.meals.nutrient_catalog import NUTRIENT_TYPE_JOIN, nutrient_catalog, insert_nutrients
+from backend.meals.rollup import meal_contributions, apply_rollup_deltas, stored_meal_nutrients
+from backend.meals.nutrient_diff import (NUTRIENT_KEY_FIELDS, apply_nutrient_diff, diff_nutrients,
+                                         stored_nutrient_rows, updated_nutrients)
+from backend.pagination import CURSOR_ERRORS, parse_page_args, parse_fields, encode_cursor, decode_cursor
+from backend.serialization import MEAL_LOG, NUTRIENT, NUTRIENT_TOTAL, encode_value
 
 # Create the blueprint
 meals_bp = Blueprint('meals', __name__)
 
+NUTRIENT_FIELDS = ['name', 'category', 'quantity', 'unit']
+
+# Fields PUT/PATCH /meal-logs/<id> can change
+MEAL_UPDATE_FIELDS = ['datetime', 'notes', 'client_id', 'nutrients', 'remove_nutrients']
+
+# Upper bound on meals accepted by one bulk request, and meals per transaction
+MAX_BULK_MEALS = 2000
+BULK_BATCH_SIZE = 250
+
+# Values MealLog.Datetime (TIMESTAMP) and Nutrient.Quantity (DECIMAL(10,2)) can
+# store; meals outside them are rejected before any write, so one bad meal
+# cannot fail the batch it would land in or surface as a database error
+MEAL_DATETIME_RANGE = (datetime(1970, 1, 2), datetime(2038, 1, 18))
+MAX_QUANTITY = Decimal('99999999.99')
+
+# Longest date range served by the daily summary range route
+MAX_SUMMARY_RANGE_DAYS = 366
+
+
+def _nutrient_rows(nutrients, meal_log_id):
+    """Build Nutrient insert rows, skipping entries that miss a required field"""
+    return [
+        (n['name'], n['category'], n['quantity'], n['unit'], meal_log_id)
+        for n in nutrients
+        if isinstance(n, dict) and all(key in n for key in NUTRIENT_FIELDS)
+    ]
+
+
+def _group_by_category(totals):
+    """Group DailyNutrientTotals rows into {category: [{name, total, unit}]}"""
+    nutrients_by_category = {}
+    for nutrient in totals:
+        nutrients_by_category.setdefault(nutrient['Category'], []).append(NUTRIENT_TOTAL(nutrient))
+    return nutrients_by_category
+
+
+def _parse_meal_datetime(value):
+    """
+    Parse a submitted meal datetime.
+    Returns (datetime, None), or (None, error message) when it is malformed or
+    outside MEAL_DATETIME_RANGE.
+    """
+    try:
+        meal_datetime = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return None, "Invalid datetime format. Use YYYY-MM-DD HH:MM:SS"
+    if not MEAL_DATETIME_RANGE[0] <= meal_datetime <= MEAL_DATETIME_RANGE[1]:
+        return None, (f"datetime must be between {MEAL_DATETIME_RANGE[0]:%Y-%m-%d} "
+                      f"and {MEAL_DATETIME_RANGE[1]:%Y-%m-%d}")
+    return meal_datetime, None
+
+
+def _quantity_error(quantity):
+    """
+    Check a nutrient quantity the way the inserts and the rollup will parse it,
+    so "nan", "inf" and overflowing values fail validation and not the write.
+    Returns None, or an error message to prefix with the nutrient.
+    """
+    try:
+        if isinstance(quantity, bool):
+            raise InvalidOperation
+        quantity = Decimal(str(quantity))
+    except InvalidOperation:
+        return "quantity must be a number"
+    if not quantity.is_finite() or abs(quantity) > MAX_QUANTITY:
+        return f"quantity must be a finite number of at most {MAX_QUANTITY}"
+    return None
+
+
+def _validate_bulk_meal(item):
+    """
+    Validate one meal of a bulk request.
+    Returns (meal, None) with the parsed meal, or (None, error message).
+    """
+    if not isinstance(item, dict):
+        return None, "Meal must be a JSON object"
+    
+    if not all(key in item for key in ['client_id', 'notes']):
+        return None, "client_id and notes are required fields"
+    
+    try:
+        client_id = int(item['client_id'])
+    except (TypeError, ValueError):
+        return None, "client_id must be an integer"
+    
+    meal_datetime = None
+    if item.get('datetime'):
+        meal_datetime, error = _parse_meal_datetime(item['datetime'])
+        if error:
+            return None, error
+    
+    nutrients = item.get('nutrients') or []
+    if not isinstance(nutrients, list):
+        return None, "nutrients must be a list"
+    
+    for position, nutrient in enumerate(nutrients):
+        if not isinstance(nutrient, dict) or not all(key in nutrient for key in NUTRIENT_FIELDS):
+            return None, f"Nutrient {position} must have name, category, quantity and unit"
+        error = _quantity_error(nutrient['quantity'])
+        if error:
+            return None, f"Nutrient {position} {error}"
+    
+    return {
+        'client_id': client_id,
+        'notes': item['notes'],
+        'datetime': meal_datetime,
+        'nutrients': nutrients
+    }, None
+
+
+def insert_meal_batch(cursor, meals, now):
+    """
+    Insert validated meals (see _validate_bulk_meal) with their nutrients and
+    rollup deltas on the caller's cursor/transaction. Meals without a
+    datetime get `now`, and their nutrient types must already be resolved
+    (resolve_meal_nutrients). Returns the first new MealLog ID; the meals get
+    consecutive IDs in list order.
+    """
+    # One multi-row INSERT: InnoDB hands a single statement consecutive
+    # auto-increment ids, starting at lastrowid
+    values = ', '.join(['(%s, %s, %s)'] * len(meals))
+    params = []
+    for meal in meals:
+        params.extend((meal['datetime'] or now, meal['notes'], meal['client_id']))
+    cursor.execute(f"INSERT INTO MealLog (Datetime, Notes, ClientID) VALUES {values}", params)
+    first_id = cursor.lastrowid
+    
+    nutrient_rows = []
+    deltas = None
+    for offset, meal in enumerate(meals):
+        meal_rows = _nutrient_rows(meal['nutrients'], first_id + offset)
+        nutrient_rows.extend(meal_rows)
+        deltas = meal_contributions(meal['client_id'], meal['datetime'] or now,
+                                    [row[:4] for row in meal_rows], into=deltas)
+    if nutrient_rows:
+        insert_nutrients(cursor, nutrient_rows)
+    
+    apply_rollup_deltas(cursor, deltas)
+    return first_id
+
+
+def resolve_meal_nutrients(meals):
+    """Add the nutrient types of validated meals to the catalog (before opening a write connection)"""
+    nutrient_catalog.resolve(row for meal in meals for row in _nutrient_rows(meal['nutrients'], None))
+
+
+# Fields a meal log can be projected to (nutrients come from their own table)
+MEAL_FIELDS = MEAL_LOG.keys + ['nutrients']
+
+MEAL_CURSOR_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
 # Route to get all meal logs for a client
 @meals_bp.route('/meal-logs', methods=['GET'])
 def get_meal_logs():
-    """Retrieve all meal logs for a client with optional date filtering"""
+    """
+    Retrieve all meal logs for a client with optional date filtering.
+
+    Pass limit (and then the returned next_cursor as cursor) to page through
+    the meals newest first; the response becomes {"items": [...], "next_cursor": ...}.
+    fields=id,datetime limits the keys returned; nutrients are only loaded when requested.
+    """
+    conn = None
+    cursor = None
     try:
         # Get query parameters
         client_id = request.args.get('client_id')
@@ -24,76 +197,258 @@ def get_meal_logs():
         if not client_id:
             return jsonify({"error": "client_id parameter is required"}), 400
         
-        # Connect to the database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Base query
-        query = "SELECT * FROM MealLog WHERE ClientID = %s"
+        try:
+            paginate, limit, after = parse_page_args(request.args)
+            fields = parse_fields(request.args.get('fields'), MEAL_FIELDS)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if after:
+            try:
+                after_datetime, after_id = decode_cursor(after, 2)
+                after_datetime = datetime.strptime(after_datetime, MEAL_CURSOR_FORMAT)
+                after_id = int(after_id)
+            except CURSOR_ERRORS:
+                return jsonify({"error": "Invalid cursor"}), 400
+        
+        # Select only the requested columns (ID and Datetime are always needed for the cursor)
+        mapper = MEAL_LOG.only(fields)
+        columns = ['ID', 'Datetime'] + [column for column in mapper.columns() if column not in ('ID', 'Datetime')]
+        query = f"SELECT {', '.join(columns)} FROM MealLog WHERE ClientID = %s"
         params = [client_id]
         
         # Add date filters if provided
         if date_from:
             try:
-                # Validate date format
-                datetime.strptime(date_from, '%Y-%m-%d')
-                query += " AND DATE(Datetime) >= %s"
-                params.append(date_from)
+                # Compare the raw column so the (ClientID, Datetime) index can be used
+                query += " AND Datetime >= %s"
+                params.append(datetime.strptime(date_from, '%Y-%m-%d'))
             except ValueError:
                 return jsonify({"error": "Invalid date_from format. Use YYYY-MM-DD"}), 400
         
         if date_to:
             try:
-                # Validate date format
-                datetime.strptime(date_to, '%Y-%m-%d')
-                query += " AND DATE(Datetime) <= %s"
-                params.append(date_to)
+                # Half-open upper bound: everything before the start of the next day
+                query += " AND Datetime < %s"
+                params.append(datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1))
             except ValueError:
                 return jsonify({"error": "Invalid date_to format. Use YYYY-MM-DD"}), 400
         
-        # Order by date, newest first
-        query += " ORDER BY Datetime DESC"
+        # Keyset pagination: continue right after the last (Datetime, ID) of the previous page.
+        # Spelled out as an OR so MySQL turns it into ranges on the (ClientID, Datetime) index.
+        if after:
+            query += " AND (Datetime < %s OR (Datetime = %s AND ID < %s))"
+            params.extend([after_datetime, after_datetime, after_id])
+        
+        # Order by date, newest first (ID breaks ties so pages never overlap)
+        query += " ORDER BY Datetime DESC, ID DESC"
+        if paginate:
+            # One extra row tells us whether there is a next page
+            query += " LIMIT %s"
+            params.append(limit + 1)
+        
+        # Connect to the database
+        conn = get_db_connection()
+        cursor = conn.cursor()
         
         # Execute the query
         cursor.execute(query, params)
         meals = cursor.fetchall()
         
+        has_more = paginate and len(meals) > limit
+        if paginate:
+            meals = meals[:limit]
+        
+        # Get nutrients for all returned meals in one query
+        nutrients_by_meal = {meal['ID']: [] for meal in meals}
+        if nutrients_by_meal and 'nutrients' in fields:
+            placeholders = ', '.join(['%s'] * len(nutrients_by_meal))
+            cursor.execute(
+                f"SELECT n.ID, t.Name, t.Category, n.Quantity, t.Unit, n.MealLogID FROM Nutrient n "
+                f"{NUTRIENT_TYPE_JOIN} "
+                f"WHERE n.MealLogID IN ({placeholders}) ORDER BY n.MealLogID, n.ID",
+                list(nutrients_by_meal)
+            )
+            for nutrient in cursor.fetchall():
+                nutrients_by_meal[nutrient['MealLogID']].append(NUTRIENT(nutrient))
+        
         # Format the result
-        result = []
-        for meal in meals:
-            # Get nutrients for this meal
-            cursor.execute("SELECT * FROM Nutrient WHERE MealLogID = %s", (meal['ID'],))
-            nutrients = cursor.fetchall()
-            
-            # Format nutrients
-            nutrients_list = []
-            for nutrient in nutrients:
-                nutrients_list.append({
-                    'id': nutrient['ID'],
-                    'name': nutrient['Name'],
-                    'category': nutrient['Category'],
-                    'quantity': float(nutrient['Quantity']),
-                    'unit': nutrient['Unit']
-                })
-            
-            # Add meal with nutrients to result
-            result.append({
-                'id': meal['ID'],
-                'datetime': meal['Datetime'].strftime('%Y-%m-%d %H:%M:%S'),
-                'notes': meal['Notes'],
-                'client_id': meal['ClientID'],
-                'nutrients': nutrients_list
-            })
+        result = mapper.many(meals)
+        if 'nutrients' in fields:
+            for item, meal in zip(result, meals):
+                item['nutrients'] = nutrients_by_meal[meal['ID']]
         
-        return jsonify(result), 200
+        if not paginate:
+            return jsonify(result), 200
+        
+        last = meals[-1] if meals else None
+        return jsonify({
+            "items": result,
+            "next_cursor": encode_cursor(last['Datetime'].strftime(MEAL_CURSOR_FORMAT), last['ID']) if has_more else None
+        }), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
     finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+# Columns of the CSV export, one line per nutrient
+EXPORT_CSV_COLUMNS = ['meal_id', 'datetime', 'notes', 'client_id',
+                      'nutrient_id', 'nutrient_name', 'category', 'quantity', 'unit']
+
+# Rows read from the server per round trip, and output lines per yielded chunk
+EXPORT_FETCH_SIZE = 1000
+EXPORT_CHUNK_LINES = 500
+
+# Seconds MySQL waits on a slow export download before giving up (server default is 60)
+EXPORT_NET_WRITE_TIMEOUT = 600
+
+
+def _export_lines(rows, export_format):
+    """
+    Turn the joined (meal, nutrient) rows, ordered by meal, into export lines.
+    NDJSON gets one line per meal with its nutrients; CSV one line per nutrient.
+    Only the meal currently being assembled is held in memory.
+    """
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        for row in rows:
+            writer.writerow([
+                row['MealID'], row['Datetime'].strftime('%Y-%m-%d %H:%M:%S') if row['Datetime'] else '',
+                row['Notes'], row['ClientID'], row['NutrientID'], row['Name'], row['Category'],
+                row['Quantity'], row['Unit']
+            ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        return
+
+    meal = None
+    for row in rows:
+        if meal is None or meal['id'] != row['MealID']:
+            if meal is not None:
+                yield json.dumps(meal, default=encode_value) + '\n'
+            meal = {
+                'id': row['MealID'],
+                'datetime': row['Datetime'],
+                'notes': row['Notes'],
+                'client_id': row['ClientID'],
+                'nutrients': []
+            }
+        if row['NutrientID'] is not None:
+            meal['nutrients'].append({
+                'id': row['NutrientID'],
+                'name': row['Name'],
+                'category': row['Category'],
+                'quantity': row['Quantity'],
+                'unit': row['Unit']
+            })
+    if meal is not None:
+        yield json.dumps(meal, default=encode_value) + '\n'
+
+
+def _stream_export(conn, cursor, export_format):
+    """Yield the export in chunks while reading the unbuffered cursor, then release the connection"""
+    def rows():
+        while True:
+            batch = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not batch:
+                return
+            yield from batch
+
+    try:
+        chunk = []
+        for line in _export_lines(rows(), export_format):
+            chunk.append(line)
+            if len(chunk) >= EXPORT_CHUNK_LINES:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+    finally:
+        # Closing an unbuffered cursor drains what the server has left to send,
+        # so the connection is clean again before it goes back to the pool
         cursor.close()
         conn.close()
 
+
+# Route to export a client's full meal history
+@meals_bp.route('/meal-logs/export', methods=['GET'])
+def export_meal_logs():
+    """
+    Stream every meal of a client, oldest first, with its nutrients.
+
+    format=ndjson (default) writes one JSON meal per line, format=csv one row
+    per nutrient. Rows come from an unbuffered server-side cursor and are
+    written out as they arrive, so memory use does not grow with the history.
+    """
+    client_id = request.args.get('client_id')
+    date_from = request.args.get('date_from')
+    date_to = request.args.get('date_to')
+    export_format = request.args.get('format', 'ndjson').lower()
+    
+    if not client_id:
+        return jsonify({"error": "client_id parameter is required"}), 400
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    
+    query = """
+        SELECT ml.ID as MealID, ml.Datetime, ml.Notes, ml.ClientID,
+               n.ID as NutrientID, t.Name, t.Category, n.Quantity, t.Unit
+        FROM MealLog ml
+        LEFT JOIN Nutrient n ON n.MealLogID = ml.ID
+        LEFT JOIN NutrientType t ON t.ID = n.NutrientTypeID
+        WHERE ml.ClientID = %s
+    """
+    params = [client_id]
+    try:
+        if date_from:
+            query += " AND ml.Datetime >= %s"
+            params.append(datetime.strptime(date_from, '%Y-%m-%d'))
+        if date_to:
+            query += " AND ml.Datetime < %s"
+            params.append(datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1))
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+    query += " ORDER BY ml.Datetime, ml.ID, n.ID"
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT ID FROM Client WHERE ID = %s", (client_id,))
+        client = cursor.fetchone()
+        cursor.close()
+        if not client:
+            conn.close()
+            return jsonify({"error": "Client not found"}), 404
+        
+        # Give slow downloads time: the server waits on us while we stream
+        stream_cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+        stream_cursor.execute("SET SESSION net_write_timeout = %s", (EXPORT_NET_WRITE_TIMEOUT,))
+        stream_cursor.execute(query, params)
+    except pymysql.MySQLError as e:
+        if conn:
+            conn.close()
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+    except Exception as e:
+        if conn:
+            conn.close()
+        return jsonify({"error": str(e)}), 500
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"meal-logs-client-{client_id}.{export_format}"
+    return Response(
+        stream_with_context(_stream_export(conn, stream_cursor, export_format)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 # Route to get a specific meal log by ID
 @meals_bp.route('/meal-logs/<int:meal_id>', methods=['GET'])
 def get_meal_log(meal_id):
@@ -110,28 +465,17 @@ def get_meal_log(meal_id):
             return jsonify({"error": "Meal log not found"}), 404
         
         # Get nutrients for this meal
-        cursor.execute("SELECT * FROM Nutrient WHERE MealLogID = %s", (meal_id,))
+        cursor.execute(f"""
+            SELECT n.ID, t.Name, t.Category, n.Quantity, t.Unit, n.MealLogID
+            FROM Nutrient n
+            {NUTRIENT_TYPE_JOIN}
+            WHERE n.MealLogID = %s
+        """, (meal_id,))
         nutrients = cursor.fetchall()
         
-        # Format nutrients
-        nutrients_list = []
-        for nutrient in nutrients:
-            nutrients_list.append({
-                'id': nutrient['ID'],
-                'name': nutrient['Name'],
-                'category': nutrient['Category'],
-                'quantity': float(nutrient['Quantity']),
-                'unit': nutrient['Unit']
-            })
-        
         # Format the result
-        result = {
-            'id': meal['ID'],
-            'datetime': meal['Datetime'].strftime('%Y-%m-%d %H:%M:%S'),
-            'notes': meal['Notes'],
-            'client_id': meal['ClientID'],
-            'nutrients': nutrients_list
-        }
+        result = MEAL_LOG(meal)
+        result['nutrients'] = NUTRIENT.many(nutrients)
         
         return jsonify(result), 200
     
@@ -145,58 +489,58 @@ def get_meal_log(meal_id):
 # Route to add a new meal log
 @meals_bp.route('/meal-logs', methods=['POST'])
 def add_meal_log():
-    """Add a new meal log entry for a client"""
+    """
+    Add a new meal log entry for a client.
+
+    The meal is validated like a bulk meal. With MEAL_WRITE_BEHIND=true it
+    is then queued and acknowledged with 202 and a provisional_id; see
+    GET /meal-logs/queued/<provisional_id>.
+    """
+    if meal_queue.enabled:
+        return _queue_meal_log()
+    return _insert_meal_log()
+
+@idempotent
+def _insert_meal_log():
+    """POST /meal-logs: insert the meal, its nutrients and rollup in one transaction"""
+    conn = None
+    cursor = None
     try:
-        data = request.get_json()
+        # Validated exactly like a queued meal, so MEAL_WRITE_BEHIND does not
+        # change which requests are accepted
+        meal, error = _validate_bulk_meal(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
         
-        # Validate required fields
-        if not all(key in data for key in ['client_id', 'notes']):
-            return jsonify({"error": "client_id and notes are required fields"}), 400
-        
-        # Parse datetime if provided, otherwise use current time
-        meal_datetime = datetime.now()
-        if 'datetime' in data and data['datetime']:
-            try:
-                meal_datetime = datetime.strptime(data['datetime'], '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                return jsonify({"error": "Invalid datetime format. Use YYYY-MM-DD HH:MM:SS"}), 400
+        # Use the current time when no datetime is provided
+        meal_datetime = meal['datetime'] or datetime.now()
+        nutrients = meal['nutrients']
+        nutrient_catalog.resolve(_nutrient_rows(nutrients, None))
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
         # Check if client exists
-        cursor.execute("SELECT ID FROM Client WHERE ID = %s", (data['client_id'],))
+        cursor.execute("SELECT ID FROM Client WHERE ID = %s", (meal['client_id'],))
         if not cursor.fetchone():
             return jsonify({"error": "Client not found"}), 404
         
         # Insert new meal log
         query = "INSERT INTO MealLog (Datetime, Notes, ClientID) VALUES (%s, %s, %s)"
-        cursor.execute(query, (meal_datetime, data['notes'], data['client_id']))
-        conn.commit()
+        cursor.execute(query, (meal_datetime, meal['notes'], meal['client_id']))
         
         # Get the ID of the newly created meal log
         meal_log_id = cursor.lastrowid
         
-        # Add nutrients if provided
-        if 'nutrients' in data and isinstance(data['nutrients'], list):
-            for nutrient in data['nutrients']:
-                # Validate required nutrient fields
-                if not all(key in nutrient for key in ['name', 'category', 'quantity', 'unit']):
-                    continue  # Skip invalid nutrients
-                
-                # Insert nutrient
-                nutrient_query = """
-                    INSERT INTO Nutrient (Name, Category, Quantity, Unit, MealLogID) 
-                    VALUES (%s, %s, %s, %s, %s)
-                """
-                cursor.execute(nutrient_query, (
-                    nutrient['name'],
-                    nutrient['category'],
-                    nutrient['quantity'],
-                    nutrient['unit'],
-                    meal_log_id
-                ))
+        nutrient_rows = _nutrient_rows(nutrients, meal_log_id)
+        if nutrient_rows:
+            insert_nutrients(cursor, nutrient_rows)
+        
+        # Keep the daily rollup in step with the new meal
+        apply_rollup_deltas(cursor, meal_contributions(
+            meal['client_id'], meal_datetime, [row[:4] for row in nutrient_rows]))
         
+        # Meal, nutrients and rollup are committed together
         conn.commit()
         
         return jsonify({
@@ -211,20 +555,211 @@ def add_meal_log():
         return jsonify({"error": str(e)}), 500
     
     finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
-# Route to update a meal log
-@meals_bp.route('/meal-logs/<int:meal_id>', methods=['PUT'])
-def update_meal_log(meal_id):
-    """Update a meal log entry"""
+def _queue_meal_log():
+    """
+    POST /meal-logs in write-behind mode: validate, journal, acknowledge.
+    An Idempotency-Key is kept with the journal entry instead of the
+    IdempotencyKey table, so keyed requests do not need MySQL either.
+    """
+    try:
+        try:
+            key = request_key_hashes()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        meal, error = _validate_bulk_meal(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
+        
+        if key is None:
+            provisional_id, state = meal_queue.enqueue(meal), 'queued'
+        else:
+            provisional_id, state = meal_queue.enqueue_once(meal, *key)
+        if state == 'conflict':
+            return jsonify({"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"}), 422
+        
+        response = jsonify({
+            "message": "Meal log queued",
+            "provisional_id": provisional_id,
+            "status": "queued"
+        })
+        if state == 'replayed':
+            response.headers['Idempotent-Replayed'] = 'true'
+        return response, 202
+    
+    except sqlite3.Error as e:
+        return jsonify({"error": f"Queue error: {str(e)}"}), 500
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Route to check on a meal log queued in write-behind mode
+@meals_bp.route('/meal-logs/queued/<int:provisional_id>', methods=['GET'])
+def get_queued_meal_log(provisional_id):
+    """Status of a queued meal: queued, created (with its id) or failed (with the error)"""
+    try:
+        status = meal_queue.status(provisional_id) if meal_queue.enabled else None
+        if status is None:
+            return jsonify({"error": "Queued meal log not found"}), 404
+        return jsonify(status), 200
+    
+    except sqlite3.Error as e:
+        return jsonify({"error": f"Queue error: {str(e)}"}), 500
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Route to add many meal logs at once
+@meals_bp.route('/meal-logs/bulk', methods=['POST'])
+@idempotent
+def add_meal_logs_bulk():
+    """
+    Add many meal log entries (with their nutrients) in one request.
+    
+    Accepts {"meals": [...]} or a bare list, where each meal has the same
+    fields as POST /meal-logs. All meals are validated up front; valid ones
+    are inserted in batches of BULK_BATCH_SIZE, one transaction per batch.
+    The response lists an id or an error for every submitted meal, in order,
+    and whether each batch committed or failed: a failing batch never hides
+    the ids of the batches committed before it.
+    """
+    conn = None
+    cursor = None
+    try:
+        data = request.get_json()
+        meals = data.get('meals') if isinstance(data, dict) else data
+        
+        if not isinstance(meals, list) or not meals:
+            return jsonify({"error": "A non-empty list of meals is required"}), 400
+        
+        if len(meals) > MAX_BULK_MEALS:
+            return jsonify({"error": f"At most {MAX_BULK_MEALS} meals can be submitted at once"}), 400
+        
+        # Validate every meal before touching the database
+        results = [{'index': i} for i in range(len(meals))]
+        valid = []
+        for i, item in enumerate(meals):
+            meal, error = _validate_bulk_meal(item)
+            if error:
+                results[i]['error'] = error
+            else:
+                valid.append((i, meal))
+        
+        resolve_meal_nutrients([meal for _, meal in valid])
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Check all referenced clients exist with one query
+        client_ids = sorted({meal['client_id'] for _, meal in valid})
+        existing_clients = set()
+        if client_ids:
+            placeholders = ', '.join(['%s'] * len(client_ids))
+            cursor.execute(f"SELECT ID FROM Client WHERE ID IN ({placeholders})", client_ids)
+            existing_clients = {row['ID'] for row in cursor.fetchall()}
+        
+        pending = []
+        for i, meal in valid:
+            if meal['client_id'] in existing_clients:
+                pending.append((i, meal))
+            else:
+                results[i]['error'] = "Client not found"
+        
+        now = datetime.now()
+        batches = []
+        for start in range(0, len(pending), BULK_BATCH_SIZE):
+            batch = pending[start:start + BULK_BATCH_SIZE]
+            indexes = [i for i, _ in batch]
+            try:
+                first_id = insert_meal_batch(cursor, [meal for _, meal in batch], now)
+                conn.commit()
+                
+                for offset, i in enumerate(indexes):
+                    results[i]['id'] = first_id + offset
+                batches.append({'indexes': indexes, 'status': 'committed'})
+            
+            # Any failure only rolls back this batch; earlier ones stay committed and reported
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except pymysql.MySQLError:
+                    pass  # a lost connection fails the remaining batches, which are reported too
+                error = f"Database error: {str(e)}" if isinstance(e, pymysql.MySQLError) else str(e)
+                for i in indexes:
+                    results[i]['error'] = error
+                batches.append({'indexes': indexes, 'status': 'failed', 'error': error})
+        
+        created = sum(1 for r in results if 'id' in r)
+        failed = len(results) - created
+        
+        if created == 0:
+            status = 400
+        elif failed:
+            status = 207
+        else:
+            status = 201
+        
+        return jsonify({
+            "message": f"{created} meal logs created, {failed} failed",
+            "created": created,
+            "failed": failed,
+            "batches": batches,
+            "results": results
+        }), status
+    
+    except pymysql.MySQLError as e:
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def _update_meal_log(meal_id, partial):
+    """
+    Shared body of PUT and PATCH /meal-logs/<id>. The meal's nutrients are
+    diffed against the submitted ones (see backend/meals/nutrient_diff.py):
+    PUT replaces the whole set, PATCH only changes the nutrients it lists
+    plus the (name, category, unit) keys in remove_nutrients.
+    """
+    conn = None
+    cursor = None
     try:
         data = request.get_json()
         
         # Ensure at least one field to update
-        if not any(key in data for key in ['datetime', 'notes', 'client_id']):
+        if not isinstance(data, dict) or not any(key in data for key in MEAL_UPDATE_FIELDS):
             return jsonify({"error": "No fields to update provided"}), 400
         
+        # Invalid nutrients are skipped, like on create
+        submitted = None
+        if isinstance(data.get('nutrients'), list):
+            submitted = [row[:4] for row in _nutrient_rows(data['nutrients'], meal_id)]
+            for nutrient in submitted:
+                error = _quantity_error(nutrient[2])
+                if error:
+                    return jsonify({"error": f"Nutrient {error}"}), 400
+        meal_datetime = None
+        if 'datetime' in data:
+            meal_datetime, error = _parse_meal_datetime(data['datetime'])
+            if error:
+                return jsonify({"error": error}), 400
+        removed = []
+        if partial and isinstance(data.get('remove_nutrients'), list):
+            removed = [tuple(n[key] for key in NUTRIENT_KEY_FIELDS) for n in data['remove_nutrients']
+                       if isinstance(n, dict) and all(key in n for key in NUTRIENT_KEY_FIELDS)]
+        if submitted:
+            nutrient_catalog.resolve(submitted)
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         
@@ -244,13 +779,11 @@ def update_meal_log(meal_id):
         update_fields = []
         params = []
         
-        if 'datetime' in data:
-            try:
-                meal_datetime = datetime.strptime(data['datetime'], '%Y-%m-%d %H:%M:%S')
-                update_fields.append("Datetime = %s")
-                params.append(meal_datetime)
-            except ValueError:
-                return jsonify({"error": "Invalid datetime format. Use YYYY-MM-DD HH:MM:SS"}), 400
+        if meal_datetime is not None:
+            update_fields.append("Datetime = %s")
+            params.append(meal_datetime)
+        else:
+            meal_datetime = meal['Datetime']
         
         if 'notes' in data:
             update_fields.append("Notes = %s")
@@ -260,40 +793,31 @@ def update_meal_log(meal_id):
             update_fields.append("ClientID = %s")
             params.append(data['client_id'])
         
-        # Add meal_id to params
-        params.append(meal_id)
-        
-        # Execute update
-        query = f"UPDATE MealLog SET {', '.join(update_fields)} WHERE ID = %s"
-        cursor.execute(query, params)
-        
-        # Update nutrients if provided
-        if 'nutrients' in data and isinstance(data['nutrients'], list):
-            # Option 1: Delete all existing nutrients and add new ones
-            cursor.execute("DELETE FROM Nutrient WHERE MealLogID = %s", (meal_id,))
-            
-            # Insert new nutrients
-            for nutrient in data['nutrients']:
-                # Validate required nutrient fields
-                if not all(key in nutrient for key in ['name', 'category', 'quantity', 'unit']):
-                    continue  # Skip invalid nutrients
-                
-                # Insert nutrient
-                nutrient_query = """
-                    INSERT INTO Nutrient (Name, Category, Quantity, Unit, MealLogID) 
-                    VALUES (%s, %s, %s, %s, %s)
-                """
-                cursor.execute(nutrient_query, (
-                    nutrient['name'],
-                    nutrient['category'],
-                    nutrient['quantity'],
-                    nutrient['unit'],
-                    meal_id
-                ))
+        # Execute update (a nutrients-only update leaves the MealLog row alone)
+        if update_fields:
+            params.append(meal_id)
+            query = f"UPDATE MealLog SET {', '.join(update_fields)} WHERE ID = %s"
+            cursor.execute(query, params)
+        
+        # Apply only the nutrient inserts, updates and deletes that are needed
+        stored = stored_nutrient_rows(cursor, meal_id)
+        old_nutrients = [(n['Name'], n['Category'], n['Quantity'], n['Unit']) for n in stored]
+        new_nutrients = old_nutrients
+        changes = {"inserted": 0, "updated": 0, "deleted": 0}
+        if submitted is not None or removed:
+            inserts, updates, deletes = diff_nutrients(stored, submitted or [], partial, removed)
+            apply_nutrient_diff(cursor, meal_id, inserts, updates, deletes)
+            new_nutrients = updated_nutrients(stored, inserts, updates, deletes)
+            changes = {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+        
+        # Swap the meal's old contribution to the daily rollup for the new one
+        deltas = meal_contributions(meal['ClientID'], meal['Datetime'], old_nutrients, sign=-1)
+        meal_contributions(data.get('client_id', meal['ClientID']), meal_datetime, new_nutrients, into=deltas)
+        apply_rollup_deltas(cursor, deltas)
         
         conn.commit()
         
-        return jsonify({"message": "Meal log updated successfully"}), 200
+        return jsonify({"message": "Meal log updated successfully", "nutrients": changes}), 200
     
     except pymysql.MySQLError as e:
         return jsonify({"error": f"Database error: {str(e)}"}), 500
@@ -302,11 +826,33 @@ def update_meal_log(meal_id):
         return jsonify({"error": str(e)}), 500
     
     finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+# Route to update a meal log
+@meals_bp.route('/meal-logs/<int:meal_id>', methods=['PUT'])
+@idempotent
+def update_meal_log(meal_id):
+    """Update a meal log entry; a nutrients list replaces the meal's nutrients"""
+    return _update_meal_log(meal_id, partial=False)
+
+# Route to partially update a meal log
+@meals_bp.route('/meal-logs/<int:meal_id>', methods=['PATCH'])
+@idempotent
+def patch_meal_log(meal_id):
+    """
+    Partially update a meal log entry. Listed nutrients are added or get
+    their quantity set (matched by name, category and unit); nutrients not
+    listed stay as they are. remove_nutrients: [{"name", "category", "unit"}]
+    deletes nutrients.
+    """
+    return _update_meal_log(meal_id, partial=True)
 
 # Route to delete a meal log
 @meals_bp.route('/meal-logs/<int:meal_id>', methods=['DELETE'])
+@idempotent
 def delete_meal_log(meal_id):
     """Delete a meal log entry"""
     try:
@@ -314,10 +860,15 @@ def delete_meal_log(meal_id):
         cursor = conn.cursor()
         
         # Check if meal log exists
-        cursor.execute("SELECT ID FROM MealLog WHERE ID = %s", (meal_id,))
-        if not cursor.fetchone():
+        cursor.execute("SELECT ID, ClientID, Datetime FROM MealLog WHERE ID = %s", (meal_id,))
+        meal = cursor.fetchone()
+        if not meal:
             return jsonify({"error": "Meal log not found"}), 404
         
+        # Remove the meal's contribution from the daily rollup
+        apply_rollup_deltas(cursor, meal_contributions(
+            meal['ClientID'], meal['Datetime'], stored_meal_nutrients(cursor, meal_id), sign=-1))
+        
         # Delete associated nutrients first (due to foreign key constraint)
         cursor.execute("DELETE FROM Nutrient WHERE MealLogID = %s", (meal_id,))
         
@@ -341,6 +892,8 @@ def delete_meal_log(meal_id):
 @meals_bp.route('/meal-logs/daily-summary', methods=['GET'])
 def get_daily_summary():
     """Get a summary of nutrients for a specific day"""
+    conn = None
+    cursor = None
     try:
         # Get query parameters
         client_id = request.args.get('client_id')
@@ -352,24 +905,26 @@ def get_daily_summary():
         
         try:
             # Validate date format
-            datetime.strptime(date, '%Y-%m-%d')
+            day_start = datetime.strptime(date, '%Y-%m-%d')
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Get all meals for the specific day
+        # The day's meal count and nutrient totals from the daily rollup, in one query
+        # (a day whose meals have no nutrients yields one row without a nutrient)
         cursor.execute("""
-            SELECT MealLog.ID
-            FROM MealLog
-            WHERE ClientID = %s AND DATE(Datetime) = %s
-            ORDER BY Datetime
-        """, (client_id, date))
-        
-        meal_ids = [meal['ID'] for meal in cursor.fetchall()]
-        
-        if not meal_ids:
+            SELECT c.Meals, d.Category, d.Name, d.Total as total, d.Unit
+            FROM DailyMealCounts c
+            LEFT JOIN DailyNutrientTotals d ON d.ClientID = c.ClientID AND d.Day = c.Day
+            WHERE c.ClientID = %s AND c.Day = %s
+            ORDER BY d.Category, d.Name
+        """, (client_id, day_start.date()))
+        rows = cursor.fetchall()
+        meals_count = rows[0]['Meals'] if rows else 0
+        
+        if not meals_count:
             return jsonify({
                 "client_id": int(client_id),
                 "date": date,
@@ -378,40 +933,12 @@ def get_daily_summary():
                 "message": "No meals recorded for this day"
             }), 200
         
-        # Get nutrients summary
-        placeholders = ', '.join(['%s'] * len(meal_ids))
-        query = f"""
-            SELECT 
-                Category,
-                Name,
-                SUM(Quantity) as total,
-                Unit
-            FROM Nutrient
-            WHERE MealLogID IN ({placeholders})
-            GROUP BY Category, Name, Unit
-            ORDER BY Category, Name
-        """
-        
-        cursor.execute(query, meal_ids)
-        nutrients = cursor.fetchall()
-        
-        # Format the result
-        nutrients_by_category = {}
-        for nutrient in nutrients:
-            category = nutrient['Category']
-            if category not in nutrients_by_category:
-                nutrients_by_category[category] = []
-            
-            nutrients_by_category[category].append({
-                'name': nutrient['Name'],
-                'total': float(nutrient['total']),
-                'unit': nutrient['Unit']
-            })
+        nutrients_by_category = _group_by_category(row for row in rows if row['Name'] is not None)
         
         return jsonify({
             "client_id": int(client_id),
             "date": date,
-            "meals_count": len(meal_ids),
+            "meals_count": meals_count,
             "nutrients_summary": nutrients_by_category
         }), 200
     
@@ -419,5 +946,77 @@ def get_daily_summary():
         return jsonify({"error": str(e)}), 500
     
     finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+# Route to get daily nutrient summaries for a range of days
+@meals_bp.route('/meal-logs/daily-summary/range', methods=['GET'])
+def get_daily_summary_range():
+    """Get a summary of nutrients for every logged day in a date range"""
+    conn = None
+    cursor = None
+    try:
+        # Get query parameters
+        client_id = request.args.get('client_id')
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        
+        # All parameters are required
+        if not client_id or not date_from or not date_to:
+            return jsonify({"error": "client_id, date_from and date_to parameters are required"}), 400
+        
+        try:
+            # Validate date format
+            first_day = datetime.strptime(date_from, '%Y-%m-%d')
+            last_day = datetime.strptime(date_to, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        
+        if first_day > last_day:
+            return jsonify({"error": "date_from must not be after date_to"}), 400
+        
+        if (last_day - first_day).days >= MAX_SUMMARY_RANGE_DAYS:
+            return jsonify({"error": f"Date range is limited to {MAX_SUMMARY_RANGE_DAYS} days"}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Meal counts and nutrient totals of every logged day from the daily rollup, in one query
+        cursor.execute("""
+            SELECT c.Day, c.Meals, d.Category, d.Name, d.Total as total, d.Unit
+            FROM DailyMealCounts c
+            LEFT JOIN DailyNutrientTotals d ON d.ClientID = c.ClientID AND d.Day = c.Day
+            WHERE c.ClientID = %s AND c.Day >= %s AND c.Day <= %s
+            ORDER BY c.Day, d.Category, d.Name
+        """, (client_id, first_day.date(), last_day.date()))
+        meals_per_day, totals_per_day = {}, {}
+        for row in cursor.fetchall():
+            meals_per_day[row['Day']] = row['Meals']
+            if row['Name'] is not None:
+                totals_per_day.setdefault(row['Day'], []).append(row)
+        
+        days = []
+        for day in sorted(meals_per_day):
+            days.append({
+                "date": day,
+                "meals_count": meals_per_day[day],
+                "nutrients_summary": _group_by_category(totals_per_day.get(day, []))
+            })
+        
+        return jsonify({
+            "client_id": int(client_id),
+            "date_from": date_from,
+            "date_to": date_to,
+            "days": days
+        }), 200
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
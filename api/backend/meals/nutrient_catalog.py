@@ -0,0 +1,160 @@
+########################################################
+# Nutrient type catalog (NutrientType)
+########################################################
+#
+# Every distinct (Name, Category, Unit) a nutrient was logged with is one
+# NutrientType row with a small integer ID; Nutrient rows only store that
+# NutrientTypeID next to their quantity (migration 14). Reads join the
+# catalog back in:
+#
+#     SELECT n.ID, t.Name, t.Category, n.Quantity, t.Unit
+#     FROM Nutrient n JOIN NutrientType t ON t.ID = n.NutrientTypeID
+#
+# and aggregates filter and group on n.NutrientTypeID. Each type also
+# carries its canonical unit and conversion factor (backend/meals/units.py),
+# and Nutrient.CanonicalQuantity is written from them.
+#
+# nutrient_catalog keeps the catalog in memory. Types are never renamed or
+# deleted, so cached IDs stay valid for the life of the process. The write
+# routes call resolve() before they open their own connection: known types
+# cost nothing, unknown ones are created and committed on a separate
+# connection, so a rolled-back meal never leaves an ID in the cache that the
+# database does not have.
+
+import os
+import threading
+
+from backend.meals.units import canonical_unit, to_canonical
+
+NUTRIENT_TYPE_JOIN = "JOIN NutrientType t ON t.ID = n.NutrientTypeID"
+TYPE_COLUMNS = "ID, Name, Category, Unit, CanonicalUnit, ToCanonical"
+
+
+def nutrient_key(name, category, unit):
+    return (name or '', category or '', unit or '')
+
+
+def _match_key(key):
+    # MySQL compares the catalog's VARCHARs ignoring trailing spaces
+    return tuple(part.rstrip(' ') for part in key)
+
+
+class NutrientCatalog:
+    def __init__(self):
+        self._ids = {}    # (name, category, unit) -> NutrientType ID
+        self._keys = {}   # NutrientType ID -> (name, category, unit)
+        self._canonical = {}  # NutrientType ID -> (canonical unit, factor)
+        self._max_id = 0
+        self._lock = threading.Lock()
+
+    def _learn(self, rows):
+        with self._lock:
+            for row in rows:
+                key = (row['Name'], row['Category'], row['Unit'])
+                self._ids[key] = row['ID']
+                self._keys[row['ID']] = key
+                if row['CanonicalUnit'] is None:  # not converted by the backfill yet
+                    self._canonical[row['ID']] = canonical_unit(row['Name'], row['Unit'])
+                else:
+                    self._canonical[row['ID']] = (row['CanonicalUnit'], row['ToCanonical'])
+                self._max_id = max(self._max_id, row['ID'])
+
+    def resolve(self, nutrients):
+        """
+        Make sure every nutrient's type is in the catalog. nutrients are
+        (name, category, quantity, unit, ...) tuples; returns {(name, category,
+        unit): ID}. Only unknown types touch the database.
+        """
+        keys = {nutrient_key(n[0], n[1], n[3]) for n in nutrients}
+        with self._lock:
+            missing = [key for key in keys if key not in self._ids]
+        if missing:
+            self._create(missing)
+        with self._lock:
+            return {key: self._ids[key] for key in keys}
+
+    def _create(self, keys):
+        from backend.db import get_db_connection
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                INSERT INTO NutrientType (Name, Category, Unit, CanonicalUnit, ToCanonical)
+                VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(keys))} AS new
+                ON DUPLICATE KEY UPDATE Name = NutrientType.Name
+            """, [value for key in keys for value in (*key, *canonical_unit(key[0], key[2]))])
+            conn.commit()
+            cursor.execute(f"""
+                SELECT {TYPE_COLUMNS} FROM NutrientType
+                WHERE (Name, Category, Unit) IN ({', '.join(['(%s, %s, %s)'] * len(keys))})
+            """, [part for key in keys for part in key])
+            rows = cursor.fetchall()
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        self._learn(rows)
+        # A key that differs from its catalog row only by trailing spaces maps to that row
+        by_match = {_match_key((row['Name'], row['Category'], row['Unit'])): row['ID'] for row in rows}
+        with self._lock:
+            for key in keys:
+                if key not in self._ids:
+                    self._ids[key] = by_match[_match_key(key)]
+
+    def type_id(self, name, category, unit):
+        """ID of a type resolve() has seen (KeyError otherwise)"""
+        return self._ids[nutrient_key(name, category, unit)]
+
+    def refresh(self, cursor):
+        """Learn the types other processes created since the last refresh (one small range read)"""
+        cursor.execute(f"SELECT {TYPE_COLUMNS} FROM NutrientType WHERE ID > %s ORDER BY ID",
+                       (self._max_id,))
+        self._learn(cursor.fetchall())
+
+    def ids_named(self, cursor, names):
+        """
+        {name: [type IDs]} for nutrient names, matched case-insensitively
+        across categories and units like the old string filters
+        """
+        self.refresh(cursor)
+        wanted = {name.strip().lower(): name for name in names}
+        ids = {name: [] for name in names}
+        with self._lock:
+            for type_id, (name, _, _) in self._keys.items():
+                match = wanted.get(name.strip().lower())
+                if match is not None:
+                    ids[match].append(type_id)
+        return ids
+
+    def describe(self, type_id):
+        """(name, category, unit) of a type this process has seen"""
+        return self._keys[type_id]
+
+    def canonical(self, type_id):
+        """(canonical unit, factor) of a type this process has seen"""
+        return self._canonical[type_id]
+
+    def canonical_quantity(self, type_id, quantity):
+        """Quantity of a type converted to its canonical unit"""
+        return to_canonical(quantity, self._canonical[type_id][1])
+
+    def reset_after_fork(self):
+        # The cached types stay valid in the worker; only the lock is replaced
+        self._lock = threading.Lock()
+
+
+nutrient_catalog = NutrientCatalog()
+os.register_at_fork(after_in_child=nutrient_catalog.reset_after_fork)
+
+
+def insert_nutrients(cursor, rows):
+    """Insert (name, category, quantity, unit, meal_id) rows whose types were resolved"""
+    params = []
+    for name, category, quantity, unit, meal_id in rows:
+        type_id = nutrient_catalog.type_id(name, category, unit)
+        params.append((type_id, quantity, nutrient_catalog.canonical_quantity(type_id, quantity), meal_id))
+    cursor.executemany(
+        "INSERT INTO Nutrient (NutrientTypeID, Quantity, CanonicalQuantity, MealLogID) VALUES (%s, %s, %s, %s)",
+        params)
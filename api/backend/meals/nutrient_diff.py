@@ -0,0 +1,117 @@
+########################################################
+# Diff-based nutrient updates for a meal log
+########################################################
+#
+# PUT and PATCH /meal-logs/<id> compare the nutrients a meal already has
+# with the submitted ones instead of deleting and re-inserting all of them.
+# Nutrients are matched by (name, category, unit); a meal listing the same
+# key twice has its rows paired up in ID order. The resulting diff is
+# applied with at most three statements:
+#
+#     DELETE FROM Nutrient WHERE MealLogID = ? AND ID IN (...)
+#     UPDATE Nutrient SET Quantity = CASE ID WHEN ? THEN ? ... END, ... WHERE ...
+#     INSERT INTO Nutrient (...) VALUES (...), (...)
+#
+# so correcting one quantity touches one row and keeps its ID. Submitted
+# nutrients must have their types resolved in nutrient_catalog first, which
+# also supplies their canonical quantities.
+
+from collections import defaultdict
+
+from backend.meals.nutrient_catalog import NUTRIENT_TYPE_JOIN, nutrient_catalog, nutrient_key
+from backend.meals.units import to_decimal
+
+NUTRIENT_KEY_FIELDS = ('name', 'category', 'unit')
+
+
+def stored_nutrient_rows(cursor, meal_id):
+    """The meal's Nutrient rows (ID, Name, Category, Quantity, Unit) in ID order"""
+    cursor.execute(f"""
+        SELECT n.ID, t.Name, t.Category, n.Quantity, t.Unit
+        FROM Nutrient n
+        {NUTRIENT_TYPE_JOIN}
+        WHERE n.MealLogID = %s
+        ORDER BY n.ID
+    """, (meal_id,))
+    return cursor.fetchall()
+
+
+def diff_nutrients(stored, submitted, partial=False, removed=()):
+    """
+    Compare stored Nutrient rows with submitted (name, category, quantity,
+    unit) tuples.
+
+    With partial=False the submitted list is the meal's complete new set:
+    stored rows it does not mention are deleted. With partial=True only the
+    keys it mentions change; `removed` lists (name, category, unit) keys to
+    delete as well.
+
+    Returns (inserts, updates, deletes): new (name, category, quantity, unit)
+    tuples, (ID, quantity, canonical quantity) for rows whose quantity
+    changed, and IDs to delete.
+    """
+    stored_by_key = defaultdict(list)
+    for row in stored:
+        stored_by_key[nutrient_key(row['Name'], row['Category'], row['Unit'])].append(row)
+    submitted_by_key = defaultdict(list)
+    for name, category, quantity, unit in submitted:
+        submitted_by_key[nutrient_key(name, category, unit)].append((name, category, quantity, unit))
+
+    removed_keys = {nutrient_key(*key) for key in removed}
+    keys = set(submitted_by_key) | removed_keys if partial else set(stored_by_key) | set(submitted_by_key)
+
+    inserts, updates, deletes = [], [], []
+    for key in keys:
+        rows = stored_by_key.get(key, [])
+        if key in removed_keys:
+            deletes.extend(row['ID'] for row in rows)
+            continue
+        wanted = submitted_by_key.get(key, [])
+        for row, nutrient in zip(rows, wanted):
+            quantity = to_decimal(nutrient[2])
+            if row['Quantity'] is None or to_decimal(row['Quantity']) != quantity:
+                type_id = nutrient_catalog.type_id(*key)
+                updates.append((row['ID'], quantity, nutrient_catalog.canonical_quantity(type_id, quantity)))
+        inserts.extend(wanted[len(rows):])
+        if not partial:
+            deletes.extend(row['ID'] for row in rows[len(wanted):])
+    return inserts, updates, deletes
+
+
+def apply_nutrient_diff(cursor, meal_id, inserts, updates, deletes):
+    """Apply a diff from diff_nutrients() on the caller's cursor/transaction"""
+    if deletes:
+        cursor.execute(f"""
+            DELETE FROM Nutrient
+            WHERE MealLogID = %s AND ID IN ({', '.join(['%s'] * len(deletes))})
+        """, [meal_id] + deletes)
+    if updates:
+        cases = ' '.join(['WHEN %s THEN %s'] * len(updates))
+        cursor.execute(f"""
+            UPDATE Nutrient
+            SET Quantity = CASE ID {cases} END,
+                CanonicalQuantity = CASE ID {cases} END
+            WHERE MealLogID = %s AND ID IN ({', '.join(['%s'] * len(updates))})
+        """, [value for nutrient_id, quantity, _ in updates for value in (nutrient_id, quantity)]
+           + [value for nutrient_id, _, canonical in updates for value in (nutrient_id, canonical)]
+           + [meal_id] + [nutrient_id for nutrient_id, _, _ in updates])
+    if inserts:
+        values = ', '.join(['(%s, %s, %s, %s)'] * len(inserts))
+        params = []
+        for name, category, quantity, unit in inserts:
+            type_id = nutrient_catalog.type_id(name, category, unit)
+            params.extend((type_id, quantity, nutrient_catalog.canonical_quantity(type_id, quantity), meal_id))
+        cursor.execute(f"""
+            INSERT INTO Nutrient (NutrientTypeID, Quantity, CanonicalQuantity, MealLogID)
+            VALUES {values}
+        """, params)
+
+
+def updated_nutrients(stored, inserts, updates, deletes):
+    """The meal's (name, category, quantity, unit) tuples once the diff is applied"""
+    new_quantities = {nutrient_id: quantity for nutrient_id, quantity, _ in updates}
+    deleted = set(deletes)
+    return [
+        (row['Name'], row['Category'], new_quantities.get(row['ID'], row['Quantity']), row['Unit'])
+        for row in stored if row['ID'] not in deleted
+    ] + list(inserts)
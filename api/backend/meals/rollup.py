@@ -0,0 +1,198 @@
+########################################################
+# Daily nutrient rollup (DailyNutrientTotals)
+########################################################
+#
+# DailyNutrientTotals holds one row per client, day and nutrient
+# (Category, Name, canonical Unit) with the summed canonical quantity and the
+# number of meals that contributed to it; DailyMealCounts (migration 16) the
+# number of meals per client and day. The meal write routes keep both current by applying
+# deltas in the same transaction as their own writes; rebuild_daily_totals()
+# recomputes them from MealLog/Nutrient for backfills:
+#
+#     python -m backend.meals.rollup --client-id 3 --from 2024-01-01 --to 2024-03-31
+
+from collections import defaultdict
+from decimal import Decimal
+
+from backend.meals.nutrient_catalog import NUTRIENT_TYPE_JOIN
+from backend.meals.units import canonical_nutrient
+
+
+class RollupDeltas:
+    """
+    Pending rollup changes: nutrients maps (client_id, day, category, name,
+    canonical unit) to [total, meal_count], meals maps (client_id, day) to
+    the change in that day's meal count
+    """
+
+    def __init__(self):
+        self.nutrients = defaultdict(lambda: [Decimal(0), 0])
+        self.meals = defaultdict(int)
+
+
+def meal_contributions(client_id, meal_datetime, nutrients, sign=1, into=None):
+    """
+    Add one meal's contribution to a RollupDeltas (a new one unless into is given).
+
+    nutrients is an iterable of (name, category, quantity, unit) tuples;
+    quantities are converted to the nutrient's canonical unit. The meal
+    counts towards its day even without nutrients. Use sign=-1 to remove a
+    meal that is being deleted or changed.
+    """
+    deltas = into if into is not None else RollupDeltas()
+    if client_id is None or meal_datetime is None:
+        return deltas
+
+    day = meal_datetime.date()
+    deltas.meals[(int(client_id), day)] += sign
+    seen = set()
+    for name, category, quantity, unit in nutrients:
+        canonical_quantity, canonical = canonical_nutrient(name, quantity, unit)
+        key = (int(client_id), day, category or '', name or '', canonical)
+        deltas.nutrients[key][0] += sign * (canonical_quantity or 0)
+        # A meal counts once per nutrient type even if it lists the type twice,
+        # the same way rebuild_daily_totals() counts it
+        if (key, unit or '') not in seen:
+            seen.add((key, unit or ''))
+            deltas.nutrients[key][1] += sign
+    return deltas
+
+
+def apply_rollup_deltas(cursor, deltas):
+    """
+    Upsert the deltas into DailyNutrientTotals and DailyMealCounts and drop
+    rows no meal contributes to anymore. Runs on the caller's cursor/transaction.
+    """
+    changes = [(key, total, count) for key, (total, count) in deltas.nutrients.items() if total or count]
+    if changes:
+        values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(changes))
+        params = []
+        for key, total, count in changes:
+            params.extend(key)
+            params.extend((total, count))
+        cursor.execute(f"""
+            INSERT INTO DailyNutrientTotals (ClientID, Day, Category, Name, Unit, Total, MealCount)
+            VALUES {values} AS delta
+            ON DUPLICATE KEY UPDATE
+                Total = DailyNutrientTotals.Total + delta.Total,
+                MealCount = DailyNutrientTotals.MealCount + delta.MealCount
+        """, params)
+
+        removed = [key for key, total, count in changes if count < 0]
+        if removed:
+            keys = ', '.join(['(%s, %s, %s, %s, %s)'] * len(removed))
+            cursor.execute(f"""
+                DELETE FROM DailyNutrientTotals
+                WHERE (ClientID, Day, Category, Name, Unit) IN ({keys}) AND MealCount <= 0
+            """, [value for key in removed for value in key])
+
+    # A meal moved within its day adds -1 and +1 to the same key
+    meal_changes = [(key, meals) for key, meals in deltas.meals.items() if meals]
+    if meal_changes:
+        values = ', '.join(['(%s, %s, %s)'] * len(meal_changes))
+        cursor.execute(f"""
+            INSERT INTO DailyMealCounts (ClientID, Day, Meals)
+            VALUES {values} AS delta
+            ON DUPLICATE KEY UPDATE Meals = DailyMealCounts.Meals + delta.Meals
+        """, [value for key, meals in meal_changes for value in (*key, meals)])
+
+        emptied = [key for key, meals in meal_changes if meals < 0]
+        if emptied:
+            keys = ', '.join(['(%s, %s)'] * len(emptied))
+            cursor.execute(f"""
+                DELETE FROM DailyMealCounts
+                WHERE (ClientID, Day) IN ({keys}) AND Meals <= 0
+            """, [value for key in emptied for value in key])
+
+
+def stored_meal_nutrients(cursor, meal_id):
+    """Return a meal's stored nutrients as (name, category, quantity, unit) tuples"""
+    cursor.execute(f"""
+        SELECT t.Name, t.Category, n.Quantity, t.Unit
+        FROM Nutrient n
+        {NUTRIENT_TYPE_JOIN}
+        WHERE n.MealLogID = %s
+    """, (meal_id,))
+    return [(n['Name'], n['Category'], n['Quantity'], n['Unit']) for n in cursor.fetchall()]
+
+
+def rebuild_daily_totals(cursor, client_id=None, date_from=None, date_to=None):
+    """
+    Recompute DailyNutrientTotals and DailyMealCounts from MealLog/Nutrient,
+    optionally limited to one client and/or an inclusive date range. Returns
+    the number of rows written.
+    """
+    # Same scope expressed on the rollup (Day) and on the raw meals (half-open Datetime range)
+    scope, meal_scope, params = "", "", []
+    if client_id is not None:
+        scope += " AND ClientID = %s"
+        meal_scope += " AND ml.ClientID = %s"
+        params.append(client_id)
+    if date_from is not None:
+        scope += " AND Day >= %s"
+        meal_scope += " AND ml.Datetime >= %s"
+        params.append(date_from)
+    if date_to is not None:
+        scope += " AND Day <= %s"
+        meal_scope += " AND ml.Datetime < DATE_ADD(%s, INTERVAL 1 DAY)"
+        params.append(date_to)
+    cursor.execute(f"DELETE FROM DailyNutrientTotals WHERE 1=1{scope}", params)
+    cursor.execute(f"DELETE FROM DailyMealCounts WHERE 1=1{scope}", params)
+
+    # Aggregate on the integer type ID and look the names up once per group.
+    # Types that differ only in case or in their logged unit share a rollup
+    # row (its key is case-insensitive and holds the canonical unit), so their
+    # groups are added up on insert.
+    cursor.execute(f"""
+        INSERT INTO DailyNutrientTotals (ClientID, Day, Category, Name, Unit, Total, MealCount)
+        SELECT * FROM (
+            SELECT per_type.ClientID, per_type.Day, t.Category, t.Name, t.CanonicalUnit,
+                   per_type.Total, per_type.MealCount
+            FROM (
+                SELECT ml.ClientID, DATE(ml.Datetime) AS Day, n.NutrientTypeID,
+                       SUM(n.CanonicalQuantity) AS Total, COUNT(DISTINCT ml.ID) AS MealCount
+                FROM MealLog ml
+                JOIN Nutrient n ON n.MealLogID = ml.ID
+                WHERE ml.Datetime IS NOT NULL AND ml.ClientID IS NOT NULL{meal_scope}
+                GROUP BY ml.ClientID, DATE(ml.Datetime), n.NutrientTypeID
+            ) per_type
+            JOIN NutrientType t ON t.ID = per_type.NutrientTypeID
+        ) AS rebuilt
+        ON DUPLICATE KEY UPDATE
+            Total = DailyNutrientTotals.Total + rebuilt.Total,
+            MealCount = DailyNutrientTotals.MealCount + rebuilt.MealCount
+    """, params)
+    written = cursor.rowcount
+
+    cursor.execute(f"""
+        INSERT INTO DailyMealCounts (ClientID, Day, Meals)
+        SELECT ml.ClientID, DATE(ml.Datetime), COUNT(*)
+        FROM MealLog ml
+        WHERE ml.Datetime IS NOT NULL AND ml.ClientID IS NOT NULL{meal_scope}
+        GROUP BY ml.ClientID, DATE(ml.Datetime)
+    """, params)
+    return written + cursor.rowcount
+
+
+if __name__ == '__main__':
+    import argparse
+    from datetime import datetime
+    from backend.db import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Rebuild the DailyNutrientTotals and DailyMealCounts rollup")
+    parser.add_argument('--client-id', type=int)
+    parser.add_argument('--from', dest='date_from', help='first day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='last day to rebuild (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    parse = lambda value: datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        rows = rebuild_daily_totals(cursor, args.client_id, parse(args.date_from), parse(args.date_to))
+        conn.commit()
+        print(f"Rebuilt DailyNutrientTotals and DailyMealCounts: {rows} rows written")
+    finally:
+        cursor.close()
+        conn.close()
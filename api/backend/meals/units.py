@@ -0,0 +1,145 @@
+########################################################
+# Canonical nutrient units
+########################################################
+#
+# Every nutrient type converts to one canonical unit, so quantities logged
+# as g in one meal and mg in another add up in SQL. The meal write routes
+# store Nutrient.CanonicalQuantity = Quantity x NutrientType.ToCanonical next
+# to the original quantity (migration 15); aggregates sum the canonical
+# column and report NutrientType.CanonicalUnit.
+#
+#     mass     g, mg, mcg (ug)  -> the nutrient's reporting unit, g by default
+#     energy   kcal, kJ         -> kcal
+#     IU       Vitamin A, D, E  -> mcg / mcg / mg; other nutrients stay in IU
+#
+# Units outside the table (e.g. "billion CFU") are their own canonical unit.
+# Rows logged before migration 15 are converted with:
+#
+#     python -m backend.meals.units --batch-size 50000
+
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+# Scale of Nutrient.CanonicalQuantity and NutrientType.ToCanonical
+QUANTITY_STEP = Decimal('0.00000001')
+FACTOR_STEP = Decimal('0.0000000001')
+
+UNIT_ALIASES = {
+    'g': 'g', 'gram': 'g', 'grams': 'g',
+    'mg': 'mg', 'milligram': 'mg', 'milligrams': 'mg',
+    'mcg': 'mcg', 'ug': 'mcg', 'µg': 'mcg', 'μg': 'mcg', 'microgram': 'mcg', 'micrograms': 'mcg',
+    'iu': 'IU',
+    'kcal': 'kcal', 'kilocalorie': 'kcal', 'kilocalories': 'kcal',
+    'kj': 'kJ', 'kilojoule': 'kJ', 'kilojoules': 'kJ',
+}
+
+MASS_IN_GRAMS = {'g': Decimal(1), 'mg': Decimal('0.001'), 'mcg': Decimal('0.000001')}
+ENERGY_IN_KCAL = {'kcal': Decimal(1), 'kJ': Decimal(1) / Decimal('4.184')}
+
+# Mass per IU of the vitamins whose IU is defined (retinol, cholecalciferol, natural alpha-tocopherol)
+IU_MASS = {
+    'vitamin a': (Decimal('0.3'), 'mcg'),
+    'vitamin d': (Decimal('0.025'), 'mcg'),
+    'vitamin e': (Decimal('0.67'), 'mg'),
+}
+
+# Unit a nutrient's mass is reported in; anything not listed uses g
+REPORTING_UNITS = {
+    **dict.fromkeys(['vitamin c', 'vitamin e', 'vitamin b1', 'vitamin b2', 'vitamin b3', 'vitamin b5',
+                     'vitamin b6', 'thiamin', 'riboflavin', 'niacin', 'pantothenic acid', 'choline',
+                     'calcium', 'chloride', 'cholesterol', 'copper', 'iron', 'magnesium', 'manganese',
+                     'phosphorus', 'potassium', 'sodium', 'zinc'], 'mg'),
+    **dict.fromkeys(['vitamin a', 'vitamin d', 'vitamin k', 'vitamin b7', 'vitamin b9', 'vitamin b12',
+                     'biotin', 'folate', 'folic acid', 'chromium', 'iodine', 'molybdenum', 'selenium'], 'mcg'),
+}
+
+
+def to_decimal(quantity):
+    # Nutrient.Quantity is DECIMAL(10,2); round the same way MySQL does on insert
+    return Decimal(str(quantity)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def canonical_unit(name, unit):
+    """(canonical unit, factor) for a nutrient type; quantity x factor is in the canonical unit"""
+    nutrient = (name or '').strip().lower()
+    normalized = UNIT_ALIASES.get((unit or '').strip().lower())
+    factor = Decimal(1)
+    if normalized == 'IU' and nutrient in IU_MASS:
+        factor, normalized = IU_MASS[nutrient]
+    if normalized in MASS_IN_GRAMS:
+        target = REPORTING_UNITS.get(nutrient, 'g')
+        factor = factor * MASS_IN_GRAMS[normalized] / MASS_IN_GRAMS[target]
+        return target, factor.quantize(FACTOR_STEP, rounding=ROUND_HALF_UP)
+    if normalized in ENERGY_IN_KCAL:
+        return 'kcal', ENERGY_IN_KCAL[normalized].quantize(FACTOR_STEP, rounding=ROUND_HALF_UP)
+    return normalized or unit or '', Decimal(1)
+
+
+def to_canonical(quantity, factor):
+    """Canonical quantity as stored in Nutrient.CanonicalQuantity (None stays None)"""
+    if quantity is None:
+        return None
+    return (to_decimal(quantity) * factor).quantize(QUANTITY_STEP, rounding=ROUND_HALF_UP)
+
+
+def canonical_nutrient(name, quantity, unit):
+    """(canonical quantity, canonical unit) of one logged nutrient"""
+    target, factor = canonical_unit(name, unit)
+    return to_canonical(quantity, factor), target
+
+
+def backfill_canonical_quantities(conn, batch_size=50000, recompute=False):
+    """
+    Convert the catalog types and Nutrient rows that have no canonical values
+    yet (all of them with recompute=True), one committed ID range at a time,
+    then rebuild the daily rollup in canonical units. Returns the number of
+    nutrient rows updated.
+    """
+    from backend.meals.rollup import rebuild_daily_totals
+
+    cursor = conn.cursor()
+    try:
+        pending = "" if recompute else " WHERE CanonicalUnit IS NULL"
+        cursor.execute(f"SELECT ID, Name, Unit FROM NutrientType{pending}")
+        types = [(*canonical_unit(row['Name'], row['Unit']), row['ID']) for row in cursor.fetchall()]
+        if types:
+            cursor.executemany("UPDATE NutrientType SET CanonicalUnit = %s, ToCanonical = %s WHERE ID = %s", types)
+        conn.commit()
+
+        cursor.execute("SELECT COALESCE(MIN(ID), 0) AS first_id, COALESCE(MAX(ID), -1) AS last_id FROM Nutrient")
+        bounds = cursor.fetchone()
+        pending = "" if recompute else " AND n.CanonicalQuantity IS NULL"
+        updated = 0
+        for start in range(bounds['first_id'], bounds['last_id'] + 1, batch_size):
+            cursor.execute(f"""
+                UPDATE Nutrient n
+                JOIN NutrientType t ON t.ID = n.NutrientTypeID
+                SET n.CanonicalQuantity = ROUND(n.Quantity * t.ToCanonical, 8)
+                WHERE n.ID >= %s AND n.ID < %s AND n.Quantity IS NOT NULL{pending}
+            """, (start, start + batch_size))
+            updated += cursor.rowcount
+            conn.commit()
+
+        rebuild_daily_totals(cursor)
+        conn.commit()
+        return updated
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    from backend.db import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Store canonical-unit quantities for existing nutrients")
+    parser.add_argument('--batch-size', type=int, default=50000, help='Nutrient IDs per transaction')
+    parser.add_argument('--recompute', action='store_true',
+                        help='convert every row again, e.g. after the conversion table changed')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        rows = backfill_canonical_quantities(conn, args.batch_size, args.recompute)
+        print(f"Converted {rows} nutrient rows to canonical units and rebuilt the daily rollup")
+    finally:
+        conn.close()
@@ -0,0 +1,519 @@
+########################################################
+# Write-behind queue for new meal logs
+########################################################
+#
+# With MEAL_WRITE_BEHIND=true, POST /meal-logs validates the meal, appends
+# it to a local SQLite journal (MEAL_QUEUE_PATH, WAL mode, synchronous=FULL
+# so an acknowledged meal survives a crash) and answers 202 with the
+# journal entry id as provisional id, without touching MySQL:
+#
+#     {"message": "Meal log queued", "provisional_id": 41, "status": "queued"}
+#
+# Idempotency-Key headers are deduplicated in the journal as well: the key
+# is stored with its entry in the same SQLite transaction, and a repeat
+# within IDEMPOTENCY_TTL seconds gets the first entry's 202 back. Keys are
+# shared by the processes of one host, like the journal itself.
+#
+# GET /meal-logs/queued/<provisional_id> reports "queued", "created" (with
+# the MealLog id) or "failed" (with the error, e.g. an unknown client).
+#
+# A drainer thread in every API process claims up to MEAL_QUEUE_BATCH_SIZE
+# entries at a time and inserts them in one MySQL transaction (the same
+# multi-row inserts as POST /meal-logs/bulk), every MEAL_QUEUE_FLUSH_INTERVAL
+# seconds or as soon as a full batch is waiting. All processes on a host
+# share the journal; claims keep them from draining the same entries.
+#
+# Failures: while MySQL is unreachable, restarting or losing lock races, the
+# batch goes back to the queue untouched and the drainer backs off (up to
+# MAX_BACKOFF seconds) and retries for as long as it takes. Any other error
+# is about the data, so the batch is retried one entry per transaction and
+# only the entry that fails again is set aside: at once for a rejected value
+# or payload, after MAX_ATTEMPTS tries for other server errors. A set-aside
+# entry reports status "failed" with its error.
+#
+# Crash recovery: entries claimed by a process that died are claimed again
+# after MEAL_QUEUE_CLAIM_TIMEOUT seconds. Each batch also writes
+# MealLogQueueReceipt rows (migration 13) in its MySQL transaction, so an
+# entry whose batch committed before the crash is marked created from its
+# receipt instead of being inserted twice. To replay a journal without
+# running the API (e.g. after moving it to another host):
+#
+#     python -m backend.meals.write_behind --release-claims
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+import pymysql
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# An entry that failed on its own this many times with a server error that
+# may not be permanent is marked failed
+MAX_ATTEMPTS = 5
+
+# Longest pause between drain rounds while the database is unavailable
+MAX_BACKOFF = 30
+
+# Server errors about the connection or the moment rather than the meals:
+# too many connections, access denied, server shutdown, network errors,
+# lock wait timeout, deadlock, read-only (failover), query interrupted,
+# connection killed. Client-side errors (2000-2999) count as well.
+TRANSIENT_MYSQL_ERRORS = {1040, 1044, 1045, 1053, 1152, 1158, 1159, 1160, 1161, 1205, 1213, 1290,
+                          1317, 1836, 1927}
+
+# Errors that will fail the same way on every retry
+PERMANENT_MYSQL_ERRORS = (pymysql.err.DataError, pymysql.err.IntegrityError,
+                          pymysql.err.ProgrammingError, pymysql.err.NotSupportedError)
+
+
+def is_transient(error):
+    """Whether an error says the database is unavailable rather than that the data is wrong"""
+    if isinstance(error, pymysql.err.InterfaceError):
+        return True
+    if isinstance(error, pymysql.err.OperationalError):
+        code = error.args[0] if error.args and isinstance(error.args[0], int) else None
+        # No error code: raised locally, e.g. by the connection pool's checkout timeout
+        return code is None or 2000 <= code < 3000 or code in TRANSIENT_MYSQL_ERRORS
+    return False
+
+
+def describe_error(error):
+    if isinstance(error, pymysql.MySQLError):
+        return f"Database error: {str(error)}"
+    return f"{type(error).__name__}: {str(error)}"
+
+# How often the drainer deletes finished entries older than the retention
+PURGE_INTERVAL = 300
+
+JOURNAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meal_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        payload TEXT NOT NULL,
+        enqueued_at REAL NOT NULL,
+        claimed_by TEXT,
+        claimed_at REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        meal_id INTEGER,
+        error TEXT,
+        done_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_meal_queue_pending ON meal_queue (done_at, id);
+    CREATE TABLE IF NOT EXISTS meal_queue_keys (
+        key_hash BLOB PRIMARY KEY,
+        request_hash BLOB NOT NULL,
+        entry_id INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS queue_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+"""
+
+
+class MealQueue:
+    def __init__(self, path, enabled=False, batch_size=500, flush_interval=0.5,
+                 claim_timeout=30, retention=3600, key_ttl=86400):
+        self.path = path
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.claim_timeout = claim_timeout
+        self.retention = retention
+        self.key_ttl = key_ttl
+        self.name = None
+        self._journal_conn = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._owner = None
+        self._since_drain = 0
+        self._next_purge = 0.0
+
+    ########################################################
+    # Journal
+    ########################################################
+
+    def _journal(self):
+        """This process's journal connection (call with self._lock held)"""
+        if self._journal_conn is None:
+            # Autocommit; multi-statement changes use explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(JOURNAL_SCHEMA)
+            # Names this journal's entry ids in MealLogQueueReceipt; a recreated
+            # journal starts its ids again under a new name
+            conn.execute("INSERT OR IGNORE INTO queue_meta (key, value) VALUES ('name', ?)", (uuid.uuid4().hex,))
+            self.name = conn.execute("SELECT value FROM queue_meta WHERE key = 'name'").fetchone()[0]
+            self._journal_conn = conn
+            self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        return self._journal_conn
+
+    def _transaction(self, work):
+        """Run work(journal) in one write transaction"""
+        with self._lock:
+            journal = self._journal()
+            journal.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(journal)
+            except BaseException:
+                journal.execute("ROLLBACK")
+                raise
+            journal.execute("COMMIT")
+            return result
+
+    def _append(self, journal, meal):
+        payload = json.dumps({
+            'client_id': meal['client_id'],
+            'notes': meal['notes'],
+            # The meal time defaults to when it was acknowledged, not drained
+            'datetime': (meal['datetime'] or datetime.now()).strftime(DATETIME_FORMAT),
+            'nutrients': meal['nutrients'],
+        })
+        return journal.execute(
+            "INSERT INTO meal_queue (payload, enqueued_at) VALUES (?, ?)", (payload, time.time())).lastrowid
+
+    def _queued(self):
+        """Count a new entry; wake the drainer once a full batch is waiting"""
+        with self._lock:
+            self._since_drain += 1
+            full_batch = self._since_drain >= self.batch_size
+        self.start()
+        if full_batch:
+            self._wake.set()
+
+    def enqueue(self, meal):
+        """Append a validated meal to the journal; returns its provisional id"""
+        with self._lock:
+            entry_id = self._append(self._journal(), meal)
+        self._queued()
+        return entry_id
+
+    def enqueue_once(self, meal, key_hash, request_hash):
+        """
+        enqueue() for a request with an Idempotency-Key. Returns (provisional
+        id, 'queued'); for a key seen within key_ttl, the entry it queued and
+        'replayed', or 'conflict' when the key came with a different request.
+        """
+        def append(journal):
+            now = time.time()
+            row = journal.execute("""
+                SELECT request_hash, entry_id FROM meal_queue_keys WHERE key_hash = ? AND expires_at > ?
+            """, (key_hash, now)).fetchone()
+            if row is not None:
+                return row[1], 'replayed' if row[0] == request_hash else 'conflict'
+            entry_id = self._append(journal, meal)
+            journal.execute("""
+                INSERT OR REPLACE INTO meal_queue_keys (key_hash, request_hash, entry_id, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (key_hash, request_hash, entry_id, now + self.key_ttl))
+            return entry_id, 'queued'
+
+        entry_id, state = self._transaction(append)
+        if state == 'queued':
+            self._queued()
+        return entry_id, state
+
+    def status(self, entry_id):
+        """Return {"provisional_id", "status", ["id" | "error"]} or None for an unknown entry"""
+        with self._lock:
+            row = self._journal().execute(
+                "SELECT meal_id, error, done_at FROM meal_queue WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return None
+        meal_id, error, done_at = row
+        if done_at is None:
+            return {'provisional_id': entry_id, 'status': 'queued'}
+        if error is not None:
+            return {'provisional_id': entry_id, 'status': 'failed', 'error': error}
+        return {'provisional_id': entry_id, 'status': 'created', 'id': meal_id}
+
+    def stats(self):
+        with self._lock:
+            pending, oldest = self._journal().execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM meal_queue WHERE done_at IS NULL").fetchone()
+        return {'pending': pending, 'oldest_age_seconds': round(time.time() - oldest, 3) if oldest else 0}
+
+    def _claim(self):
+        """Claim the oldest unclaimed (or abandoned) entries; returns [(id, payload, attempts)]"""
+        def claim(journal):
+            now = time.time()
+            journal.execute("""
+                UPDATE meal_queue SET claimed_by = ?, claimed_at = ?
+                WHERE id IN (
+                    SELECT id FROM meal_queue
+                    WHERE done_at IS NULL AND (claimed_by IS NULL OR claimed_at < ?)
+                    ORDER BY id
+                    LIMIT ?
+                )
+            """, (self._owner, now, now - self.claim_timeout, self.batch_size))
+            return journal.execute("""
+                SELECT id, payload, attempts FROM meal_queue
+                WHERE claimed_by = ? AND done_at IS NULL
+                ORDER BY id
+            """, (self._owner,)).fetchall()
+        return self._transaction(claim)
+
+    def _finish(self, created, failed):
+        """Record {entry id: MealLog id} and {entry id: error} as done"""
+        def finish(journal):
+            now = time.time()
+            journal.executemany("UPDATE meal_queue SET meal_id = ?, done_at = ? WHERE id = ?",
+                                [(meal_id, now, entry_id) for entry_id, meal_id in created.items()])
+            journal.executemany("UPDATE meal_queue SET error = ?, done_at = ? WHERE id = ?",
+                                [(error, now, entry_id) for entry_id, error in failed.items()])
+        self._transaction(finish)
+
+    def _unclaim(self, entries):
+        """Hand entries back to the queue as they are (nothing was wrong with them)"""
+        self._transaction(lambda journal: journal.executemany(
+            "UPDATE meal_queue SET claimed_by = NULL, claimed_at = NULL WHERE id = ?",
+            [(entry_id,) for entry_id, _, _ in entries]))
+
+    def _fail(self, entry, error):
+        """Count a failed attempt of one entry; set it aside when the error is permanent or it is out of attempts"""
+        entry_id, _, attempts = entry
+        permanent = not isinstance(error, pymysql.MySQLError) or isinstance(error, PERMANENT_MYSQL_ERRORS)
+
+        def fail(journal):
+            if permanent or attempts + 1 >= MAX_ATTEMPTS:
+                journal.execute("""
+                    UPDATE meal_queue SET attempts = attempts + 1, error = ?, done_at = ? WHERE id = ?
+                """, (describe_error(error), time.time(), entry_id))
+            else:
+                journal.execute("""
+                    UPDATE meal_queue SET attempts = attempts + 1, claimed_by = NULL, claimed_at = NULL
+                    WHERE id = ?
+                """, (entry_id,))
+        self._transaction(fail)
+
+    def release_claims(self):
+        """Make every claimed, unfinished entry available again (only when no drainer is running)"""
+        return self._transaction(lambda journal: journal.execute(
+            "UPDATE meal_queue SET claimed_by = NULL, claimed_at = NULL WHERE done_at IS NULL").rowcount)
+
+    ########################################################
+    # Draining
+    ########################################################
+
+    def drain_once(self):
+        """
+        Move one batch from the journal to MySQL; returns the number of
+        entries claimed. Raises the error when the database is unavailable,
+        after handing the unfinished entries back.
+        """
+        entries = self._claim()
+        if not entries:
+            return 0
+
+        try:
+            created, failed = self._insert(entries)
+        except Exception as e:
+            if is_transient(e):
+                self._unclaim(entries)
+                raise
+            if len(entries) == 1:
+                self._fail(entries[0], e)
+                return 1
+            # Something in the batch is bad: one transaction per entry finds it
+            created, failed = {}, {}
+            for position, entry in enumerate(entries):
+                try:
+                    entry_created, entry_failed = self._insert([entry])
+                except Exception as e:
+                    if is_transient(e):
+                        self._finish(created, failed)
+                        self._unclaim(entries[position:])
+                        raise
+                    self._fail(entry, e)
+                    continue
+                created.update(entry_created)
+                failed.update(entry_failed)
+
+        self._finish(created, failed)
+        return len(entries)
+
+    def _insert(self, entries):
+        """
+        Insert claimed entries in one MySQL transaction; returns ({entry id:
+        MealLog id}, {entry id: error}). Raises (after rolling back) on any error.
+        """
+        from backend.db import get_db_connection
+        from backend.meals.meal_routes import insert_meal_batch, resolve_meal_nutrients
+
+        entry_ids = [entry_id for entry_id, _, _ in entries]
+        placeholders = ', '.join(['%s'] * len(entry_ids))
+        created, failed = {}, {}
+        conn = None
+        cursor = None
+        try:
+            resolve_meal_nutrients([json.loads(payload) for _, payload, _ in entries])
+
+            conn = get_db_connection()
+            cursor = conn.cursor()
+
+            # Entries a crashed drainer already committed have a receipt
+            cursor.execute(f"""
+                SELECT EntryID, MealLogID FROM MealLogQueueReceipt
+                WHERE QueueName = %s AND EntryID IN ({placeholders})
+            """, [self.name] + entry_ids)
+            created.update((row['EntryID'], row['MealLogID']) for row in cursor.fetchall())
+
+            meals = []
+            for entry_id, payload, _ in entries:
+                if entry_id not in created:
+                    meal = json.loads(payload)
+                    meal['datetime'] = datetime.strptime(meal['datetime'], DATETIME_FORMAT)
+                    meals.append((entry_id, meal))
+
+            client_ids = sorted({meal['client_id'] for _, meal in meals})
+            existing_clients = set()
+            if client_ids:
+                cursor.execute(f"SELECT ID FROM Client WHERE ID IN ({', '.join(['%s'] * len(client_ids))})",
+                               client_ids)
+                existing_clients = {row['ID'] for row in cursor.fetchall()}
+
+            batch = []
+            for entry_id, meal in meals:
+                if meal['client_id'] in existing_clients:
+                    batch.append((entry_id, meal))
+                else:
+                    failed[entry_id] = "Client not found"
+
+            if batch:
+                first_id = insert_meal_batch(cursor, [meal for _, meal in batch], None)
+                receipts = [(self.name, entry_id, first_id + offset) for offset, (entry_id, _) in enumerate(batch)]
+                values = ', '.join(['(%s, %s, %s)'] * len(receipts))
+                cursor.execute(f"""
+                    INSERT INTO MealLogQueueReceipt (QueueName, EntryID, MealLogID)
+                    VALUES {values}
+                """, [value for receipt in receipts for value in receipt])
+                created.update((entry_id, meal_id) for _, entry_id, meal_id in receipts)
+
+            conn.commit()
+            return created, failed
+
+        except Exception:
+            if conn:
+                try:
+                    conn.rollback()
+                except pymysql.MySQLError:
+                    pass  # the original error is the one to handle
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def drain(self):
+        """Drain batches until the journal has no claimable entries; returns entries drained"""
+        drained = 0
+        while True:
+            claimed = self.drain_once()
+            drained += claimed
+            if claimed < self.batch_size:
+                return drained
+
+    def purge(self):
+        """Delete finished entries past the retention and the receipts no entry can need again"""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            journal = self._journal()
+            journal.execute("DELETE FROM meal_queue WHERE done_at < ?", (cutoff,))
+            journal.execute("DELETE FROM meal_queue_keys WHERE expires_at <= ?", (time.time(),))
+            # Receipts are only read for unfinished entries, which all have ids >= bound
+            bound = journal.execute("""
+                SELECT COALESCE(MIN(id), (SELECT seq FROM sqlite_sequence WHERE name = 'meal_queue') + 1)
+                FROM meal_queue WHERE done_at IS NULL
+            """).fetchone()[0]
+        if bound is None:
+            return
+
+        from backend.db import get_db_connection
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM MealLogQueueReceipt WHERE QueueName = %s AND EntryID < %s",
+                           (self.name, bound))
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def start(self):
+        """Start this process's drainer thread (again in a forked worker)"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='meal-queue-drainer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        failures = 0
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                self._since_drain = 0
+            try:
+                self.drain()
+                if time.monotonic() >= self._next_purge:
+                    self._next_purge = time.monotonic() + PURGE_INTERVAL
+                    self.purge()
+                failures = 0
+            except Exception:
+                # Entries stay in the journal; retry with exponential backoff until the database is back
+                failures += 1
+                time.sleep(min(self.flush_interval * 2 ** min(failures, 16), MAX_BACKOFF))
+
+    def reset_after_fork(self):
+        # Neither the SQLite connection nor the drainer thread survive fork;
+        # the worker opens its own and start() runs a new drainer
+        self._journal_conn = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._since_drain = 0
+
+
+meal_queue = MealQueue(
+    path=os.getenv('MEAL_QUEUE_PATH', os.path.join(os.getcwd(), 'meal_queue.sqlite3')),
+    enabled=os.getenv('MEAL_WRITE_BEHIND', 'false').lower() == 'true',
+    batch_size=int(os.getenv('MEAL_QUEUE_BATCH_SIZE', 500)),
+    flush_interval=float(os.getenv('MEAL_QUEUE_FLUSH_INTERVAL', 0.5)),
+    claim_timeout=float(os.getenv('MEAL_QUEUE_CLAIM_TIMEOUT', 30)),
+    retention=float(os.getenv('MEAL_QUEUE_RETENTION', 3600)),
+    key_ttl=int(os.getenv('IDEMPOTENCY_TTL', 86400)),
+)
+os.register_at_fork(after_in_child=meal_queue.reset_after_fork)
+
+
+def init_write_behind(app):
+    """Replay what a previous run left in the journal as soon as the app starts"""
+    if meal_queue.enabled:
+        meal_queue.start()
+        app.logger.info("Meal write-behind enabled, journal at %s", meal_queue.path)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drain the meal write-behind journal into MySQL")
+    parser.add_argument('--release-claims', action='store_true',
+                        help="first release entries claimed by API processes (stop the API before)")
+    args = parser.parse_args()
+
+    if args.release_claims:
+        print(f"Released {meal_queue.release_claims()} claimed entries")
+    drained = meal_queue.drain()
+    meal_queue.purge()
+    print(f"Drained {drained} entries from {meal_queue.path}; {meal_queue.stats()['pending']} still pending")
@@ -0,0 +1,331 @@
+########################################################
+# Per-request metrics and GET /api/metrics
+########################################################
+#
+# init_metrics(app) times every request and, through the cursor wrapper
+# that get_db_connection() hands out, the SQL it runs: statement count,
+# time spent waiting on MySQL and rows fetched. Totals per route are
+# exposed on GET /api/metrics in the Prometheus text format.
+#
+# With METRICS_SAMPLE_RATE > 0 a fraction of request latencies is also
+# written to CEOAPIResponseTime in one batched upsert every
+# METRICS_FLUSH_INTERVAL seconds. Each flush adds its per-minute latency sum
+# and sample count to the minute's row (migration 17), so the average stays
+# exact across flushes and worker processes.
+
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from flask import Blueprint, Response, request
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """SQL activity of one request (shared with worker threads it spawns)"""
+
+    __slots__ = ('statements', 'db_seconds', 'rows', 'lock')
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.lock = threading.Lock()
+
+    def add(self, statements=0, db_seconds=0.0, rows=0):
+        with self.lock:
+            self.statements += statements
+            self.db_seconds += db_seconds
+            self.rows += rows
+
+
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def current_request_stats():
+    return _current_stats.get()
+
+
+class InstrumentedCursor:
+    """Cursor wrapper that reports SQL time, statements and fetched rows to the current request"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def _timed(self, method, *args):
+        stats = _current_stats.get()
+        if stats is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            stats.add(statements=1, db_seconds=time.perf_counter() - start)
+
+    def execute(self, query, args=None):
+        return self._timed(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed(self._cursor.executemany, query, args)
+
+    def _fetched(self, rows, count):
+        stats = _current_stats.get()
+        if stats is not None and count:
+            stats.add(rows=count)
+        return rows
+
+    def fetchone(self):
+        row = self._timed_fetch(self._cursor.fetchone)
+        return self._fetched(row, 1 if row is not None else 0)
+
+    def fetchmany(self, size=None):
+        rows = self._timed_fetch(self._cursor.fetchmany, size)
+        return self._fetched(rows, len(rows))
+
+    def fetchall(self):
+        rows = self._timed_fetch(self._cursor.fetchall)
+        return self._fetched(rows, len(rows))
+
+    def _timed_fetch(self, method, *args):
+        # Buffered cursors fetch during execute(); unbuffered ones wait on the server here
+        stats = _current_stats.get()
+        if stats is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            stats.add(db_seconds=time.perf_counter() - start)
+
+
+class _RouteMetrics:
+    __slots__ = ('buckets', 'count', 'seconds', 'db_seconds', 'statements', 'rows', 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.db_seconds = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.statuses = defaultdict(int)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._routes = defaultdict(_RouteMetrics)
+        self._lock = threading.Lock()
+
+    def observe(self, route, method, status, seconds, stats):
+        with self._lock:
+            metrics = self._routes[(route, method)]
+            metrics.count += 1
+            metrics.seconds += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    metrics.buckets[i] += 1
+            metrics.statuses[status] += 1
+            if stats is not None:
+                metrics.db_seconds += stats.db_seconds
+                metrics.statements += stats.statements
+                metrics.rows += stats.rows
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(m.buckets), m.count, m.seconds, m.db_seconds, m.statements, m.rows, dict(m.statuses))
+                    for key, m in self._routes.items()}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def reset_after_fork(self):
+        self._routes = defaultdict(_RouteMetrics)
+        self._lock = threading.Lock()
+
+
+registry = MetricsRegistry()
+os.register_at_fork(after_in_child=registry.reset_after_fork)
+
+
+class ResponseTimeSampler:
+    """Buffers sampled latencies and adds them to the per-minute averages in CEOAPIResponseTime"""
+
+    def __init__(self, rate, flush_interval):
+        self.rate = rate
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def maybe_record(self, seconds):
+        if self.rate <= 0 or random.random() >= self.rate:
+            return
+        with self._lock:
+            self._buffer.append((datetime.now(), seconds))
+            # Start the flusher lazily, and again in a forked worker process
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='metrics-sampler', daemon=True)
+                self._thread.start()
+
+    def reset_after_fork(self):
+        # The flusher thread does not survive fork; maybe_record() starts a new one
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                pass  # keep sampling; the next flush retries with newer data
+
+    def flush(self):
+        with self._lock:
+            samples, self._buffer = self._buffer, []
+        if not samples:
+            return 0
+
+        per_minute = defaultdict(list)
+        for when, seconds in samples:
+            per_minute[when.replace(second=0, microsecond=0)].append(seconds)
+        rows = []
+        for minute, values in sorted(per_minute.items()):
+            total_ms = 1000 * sum(values)
+            rows.append((minute, round(total_ms / len(values)), round(total_ms, 3), len(values)))
+
+        from backend.db import get_db_connection
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            values = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+            # ResponseTime is assigned first: later assignments would see the updated sums
+            cursor.execute(f"""
+                INSERT INTO CEOAPIResponseTime (Time, ResponseTime, TotalMs, Samples)
+                VALUES {values} AS sample
+                ON DUPLICATE KEY UPDATE
+                    ResponseTime = ROUND((CEOAPIResponseTime.TotalMs + sample.TotalMs)
+                                         / (CEOAPIResponseTime.Samples + sample.Samples)),
+                    TotalMs = CEOAPIResponseTime.TotalMs + sample.TotalMs,
+                    Samples = CEOAPIResponseTime.Samples + sample.Samples
+            """, [value for row in rows for value in row])
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        return len(rows)
+
+
+sampler = ResponseTimeSampler(
+    rate=float(os.getenv('METRICS_SAMPLE_RATE', 0)),
+    flush_interval=float(os.getenv('METRICS_FLUSH_INTERVAL', 60)),
+)
+os.register_at_fork(after_in_child=sampler.reset_after_fork)
+
+
+def init_metrics(app):
+    """Install the request timing hooks on the app"""
+
+    @app.before_request
+    def _start_request_metrics():
+        request.environ['metrics.start'] = time.perf_counter()
+        request.environ['metrics.token'] = _current_stats.set(RequestStats())
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = request.environ.get('metrics.start')
+        if start is not None:
+            seconds = time.perf_counter() - start
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            registry.observe(route, request.method, response.status_code, seconds, _current_stats.get())
+            sampler.maybe_record(seconds)
+        return response
+
+    @app.teardown_request
+    def _reset_request_metrics(exc):
+        token = request.environ.pop('metrics.token', None)
+        if token is not None:
+            _current_stats.reset(token)
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render_prometheus():
+    lines = []
+    snapshot = registry.snapshot()
+
+    def family(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    family('api_request_duration_seconds', 'histogram', 'Request latency by route.')
+    for (route, method), (buckets, count, seconds, *_rest) in sorted(snapshot.items()):
+        labels = _labels(route=route, method=method)
+        for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+            lines.append(f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {bucket_count}')
+        lines.append(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'api_request_duration_seconds_sum{{{labels}}} {seconds:.6f}')
+        lines.append(f'api_request_duration_seconds_count{{{labels}}} {count}')
+
+    family('api_requests_total', 'counter', 'Requests by route and status code.')
+    for (route, method), (*_rest, statuses) in sorted(snapshot.items()):
+        for status, count in sorted(statuses.items()):
+            lines.append(f'api_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+    for name, index, help_text, fmt in (
+        ('api_request_db_seconds_total', 3, 'Time spent waiting on MySQL.', '{:.6f}'),
+        ('api_request_db_statements_total', 4, 'SQL statements executed.', '{}'),
+        ('api_request_db_rows_total', 5, 'Rows fetched from MySQL.', '{}'),
+    ):
+        family(name, 'counter', help_text)
+        for (route, method), values in sorted(snapshot.items()):
+            lines.append(f'{name}{{{_labels(route=route, method=method)}}} {fmt.format(values[index])}')
+
+    from backend.db import get_pool_stats
+    pool = get_pool_stats()
+    if pool is not None:
+        family('db_pool_connections', 'gauge', 'Connections in the DB pool by state.')
+        for state in ('idle', 'in_use'):
+            lines.append(f'db_pool_connections{{state="{state}"}} {pool[state]}')
+        for key in ('checkouts', 'waits', 'timeouts', 'failed_pings', 'connections_created'):
+            family(f'db_pool_{key}_total', 'counter', f'DB pool {key.replace("_", " ")}.')
+            lines.append(f'db_pool_{key}_total {pool[key]}')
+
+    from backend.cache import response_cache
+    cache = response_cache.stats()
+    for key in ('hits', 'misses', 'coalesced', 'invalidations', 'evictions'):
+        family(f'response_cache_{key}_total', 'counter', f'Response cache {key}.')
+        lines.append(f'response_cache_{key}_total {cache[key]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose request, SQL, pool and cache metrics in the Prometheus text format"""
+    return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,79 @@
+########################################################
+# Keyset pagination and field projection helpers
+########################################################
+#
+# List routes page with a `limit` and an opaque `cursor` instead of OFFSET:
+# the cursor encodes the sort key of the last row returned, and the next
+# page starts right after it, so every page costs the same index range scan
+# no matter how deep the caller has paged.
+#
+#     GET /api/meal-logs?client_id=3&limit=100
+#     -> {"items": [...], "next_cursor": "WyIyMDI0LTAz..."}
+#     GET /api/meal-logs?client_id=3&limit=100&cursor=WyIyMDI0LTAz...
+#
+# `fields=` limits the returned keys (and the selected columns) to the ones
+# the caller asks for, e.g. fields=id,datetime.
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# What turning a decoded cursor's values back into a sort key can raise when
+# the client sent a tampered token (e.g. int([1]), int(1e999), a missing key).
+# Routes answer these with 400 "Invalid cursor".
+CURSOR_ERRORS = (ValueError, TypeError, KeyError, OverflowError)
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last returned row as an opaque token"""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode a token produced by encode_cursor(); raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_page_args(args):
+    """
+    Return (paginate, limit, cursor) from the query string. Pagination is on
+    when either limit or cursor is given; without them routes keep returning
+    the full list. Raises ValueError on a bad limit.
+    """
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+    if limit is None and cursor is None:
+        return False, None, None
+    if limit is None:
+        return True, DEFAULT_PAGE_SIZE, cursor
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return True, limit, cursor
+
+
+def parse_fields(value, allowed):
+    """
+    Return the requested field names in `allowed` order, or all of them when
+    `value` is empty. Raises ValueError naming any unknown field.
+    """
+    if not value:
+        return list(allowed)
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(allowed)}")
+    return [field for field in allowed if field in requested]
@@ -0,0 +1,229 @@
+########################################################
+# Opt-in request profiling
+########################################################
+#
+# init_profiling(app) can wrap single requests in a profiler and write the
+# result to PROFILE_DIR. A request is profiled when
+#
+#   - PROFILE_ENABLED=true and it carries an "X-Profile" header:
+#         X-Profile: 1        sampling profiler, collapsed stacks
+#         X-Profile: pstats   cProfile, a .pstats file for pstats/snakeviz
+#   - or it is picked by PROFILE_SAMPLE_RATE (sampling profiler)
+#
+# The sampling profiler reads the request thread's stack every
+# PROFILE_INTERVAL seconds from a helper thread, so the request itself runs
+# unmodified. Samples whose stack is inside pymysql count as DB wait; the
+# SQL time measured by backend.metrics is recorded next to them, so every
+# profile splits wall time into Python time and DB time.
+#
+# Each profile is a <id>.json summary plus <id>.collapsed (one
+# "frame;frame;frame count" line per stack, for flamegraph.pl or
+# speedscope) or <id>.pstats. Only the newest PROFILE_MAX_FILES profiles
+# are kept. GET /api/profiles lists them and GET /api/profiles/<file>
+# downloads one.
+
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from flask import request
+
+from backend.metrics import current_request_stats
+
+PROFILE_HEADER = 'X-Profile'
+
+# Frames from these files are the request waiting on MySQL
+DB_WAIT_MARKERS = (os.sep + 'pymysql' + os.sep,)
+
+_FILE_NAME = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}\.(json|collapsed|pstats)$')
+
+
+def profiling_enabled():
+    return os.getenv('PROFILE_ENABLED', 'false').lower() == 'true'
+
+
+def profile_dir():
+    return os.getenv('PROFILE_DIR', os.path.join(os.getcwd(), 'profiles'))
+
+
+def is_profile_file(name):
+    """True for names the profiler writes (used to validate download requests)"""
+    return bool(_FILE_NAME.match(name))
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.db_samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._record(frame)
+
+    def _record(self, frame):
+        stack = []
+        in_db = False
+        while frame is not None:
+            code = frame.f_code
+            if not in_db and any(marker in code.co_filename for marker in DB_WAIT_MARKERS):
+                in_db = True
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            if code.co_name == 'full_dispatch_request':
+                break  # everything above is the server loop
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[';'.join(stack)] += 1
+        self.samples += 1
+        if in_db:
+            self.db_samples += 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """One profiled request: starts the profiler, then writes its files"""
+
+    def __init__(self, mode, interval):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        if mode == 'pstats':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = SamplingProfiler(threading.get_ident(), interval)
+            self.profiler.start()
+
+    def stop(self):
+        if self.mode == 'pstats':
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+    def finish(self, response):
+        wall = time.perf_counter() - self.started
+        self.stop()
+
+        stats = current_request_stats()
+        db_seconds = stats.db_seconds if stats is not None else 0.0
+        summary = {
+            'id': self.id,
+            'mode': self.mode,
+            'created': datetime.now().isoformat(' ', 'seconds'),
+            'method': request.method,
+            'route': request.url_rule.rule if request.url_rule else 'unmatched',
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'wall_ms': round(wall * 1000, 3),
+            'db_ms': round(db_seconds * 1000, 3),
+            'python_ms': round(max(wall - db_seconds, 0.0) * 1000, 3),
+            'statements': stats.statements if stats is not None else 0,
+        }
+
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        if self.mode == 'pstats':
+            summary['file'] = f"{self.id}.pstats"
+            self.profiler.dump_stats(os.path.join(directory, summary['file']))
+        else:
+            summary['file'] = f"{self.id}.collapsed"
+            summary['samples'] = self.profiler.samples
+            summary['db_samples'] = self.profiler.db_samples
+            with open(os.path.join(directory, summary['file']), 'w') as f:
+                f.write(self.profiler.collapsed())
+        with open(os.path.join(directory, f"{self.id}.json"), 'w') as f:
+            json.dump(summary, f)
+
+        _prune(directory, int(os.getenv('PROFILE_MAX_FILES', 200)))
+        return summary
+
+
+def _prune(directory, keep):
+    summaries = sorted(name for name in os.listdir(directory) if is_profile_file(name) and name.endswith('.json'))
+    for name in summaries[:max(len(summaries) - keep, 0)]:
+        profile_id = name[:-len('.json')]
+        for suffix in ('.json', '.collapsed', '.pstats'):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(limit=50):
+    """Summaries of the newest profiles, newest first"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((name for name in os.listdir(directory) if is_profile_file(name) and name.endswith('.json')),
+                   reverse=True)
+    profiles = []
+    for name in names[:limit]:
+        try:
+            with open(os.path.join(directory, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # pruned or still being written by another worker
+    return profiles
+
+
+def _requested_mode():
+    header = request.headers.get(PROFILE_HEADER)
+    if header and profiling_enabled():
+        return 'pstats' if header.lower() == 'pstats' else 'sample'
+    rate = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    if rate > 0 and random.random() < rate:
+        return 'sample'
+    return None
+
+
+def init_profiling(app):
+    """Install the request profiling hooks on the app (after init_metrics)"""
+
+    @app.before_request
+    def _start_request_profile():
+        mode = _requested_mode()
+        if mode is not None:
+            request.environ['profiling.profile'] = RequestProfile(
+                mode, float(os.getenv('PROFILE_INTERVAL', 0.005)))
+
+    @app.after_request
+    def _finish_request_profile(response):
+        profile = request.environ.pop('profiling.profile', None)
+        if profile is not None:
+            try:
+                summary = profile.finish(response)
+                response.headers['X-Profile-Id'] = summary['id']
+            except OSError as e:
+                app.logger.warning("Could not write request profile: %s", e)
+        return response
+
+    @app.teardown_request
+    def _discard_request_profile(exc):
+        # Only left over when the request failed before after_request ran
+        profile = request.environ.pop('profiling.profile', None)
+        if profile is not None:
+            profile.stop()
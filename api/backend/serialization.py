@@ -0,0 +1,176 @@
+########################################################
+# JSON encoding and row mappers shared by the blueprints
+########################################################
+#
+# APIJSONEncoder is installed as the app's JSON encoder in create_app, so
+# jsonify() accepts the values pymysql hands back as they are:
+#
+#     date       -> "2024-03-01"
+#     datetime   -> "2024-03-01 08:30:00"
+#     Decimal    -> 12.5
+#     timedelta  -> "01:30:00"   (MySQL TIME columns)
+#
+# Encoding goes through orjson when it is installed and falls back to the
+# standard library otherwise; both produce the same values.
+#
+# RowMapper declares how a DictCursor row becomes an API object, so routes
+# do not copy rows into new dicts by hand:
+#
+#     CLIENT = RowMapper({'id': 'ID', 'name': 'Name', 'is_archived': ('is_archived', bool)})
+#     return jsonify(CLIENT.many(cursor.fetchall())), 200
+
+import datetime
+import decimal
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def encode_value(value):
+    """Convert one non-JSON-native database value to its API representation"""
+    # Most common first: DECIMAL quantities, then DATETIME/TIMESTAMP, then DATE
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(' ', 'seconds')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        seconds = int(value.total_seconds())
+        sign = '-' if seconds < 0 else ''
+        hours, remainder = divmod(abs(seconds), 3600)
+        return f"{sign}{hours:02d}:{remainder // 60:02d}:{remainder % 60:02d}"
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class APIJSONEncoder(JSONEncoder):
+    """Flask JSON encoder that understands database values and uses orjson when available"""
+
+    def default(self, o):
+        try:
+            return encode_value(o)
+        except TypeError:
+            return super().default(o)
+
+    def encode(self, o):
+        if orjson is None or self.indent is not None:
+            return super().encode(o)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(o, default=self.default, option=option).decode()
+
+
+def init_json(app):
+    """Make jsonify() on this app use APIJSONEncoder"""
+    app.json_encoder = APIJSONEncoder
+
+
+class RowMapper:
+    """
+    Maps DictCursor rows to API dicts. fields maps each API key to its
+    column, or to a (column, convert) pair when the value needs more than
+    the encoder's type handling.
+    """
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self._pairs = []
+        self._converters = []
+        for key, spec in self.fields.items():
+            column, convert = spec if isinstance(spec, tuple) else (spec, None)
+            self._pairs.append((key, column))
+            if convert is not None:
+                self._converters.append((key, convert))
+
+    @property
+    def keys(self):
+        return list(self.fields)
+
+    def columns(self):
+        """Columns to SELECT for this mapping"""
+        return [column for _, column in self._pairs]
+
+    def only(self, keys):
+        """A mapper limited to the given API keys, in declaration order"""
+        return RowMapper({key: spec for key, spec in self.fields.items() if key in keys})
+
+    def __call__(self, row):
+        result = {key: row[column] for key, column in self._pairs}
+        for key, convert in self._converters:
+            result[key] = convert(result[key])
+        return result
+
+    def many(self, rows):
+        return [self(row) for row in rows]
+
+
+########################################################
+# Row mappers per resource
+########################################################
+
+CLIENT = RowMapper({
+    'id': 'ID',
+    'name': 'Name',
+    'dob': 'DOB',
+    'email': 'Email',
+    'is_archived': ('is_archived', bool),
+})
+
+# Client search results also carry the age computed in SQL
+CLIENT_WITH_AGE = RowMapper({
+    'id': 'ID',
+    'name': 'Name',
+    'dob': 'DOB',
+    'email': 'Email',
+    'age': 'age',
+    'is_archived': ('is_archived', bool),
+})
+
+MEAL_LOG = RowMapper({
+    'id': 'ID',
+    'datetime': 'Datetime',
+    'notes': 'Notes',
+    'client_id': 'ClientID',
+})
+
+NUTRIENT = RowMapper({
+    'id': 'ID',
+    'name': 'Name',
+    'category': 'Category',
+    'quantity': 'Quantity',
+    'unit': 'Unit',
+})
+
+# DailyNutrientTotals rows as selected by the daily summary routes
+NUTRIENT_TOTAL = RowMapper({
+    'name': 'Name',
+    'total': 'total',
+    'unit': 'Unit',
+})
+
+NUTRITION_PLAN = RowMapper({
+    'id': 'ID',
+    'start_date': 'StartDate',
+    'end_date': 'EndDate',
+    'calories_goal': 'CaloriesGoal',
+})
+
+SYSTEM_PERFORMANCE = RowMapper({
+    'id': 'PerformanceID',
+    'Performance_Metric': 'Performance_Metric',
+    'System_Status': 'System_Status',
+    'Existing_Clients': 'Existing_Clients',
+    'New_Clients': 'New_Clients',
+    'Timestamp': 'Timestamp',
+})
+
+DATASET = RowMapper({
+    'id': 'DatasetID',
+    'dataset_name': 'Dataset_Name',
+    'data_description': 'Data_Description',
+    'status': 'Status',
+})
@@ -1,13 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_from_directory
 from datetime import datetime
+import os
 import pymysql
-from backend.db import get_db_connection  # Adjust if your db connection module is elsewhere
+from backend.db import get_db_connection, get_pool_stats  # Adjust if your db connection module is elsewhere
+from backend.cache import cached, invalidates, response_cache
+from backend.serialization import SYSTEM_PERFORMANCE, DATASET
+from backend.profiling import is_profile_file, list_profiles, profile_dir
 
 system_admin_bp = Blueprint('system_admin', __name__, url_prefix='/api')
 
 
 # 1) GET /api/system-performance
 @system_admin_bp.route('/system-performance', methods=['GET'])
+@cached(ttl=60, tags=('system_performance',))
 def get_system_performance():
     """
     Retrieve system performance metrics (e.g., CPU usage, memory usage, client counts)
@@ -29,7 +34,7 @@ def get_system_performance():
 
         query = """
           SELECT 
-            PerformanceID as id,
+            PerformanceID,
             Performance_Metric,
             System_Status,
             Existing_Clients,
@@ -39,21 +44,7 @@ def get_system_performance():
           ORDER BY Timestamp
         """
         cursor.execute(query)
-        rows = cursor.fetchall()
-
-        # Convert rows to a list of dictionaries
-        results = []
-        for row in rows:
-            results.append({
-                "id": row["id"],
-                "Performance_Metric": row["Performance_Metric"],
-                "System_Status": row["System_Status"],
-                "Existing_Clients": row["Existing_Clients"],
-                "New_Clients": row["New_Clients"],
-                "Timestamp": row["Timestamp"].strftime("%Y-%m-%d %H:%M:%S") if row["Timestamp"] else None
-            })
-
-        return jsonify(results), 200
+        return jsonify(SYSTEM_PERFORMANCE.many(cursor.fetchall())), 200
 
     except pymysql.MySQLError as e:
         return jsonify({"error": f"Database error: {str(e)}"}), 500
@@ -67,6 +58,7 @@ def get_system_performance():
 
 # 2) GET /api/datasets
 @system_admin_bp.route('/datasets', methods=['GET'])
+@cached(ttl=300, tags=('datasets',))
 def get_datasets():
     """
     Retrieve all dataset records. 
@@ -84,7 +76,7 @@ def get_datasets():
 
         query = """
           SELECT
-            DatasetID as id,
+            DatasetID,
             Dataset_Name,
             Data_Description,
             Status
@@ -92,18 +84,7 @@ def get_datasets():
           ORDER BY DatasetID
         """
         cursor.execute(query)
-        rows = cursor.fetchall()
-
-        results = []
-        for row in rows:
-            results.append({
-                "id": row["id"],
-                "dataset_name": row["Dataset_Name"],
-                "data_description": row["Data_Description"],
-                "status": row["Status"]
-            })
-
-        return jsonify(results), 200
+        return jsonify(DATASET.many(cursor.fetchall())), 200
 
     except pymysql.MySQLError as e:
         return jsonify({"error": f"Database error: {str(e)}"}), 500
@@ -117,6 +98,7 @@ def get_datasets():
 
 # 3) POST /api/datasets
 @system_admin_bp.route('/datasets', methods=['POST'])
+@invalidates('datasets')
 def create_dataset():
     """
     Create a new dataset entry.
@@ -166,6 +148,7 @@ def create_dataset():
 
 # 4) PUT /api/datasets/<int:dataset_id>
 @system_admin_bp.route('/datasets/<int:dataset_id>', methods=['PUT'])
+@invalidates('datasets')
 def update_dataset(dataset_id):
     """
     Update an existing dataset record.
@@ -230,6 +213,7 @@ def update_dataset(dataset_id):
 
 # 5) DELETE /api/datasets/<int:dataset_id>
 @system_admin_bp.route('/datasets/<int:dataset_id>', methods=['DELETE'])
+@invalidates('datasets')
 def delete_dataset(dataset_id):
     """
     Delete an existing dataset entry.
@@ -257,3 +241,54 @@ def delete_dataset(dataset_id):
     finally:
         cursor.close()
         conn.close()
+
+
+# 6) GET /api/db-pool/stats
+@system_admin_bp.route('/db-pool/stats', methods=['GET'])
+def get_db_pool_stats():
+    """
+    Report database connection pool counters (size, idle, in use,
+    checkouts, waits, timeouts, failed pings).
+    """
+    stats = get_pool_stats()
+    if stats is None:
+        return jsonify({"pool_enabled": False}), 200
+    return jsonify({"pool_enabled": True, **stats}), 200
+
+
+# 7) GET /api/cache/stats
+@system_admin_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Report response cache counters (hits, misses, coalesced misses,
+    invalidations, evictions, entries) for this API process.
+    """
+    return jsonify(response_cache.stats()), 200
+
+
+# 8) GET /api/profiles
+@system_admin_bp.route('/profiles', methods=['GET'])
+def get_profiles():
+    """
+    List the newest request profiles written by this API (see
+    backend/profiling.py), newest first. Optional query parameter:
+      limit: number of profiles to return (default 50)
+    """
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify(list_profiles(max(limit, 0))), 200
+
+
+# 9) GET /api/profiles/<file>
+@system_admin_bp.route('/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    """
+    Download one profile file (.collapsed, .pstats or its .json summary)
+    as listed by GET /api/profiles.
+    """
+    directory = profile_dir()
+    if not is_profile_file(name) or not os.path.isfile(os.path.join(directory, name)):
+        return jsonify({"error": "Profile not found"}), 404
+    return send_from_directory(directory, name, as_attachment=True)
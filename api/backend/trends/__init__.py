@@ -0,0 +1 @@
+from backend.trends.trend_routes import trends_bp 
\ No newline at end of file
@@ -0,0 +1,246 @@
+########################################################
+# Trend Analysis Routes Blueprint
+########################################################
+
+from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta
+import numpy as np
+import pymysql
+from backend.db import get_db_connection
+from backend.meals.nutrient_catalog import nutrient_catalog
+
+# Create the blueprint
+trends_bp = Blueprint('trends', __name__)
+
+DEFAULT_NUTRIENTS = ['Protein', 'Carbohydrates', 'Fat', 'Fiber']
+
+# Days in a full bucket, used to judge logging consistency
+PERIOD_DAYS = {'weekly': 7, 'monthly': 30, 'yearly': 365}
+
+# Relative change per period (slope / mean) below which a trend counts as stable
+STABLE_THRESHOLD = 0.05
+
+
+def _bucket_days(days, period):
+    """
+    Map an array of datetime64[D] values to the first day of their bucket
+    (Monday of the week, first of the month or first of the year).
+    """
+    if period == 'weekly':
+        # 1970-01-01 was a Thursday, so shift by 3 to make weeks start on Monday
+        day_numbers = days.astype('int64')
+        return days - ((day_numbers + 3) % 7).astype('timedelta64[D]')
+    if period == 'monthly':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    return days.astype('datetime64[Y]').astype('datetime64[D]')
+
+
+def _bucket_label(bucket_start, period):
+    if period == 'weekly':
+        return str(bucket_start)
+    if period == 'monthly':
+        return str(bucket_start)[:7]
+    return str(bucket_start)[:4]
+
+
+def _trend_direction(values):
+    """Least-squares slope over the bucket series, labelled relative to its mean"""
+    if len(values) < 2:
+        return 'stable', 0.0
+    slope = np.polyfit(np.arange(len(values), dtype=float), values, 1)[0]
+    mean = values.mean()
+    relative = slope / mean if mean else 0.0
+    if relative > STABLE_THRESHOLD:
+        return 'increasing', float(slope)
+    if relative < -STABLE_THRESHOLD:
+        return 'decreasing', float(slope)
+    return 'stable', float(slope)
+
+
+# Route to analyze nutrient trends for a client
+@trends_bp.route('/trend-analysis', methods=['GET'])
+def get_trend_analysis():
+    """
+    Analyze a client's nutrient intake over weekly, monthly or yearly periods.
+
+    For every period with logged meals the response contains, per nutrient,
+    the average daily intake over the days that have logs (avg_value), the
+    number of meals and the number of days with logs. The trend label comes
+    from a least-squares fit over those averages.
+    """
+    conn = None
+    cursor = None
+    try:
+        # Get query parameters
+        client_id = request.args.get('client_id')
+        period = request.args.get('period', 'weekly')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        nutrients_param = request.args.get('nutrients', '')
+
+        if not client_id:
+            return jsonify({"error": "client_id parameter is required"}), 400
+
+        if period not in PERIOD_DAYS:
+            return jsonify({"error": "period must be one of weekly, monthly, yearly"}), 400
+
+        try:
+            end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else datetime.now().date()
+            start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else end - timedelta(days=90)
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+        if start > end:
+            return jsonify({"error": "start_date must not be after end_date"}), 400
+
+        nutrient_names = [n.strip() for n in nutrients_param.split(',') if n.strip()] or DEFAULT_NUTRIENTS
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # Half-open window so an index on (ClientID, Datetime) can be used
+        window = (client_id, start, end + timedelta(days=1))
+
+        # Get every meal in the window (meals without the selected nutrients still count as logged)
+        cursor.execute("""
+            SELECT ID, Datetime
+            FROM MealLog
+            WHERE ClientID = %s AND Datetime >= %s AND Datetime < %s
+        """, window)
+        meals = cursor.fetchall()
+
+        # Get the daily canonical totals of the selected nutrients, filtered on their catalog type IDs
+        name_of_type = {type_id: name
+                        for name, type_ids in nutrient_catalog.ids_named(cursor, nutrient_names).items()
+                        for type_id in type_ids}
+        nutrient_rows = []
+        if name_of_type:
+            placeholders = ', '.join(['%s'] * len(name_of_type))
+            cursor.execute(f"""
+                SELECT DATE(ml.Datetime) as day, n.NutrientTypeID,
+                       SUM(n.CanonicalQuantity) as Quantity, COUNT(*) as logged
+                FROM MealLog ml
+                JOIN Nutrient n ON n.MealLogID = ml.ID
+                WHERE ml.ClientID = %s AND ml.Datetime >= %s AND ml.Datetime < %s
+                  AND n.NutrientTypeID IN ({placeholders})
+                GROUP BY DATE(ml.Datetime), n.NutrientTypeID
+            """, window + tuple(name_of_type))
+            nutrient_rows = cursor.fetchall()
+            for row in nutrient_rows:
+                row['Name'] = name_of_type[row['NutrientTypeID']]
+                row['Unit'] = nutrient_catalog.canonical(row['NutrientTypeID'])[0]
+
+        response = {
+            "client_id": int(client_id),
+            "period": period,
+            "start_date": start.strftime('%Y-%m-%d'),
+            "end_date": end.strftime('%Y-%m-%d'),
+            "summary": {},
+            "nutrients": {},
+            "recommendations": []
+        }
+
+        if not meals:
+            response["summary_text"] = (
+                f"No meals were logged between {response['start_date']} and {response['end_date']}."
+            )
+            return jsonify(response), 200
+
+        # Bucket the meals
+        meal_days = np.array([meal['Datetime'].date() for meal in meals], dtype='datetime64[D]')
+        buckets, meal_bucket = np.unique(_bucket_days(meal_days, period), return_inverse=True)
+        n_buckets = len(buckets)
+
+        meal_counts = np.bincount(meal_bucket, minlength=n_buckets)
+
+        # Each distinct day belongs to exactly one bucket, so counting them gives days with logs
+        logged_days, first_index = np.unique(meal_days, return_index=True)
+        days_with_logs = np.bincount(meal_bucket[first_index], minlength=n_buckets)
+
+        labels = [_bucket_label(bucket, period) for bucket in buckets]
+
+        # Map each daily total to its bucket (every day with nutrients has a meal, so its bucket exists)
+        row_days = np.array([row['day'] for row in nutrient_rows], dtype='datetime64[D]')
+        row_bucket = np.searchsorted(buckets, _bucket_days(row_days, period))
+        row_quantity = np.array([float(row['Quantity'] or 0) for row in nutrient_rows], dtype=float)
+        row_logged = np.array([row['logged'] for row in nutrient_rows], dtype=np.int64)
+
+        canonical_names = {name.lower(): name for name in nutrient_names}
+        row_names = np.array([canonical_names.get(row['Name'].lower(), row['Name'])
+                              for row in nutrient_rows], dtype=object)
+        row_units = np.array([row['Unit'] or '' for row in nutrient_rows], dtype=object)
+
+        for name in nutrient_names:
+            mask = row_names == name
+            if not mask.any():
+                continue
+
+            # Report the canonical unit most of this nutrient converts to; amounts
+            # in a unit the conversion table cannot reach (e.g. IU) are left out
+            units, unit_index = np.unique(row_units[mask], return_inverse=True)
+            unit = str(units[np.argmax(np.bincount(unit_index, weights=row_logged[mask]))])
+            mask &= row_units == unit
+
+            totals = np.bincount(row_bucket[mask], weights=row_quantity[mask], minlength=n_buckets)
+            averages = totals / days_with_logs
+            trend, slope = _trend_direction(averages)
+
+            response["nutrients"][name] = {
+                "unit": unit,
+                "trend": trend,
+                "slope": round(slope, 3),
+                "data": [
+                    {
+                        "period": labels[i],
+                        "avg_value": round(float(averages[i]), 2),
+                        "meal_count": int(meal_counts[i]),
+                        "days_with_logs": int(days_with_logs[i])
+                    }
+                    for i in range(n_buckets)
+                ]
+            }
+            response["summary"][name] = {
+                "avg": round(float(averages.mean()), 1),
+                "unit": unit,
+                "trend": trend
+            }
+
+            if trend != 'stable':
+                response["recommendations"].append({
+                    "category": name,
+                    "message": f"Daily {name.lower()} intake is {trend} by about "
+                               f"{abs(slope):.1f} {unit} per {period[:-2]}; check that this matches the nutrition plan."
+                })
+
+        # Flag inconsistent logging (fewer than half of the days in a full period)
+        expected_days = PERIOD_DAYS[period]
+        window_days = (end - start).days + 1
+        coverage = len(logged_days) / min(window_days, expected_days * n_buckets)
+        if coverage < 0.5:
+            response["recommendations"].append({
+                "category": "Logging consistency",
+                "message": f"Meals were logged on only {len(logged_days)} of {window_days} days; "
+                           f"trends may not reflect actual intake."
+            })
+
+        trending = [f"{name} is {data['trend']}" for name, data in response["summary"].items()
+                    if data['trend'] != 'stable']
+        response["summary_text"] = (
+            f"Analyzed {len(meals)} meals across {n_buckets} {period} periods "
+            f"from {response['start_date']} to {response['end_date']}. "
+            + ("; ".join(trending) + "." if trending else "Intake of the selected nutrients is stable.")
+        )
+
+        return jsonify(response), 200
+
+    except pymysql.MySQLError as e:
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
@@ -16,11 +16,26 @@ load_dotenv()
 from backend.clients import clients_bp
 from backend.meals import meals_bp  # Import the new meals blueprint
 from backend.system_admin.system_admin_routes import system_admin_bp  # Import system admin blueprint
+from backend.trends import trends_bp  # Import trend analysis blueprint
+from backend.metrics import metrics_bp, init_metrics  # Request metrics and /api/metrics
+from backend.serialization import init_json  # JSON encoding of dates, Decimals and TIME values
+from backend.profiling import init_profiling  # Opt-in per-request profiles
+from backend.meals.write_behind import init_write_behind  # Optional queued meal writes
 
 def create_app():
     # Initialize Flask app
     app = Flask(__name__)
     CORS(app)  # Enable CORS for all routes
+    init_json(app)  # jsonify() handles database values directly
+
+    # Per-request latency and SQL metrics
+    init_metrics(app)
+
+    # Profiles of single requests on demand (X-Profile header / PROFILE_SAMPLE_RATE)
+    init_profiling(app)
+
+    # Drain meals left in the write-behind journal (MEAL_WRITE_BEHIND=true)
+    init_write_behind(app)
 
     # Register blueprints
     app.register_blueprint(clients_bp, url_prefix='/api')
@@ -31,6 +46,9 @@ def create_app():
     app.logger.info("Student athlete blueprint registered")
     app.register_blueprint(system_admin_bp, url_prefix='/api')
     app.logger.info("System admin blueprint registered")
+    app.register_blueprint(trends_bp, url_prefix='/api')
+    app.logger.info("Trend analysis blueprint registered")
+    app.register_blueprint(metrics_bp, url_prefix='/api')
     
     # Default route
     @app.route('/')
@@ -40,6 +58,11 @@ def create_app():
     return app
 
 if __name__ == '__main__':
+    # API_MODE=production (in the environment or .env) hands over to gunicorn:
+    # several worker processes with a thread pool each, see gunicorn.conf.py
+    if os.getenv('API_MODE', 'development').lower() == 'production':
+        os.execvp('gunicorn', ['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'])
+
     # we want to run in debug mode (for hot reloading) 
     # this app will be bound to port 4000. 
     # Take a look at the docker-compose.yml to see 
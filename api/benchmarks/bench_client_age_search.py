@@ -0,0 +1,111 @@
+"""
+Age-range client search on a large Client table: the previous per-row
+TIMESTAMPDIFF filter against the DOB range that /api/clients/search now uses
+(migration 10's index on Client(is_archived, DOB)).
+
+Load a large Client table first, for example:
+
+    python benchmarks/generate_data.py insert --clients 1000000 --meals-per-client 0
+
+For each age band it prints the EXPLAIN plan of both queries (access type,
+key and estimated rows) and p50/p95 latency of:
+
+  - timestampdiff: the old SELECT * ... TIMESTAMPDIFF(YEAR, DOB, CURDATE()) filter
+  - dob range:     the DOB range query, all matches
+  - route page:    GET /api/clients/search?min_age=..&max_age=..&limit=100
+  - combined:      the same with name=<common fragment> added
+
+Run from the api/ folder:
+
+    python benchmarks/bench_client_age_search.py --runs 20
+"""
+import argparse
+import os
+import time
+
+from common import dispatch, percentile
+
+AGE_BANDS = [(18, 24), (30, 34), (40, 60), (65, 65)]
+
+OLD_QUERY = ("SELECT *, TIMESTAMPDIFF(YEAR, DOB, CURDATE()) as age FROM Client WHERE 1=1 "
+             "AND TIMESTAMPDIFF(YEAR, DOB, CURDATE()) >= %s AND TIMESTAMPDIFF(YEAR, DOB, CURDATE()) <= %s "
+             "AND is_archived = FALSE")
+
+
+def new_query():
+    from backend.clients.search import age_filter
+    condition, _ = age_filter(0, 0)
+    return ("SELECT ID, Name, DOB, Email, is_archived, TIMESTAMPDIFF(YEAR, DOB, CURDATE()) AS age "
+            f"FROM Client WHERE {condition} AND is_archived = FALSE ORDER BY ID")
+
+
+def explain(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    row = cursor.fetchone()
+    return f"type={row['type']} key={row['key']} rows~{row['rows']}"
+
+
+def timed(runs, fn):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return percentile(timings, 50), percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--name', default='son', help='name fragment for the combined filter case')
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    app = create_app()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) AS clients FROM Client")
+        print(f"{cursor.fetchone()['clients']} clients, median/p95 of {args.runs} runs")
+
+        for min_age, max_age in AGE_BANDS:
+            old_params = (min_age, max_age)
+            new_params = (min_age, max_age + 1)
+
+            def run_old():
+                cursor.execute(OLD_QUERY, old_params)
+                return cursor.fetchall()
+
+            def run_new():
+                cursor.execute(new_query(), new_params)
+                return cursor.fetchall()
+
+            matches = len(run_new())
+            if len(run_old()) != matches:
+                raise SystemExit(f"ages {min_age}-{max_age}: DOB range returned {matches} rows, "
+                                 f"TIMESTAMPDIFF {len(run_old())}")
+
+            print(f"\nages {min_age}-{max_age}: {matches} clients")
+            print(f"  plan timestampdiff: {explain(cursor, OLD_QUERY, old_params)}")
+            print(f"  plan dob range:     {explain(cursor, new_query(), new_params)}")
+            band = f'min_age={min_age}&max_age={max_age}'
+            cases = [
+                ('timestampdiff', run_old),
+                ('dob range', run_new),
+                ('route page', lambda: dispatch(app, f'/api/clients/search?{band}&limit=100')),
+                ('combined', lambda: dispatch(app, f'/api/clients/search?{band}&name={args.name}&limit=100')),
+            ]
+            for name, fn in cases:
+                p50, p95 = timed(args.runs, fn)
+                print(f"  {name:14} p50={p50:8.2f}ms p95={p95:8.2f}ms")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Client search latency at production scale: the old LIKE '%term%' scan against
+the ngram FULLTEXT index from migration 09.
+
+Needs a large Client table, e.g. one million synthetic clients without meals:
+
+    python benchmarks/generate_data.py insert --clients 1000000 --meals-per-client 0
+
+Search terms are taken from existing client names (a prefix, a substring, a
+fragment of an email and a misspelled name). For each term it measures:
+
+  - like scan:  the previous query, Name LIKE '%term%'
+  - list:       GET /api/clients?name=term&limit=50
+  - q=<mode>:   GET /api/clients/search?q=term&match=<mode>&limit=50
+
+Run from the api/ folder:
+
+    python benchmarks/bench_client_search.py --runs 20
+"""
+import argparse
+import json
+import os
+import time
+
+from common import dispatch, percentile
+
+
+def pick_terms(cursor):
+    cursor.execute("SELECT COUNT(*) AS clients FROM Client")
+    total = cursor.fetchone()['clients']
+    cursor.execute("SELECT Name, Email FROM Client WHERE ID >= %s ORDER BY ID LIMIT 1", (total // 2,))
+    row = cursor.fetchone()
+    first, last = row['Name'].split()[0], row['Name'].split()[-1]
+    typo = last[:1] + last[2] + last[1] + last[3:] if len(last) > 3 else last
+    return total, [
+        ('prefix', first[:3]),
+        ('substring', last[1:4]),
+        ('email', row['Email'].split('@')[0][-5:]),
+        ('typo', typo),
+    ]
+
+
+def timed(runs, fn):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return percentile(timings, 50), percentile(timings, 95), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    app = create_app()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        total, terms = pick_terms(cursor)
+        print(f"{total} clients, median/p95 of {args.runs} runs")
+
+        def like_scan(term):
+            cursor.execute("SELECT ID, Name, DOB, Email, is_archived FROM Client "
+                           "WHERE Name LIKE %s AND is_archived = FALSE ORDER BY ID LIMIT %s",
+                           (f'%{term}%', args.limit))
+            return len(cursor.fetchall())
+
+        def api(path):
+            status, body = dispatch(app, path)
+            if status != 200:
+                raise SystemExit(f"{path} failed: {body[:500]}")
+            data = json.loads(body)
+            return len(data['items'] if isinstance(data, dict) else data)
+
+        for label, term in terms:
+            cases = [
+                ('like scan', lambda: like_scan(term)),
+                ('list', lambda: api(f'/api/clients?name={term}&limit={args.limit}')),
+            ]
+            for mode in ('prefix', 'substring', 'fuzzy'):
+                cases.append((f'q={mode}',
+                              lambda mode=mode: api(f'/api/clients/search?q={term}&match={mode}&limit={args.limit}')))
+            for name, fn in cases:
+                p50, p95, count = timed(args.runs, fn)
+                print(f"{label:9} {term!r:12} {name:12} p50={p50:8.2f}ms p95={p95:8.2f}ms rows={count}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare per-request latency of GET /api/clients/<id> with and without the
+connection pool.
+
+Run from the api/ folder against a live database (e.g. inside the api container):
+
+    python benchmarks/bench_db_pool.py --requests 500 --client-id 1
+"""
+import argparse
+import os
+import statistics
+import time
+
+from common import dispatch, percentile
+
+
+def run(pool_enabled, n_requests, client_id):
+    os.environ['DB_POOL_ENABLED'] = 'true' if pool_enabled else 'false'
+
+    from backend_app import create_app
+    app = create_app()
+
+    # warm up (opens the first pooled connection)
+    dispatch(app, f'/api/clients/{client_id}')
+
+    timings = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        status, body = dispatch(app, f'/api/clients/{client_id}')
+        timings.append((time.perf_counter() - start) * 1000)
+        if status >= 500:
+            raise SystemExit(f"Request failed: {body}")
+
+    timings.sort()
+    return {
+        'mean_ms': statistics.mean(timings),
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--client-id', type=int, default=1)
+    args = parser.parse_args()
+
+    for label, enabled in (('no pool', False), ('pooled', True)):
+        result = run(enabled, args.requests, args.client_id)
+        print(f"{label:8s} mean={result['mean_ms']:.2f}ms "
+              f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms")
+
+    from backend.db import get_pool_stats
+    print('pool stats:', get_pool_stats())
+
+
+if __name__ == '__main__':
+    main()
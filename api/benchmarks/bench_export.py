@@ -0,0 +1,87 @@
+"""
+Stream GET /api/meal-logs/export for a large synthetic client and check that
+peak RSS stays bounded.
+
+Seeds one client (email ending in @bench.invalid) with --meals meals of four
+nutrients each (250k meals = 1M nutrient rows), consumes the export chunk by
+chunk like a client download would, and exits with code 1 when the process
+RSS grew by more than --max-rss-mb. Run from the api/ folder on Linux:
+
+    python benchmarks/bench_export.py --meals 250000 --format ndjson
+"""
+import argparse
+import random
+import resource
+import time
+
+from common import dispatch
+from bench_pagination import seed, cleanup
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def stream(app, path):
+    """Consume a streamed response without buffering it; returns (status, bytes, chunks)"""
+    with app.test_request_context(path):
+        response = app.full_dispatch_request()
+        size = chunks = 0
+        try:
+            for chunk in response.response:
+                size += len(chunk)
+                chunks += 1
+        finally:
+            response.close()
+        return response.status_code, size, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meals', type=int, default=250000)
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--max-rss-mb', type=float, default=64,
+                        help='allowed RSS growth while streaming the export')
+    parser.add_argument('--compare', action='store_true',
+                        help='afterwards also load the unpaginated GET /api/meal-logs for comparison')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic rows afterwards')
+    args = parser.parse_args()
+
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        print(f"Seeding one client with {args.meals} meals ({args.meals * 4} nutrient rows)...")
+        client_id = seed(conn, args.meals, random.Random(args.seed))
+
+        app = create_app()
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        status, size, chunks = stream(app, f'/api/meal-logs/export?client_id={client_id}&format={args.format}')
+        elapsed = time.perf_counter() - start
+        growth = peak_rss_mb() - baseline
+        if status != 200:
+            raise SystemExit(f"Export failed with status {status}")
+        print(f"export ({args.format}): {elapsed:.1f}s, {size / 1024 / 1024:.1f}MiB in {chunks} chunks, "
+              f"peak RSS +{growth:.1f}MiB (budget {args.max_rss_mb:.0f}MiB)")
+
+        if args.compare:
+            before = peak_rss_mb()
+            start = time.perf_counter()
+            status, body = dispatch(app, f'/api/meal-logs?client_id={client_id}')
+            print(f"full list: {time.perf_counter() - start:.1f}s, {len(body) / 1024 / 1024:.1f}MiB, "
+                  f"peak RSS +{peak_rss_mb() - before:.1f}MiB")
+    finally:
+        if not args.keep:
+            cleanup(conn)
+        conn.close()
+
+    if growth > args.max_rss_mb:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Concurrent retries of one meal submission with the same Idempotency-Key.
+
+Creates one client (email ending in @bench.invalid), then for each of
+--rounds rounds fires the same POST /api/meal-logs from --threads threads at
+once, all with one fresh key. Every round must create exactly one MealLog
+and every thread must get the same response body; the script exits 1
+otherwise. It also reports latency of:
+
+  - no key:   POST /api/meal-logs without the header
+  - first:    the request that ran the route
+  - replay:   repeats answered from the stored response
+
+Run from the api/ folder:
+
+    python benchmarks/bench_idempotency.py --threads 32 --rounds 20
+"""
+import argparse
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from common import dispatch, percentile
+
+BENCH_EMAIL = 'idempotency@bench.invalid'
+
+
+def seed_client(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Client (Name, DOB, Email, is_archived) VALUES (%s, %s, %s, FALSE)",
+                   ('Bench Idempotency', datetime(1990, 1, 1).date(), BENCH_EMAIL))
+    conn.commit()
+    client_id = cursor.lastrowid
+    cursor.close()
+    return client_id
+
+
+def meal_count(conn, client_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) AS meals FROM MealLog WHERE ClientID = %s", (client_id,))
+    meals = cursor.fetchone()['meals']
+    conn.commit()  # end the read so the next one sees other connections' inserts
+    cursor.close()
+    return meals
+
+
+def cleanup(conn):
+    from backend.clients.counters import rebuild_client_counts
+
+    cursor = conn.cursor()
+    bench_client = "SELECT ID FROM Client WHERE Email = %s"
+    cursor.execute(
+        f"DELETE n FROM Nutrient n JOIN MealLog ml ON ml.ID = n.MealLogID "
+        f"WHERE ml.ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute(f"DELETE FROM MealLog WHERE ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute(f"DELETE FROM DailyNutrientTotals WHERE ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute(f"DELETE FROM DailyMealCounts WHERE ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute("DELETE FROM Client WHERE Email = %s", (BENCH_EMAIL,))
+    rebuild_client_counts(cursor)
+    conn.commit()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    app = create_app()
+    conn = get_db_connection()
+    failures = []
+    try:
+        client_id = seed_client(conn)
+        meal = {
+            'client_id': client_id,
+            'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'notes': 'bench meal',
+            'nutrients': [{'name': 'Protein', 'category': 'Macronutrient', 'quantity': 30, 'unit': 'g'}],
+        }
+
+        plain = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            dispatch(app, '/api/meal-logs', 'POST', meal)
+            plain.append((time.perf_counter() - start) * 1000)
+
+        first, replays = [], []
+        for round_no in range(args.rounds):
+            headers = {'Idempotency-Key': str(uuid.uuid4())}
+            before = meal_count(conn, client_id)
+            barrier = threading.Barrier(args.threads)
+            results = [None] * args.threads
+
+            def submit(slot):
+                barrier.wait()
+                start = time.perf_counter()
+                with app.test_request_context('/api/meal-logs', method='POST', json=meal, headers=headers):
+                    response = app.full_dispatch_request()
+                    replayed = response.headers.get('Idempotent-Replayed') == 'true'
+                    results[slot] = (response.status_code, response.get_data(), replayed,
+                                     (time.perf_counter() - start) * 1000)
+
+            threads = [threading.Thread(target=submit, args=(slot,)) for slot in range(args.threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            created = meal_count(conn, client_id) - before
+            bodies = {(status, body) for status, body, _, _ in results}
+            executed = [r for r in results if not r[2]]
+            if created != 1:
+                failures.append(f"round {round_no}: {created} meals created")
+            if len(bodies) != 1:
+                failures.append(f"round {round_no}: {len(bodies)} different responses {sorted(bodies)[:3]}")
+            if len(executed) != 1:
+                failures.append(f"round {round_no}: route ran for {len(executed)} requests")
+            first.extend(r[3] for r in executed)
+            replays.extend(r[3] for r in results if r[2])
+
+        for name, timings in [('no key', plain), ('first', first), ('replay', replays)]:
+            timings.sort()
+            print(f"{name:8} n={len(timings):5} p50={percentile(timings, 50):7.2f}ms "
+                  f"p95={percentile(timings, 95):7.2f}ms")
+    finally:
+        cleanup(conn)
+        conn.close()
+
+    if failures:
+        print("\n".join(failures))
+        raise SystemExit(1)
+    print(f"OK: {args.rounds} rounds x {args.threads} threads, one meal per key")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare meal ingestion throughput (meals/second) of POST /api/meal-logs
+against POST /api/meal-logs/bulk.
+
+Inserts --meals synthetic meals (notes tagged 'bench-ingest') for an existing
+client through each route, then deletes them. Run from the api/ folder:
+
+    python benchmarks/bench_meal_ingest.py --meals 2000 --client-id 1
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import dispatch
+
+BENCH_NOTES = 'bench-ingest'
+NUTRIENTS = [('Protein', 'Macronutrient', 'g'), ('Carbohydrates', 'Macronutrient', 'g'),
+             ('Fat', 'Macronutrient', 'g'), ('Fiber', 'Macronutrient', 'g'),
+             ('Vitamin C', 'Vitamin', 'mg'), ('Iron', 'Mineral', 'mg')]
+
+
+def make_meals(n, client_id, rng):
+    start = datetime.now() - timedelta(days=7)
+    return [{
+        'client_id': client_id,
+        'notes': BENCH_NOTES,
+        'datetime': (start + timedelta(minutes=rng.randint(0, 7 * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S'),
+        'nutrients': [{'name': name, 'category': category, 'unit': unit,
+                       'quantity': round(rng.uniform(1, 60), 2)} for name, category, unit in NUTRIENTS]
+    } for _ in range(n)]
+
+
+def cleanup():
+    from backend.db import get_db_connection
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE n FROM Nutrient n JOIN MealLog ml ON ml.ID = n.MealLogID WHERE ml.Notes = %s",
+                   (BENCH_NOTES,))
+    cursor.execute("DELETE FROM MealLog WHERE Notes = %s", (BENCH_NOTES,))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meals', type=int, default=2000)
+    parser.add_argument('--client-id', type=int, default=1)
+    parser.add_argument('--chunk', type=int, default=500, help='meals per bulk request')
+    args = parser.parse_args()
+
+    from backend_app import create_app
+    app = create_app()
+    meals = make_meals(args.meals, args.client_id, random.Random(7))
+
+    try:
+        start = time.perf_counter()
+        for meal in meals:
+            status, body = dispatch(app, '/api/meal-logs', method='POST', json=meal)
+            if status != 201:
+                raise SystemExit(f"Single insert failed: {body[:300]}")
+        single = time.perf_counter() - start
+        cleanup()
+
+        start = time.perf_counter()
+        for offset in range(0, len(meals), args.chunk):
+            status, body = dispatch(app, '/api/meal-logs/bulk', method='POST',
+                                    json={'meals': meals[offset:offset + args.chunk]})
+            if status != 201:
+                raise SystemExit(f"Bulk insert failed: {json.loads(body).get('message', body[:300])}")
+        bulk = time.perf_counter() - start
+    finally:
+        cleanup()
+
+    print(f"single route: {args.meals / single:8.0f} meals/s ({single:.2f}s)")
+    print(f"bulk route:   {args.meals / bulk:8.0f} meals/s ({bulk:.2f}s, {args.chunk} meals/request)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Table size and aggregate time of the NutrientType catalog (migration 14)
+against the old layout that stored Name, Category and Unit on every
+Nutrient row.
+
+Copies the current Nutrient rows into a scratch table BenchNutrientStrings
+in the old layout (with its (MealLogID, Name) index), then reports:
+
+  - data + index size of BenchNutrientStrings against Nutrient + NutrientType
+  - p50/p95 of the nutrition dashboard's macro averages, pivoting on
+    n.Name = 'Protein' ... against n.NutrientTypeID IN (...)
+  - p50/p95 of a per-nutrient total over every meal, grouped by
+    (Name, Category, Unit) against grouped by NutrientTypeID
+
+The scratch table is dropped afterwards. Load a realistic volume first
+(benchmarks/generate_data.py), then run from the api/ folder:
+
+    python benchmarks/bench_nutrient_types.py --runs 5
+"""
+import argparse
+import time
+
+from common import percentile
+
+SCRATCH_TABLE = 'BenchNutrientStrings'
+DASHBOARD_MACROS = ['Protein', 'Carbohydrates', 'Fat', 'Fiber']
+
+
+def create_string_copy(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+    cursor.execute(f"""
+        CREATE TABLE {SCRATCH_TABLE} (
+            ID INT PRIMARY KEY,
+            Name VARCHAR(255),
+            Category VARCHAR(255),
+            Quantity DECIMAL(10,2),
+            Unit VARCHAR(50),
+            MealLogID INT,
+            INDEX idx_nutrient_meallog_name (MealLogID, Name)
+        )
+    """)
+    cursor.execute(f"""
+        INSERT INTO {SCRATCH_TABLE} (ID, Name, Category, Quantity, Unit, MealLogID)
+        SELECT n.ID, t.Name, t.Category, n.Quantity, t.Unit, n.MealLogID
+        FROM Nutrient n JOIN NutrientType t ON t.ID = n.NutrientTypeID
+    """)
+    conn.commit()
+    cursor.close()
+
+
+def table_sizes(conn, tables):
+    """{table: (rows, bytes of data + indexes)} from freshly analyzed statistics"""
+    cursor = conn.cursor()
+    for table in tables:
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.execute(f"""
+        SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH AS bytes
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})
+    """, tables)
+    sizes = {row['TABLE_NAME']: (row['TABLE_ROWS'], row['bytes']) for row in cursor.fetchall()}
+    cursor.close()
+    return sizes
+
+
+def time_query(conn, query, params, runs):
+    cursor = conn.cursor()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    cursor.close()
+    return sorted(timings)
+
+
+def aggregate_queries(conn, days):
+    """(name, string-layout query and params, catalog query and params) pairs"""
+    from backend.meals.nutrient_catalog import nutrient_catalog
+
+    cursor = conn.cursor()
+    macro_ids = nutrient_catalog.ids_named(cursor, DASHBOARD_MACROS)
+    cursor.close()
+
+    string_pivots = ', '.join(f"AVG(CASE WHEN n.Name = %s THEN n.Quantity ELSE NULL END)"
+                              for _ in DASHBOARD_MACROS)
+    id_pivots, id_params = [], []
+    for name in DASHBOARD_MACROS:
+        type_ids = macro_ids[name] or [0]
+        id_pivots.append(f"AVG(CASE WHEN n.NutrientTypeID IN ({', '.join(['%s'] * len(type_ids))}) "
+                         f"THEN n.CanonicalQuantity ELSE NULL END)")
+        id_params.extend(type_ids)
+    dashboard = """
+        SELECT ml.ClientID, {pivots}, COUNT(DISTINCT ml.ID) AS total_meals
+        FROM MealLog ml JOIN {table} n ON ml.ID = n.MealLogID
+        WHERE ml.Datetime >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        GROUP BY ml.ClientID
+    """
+    return [
+        ('dashboard',
+         (dashboard.format(pivots=string_pivots, table=SCRATCH_TABLE), DASHBOARD_MACROS + [days]),
+         (dashboard.format(pivots=', '.join(id_pivots), table='Nutrient'), id_params + [days])),
+        ('per-nutrient',
+         (f"SELECT Name, Category, Unit, SUM(Quantity) AS total FROM {SCRATCH_TABLE} "
+          f"GROUP BY Name, Category, Unit", ()),
+         ("SELECT t.Name, t.Category, t.CanonicalUnit, per_type.total FROM ("
+          "SELECT NutrientTypeID, SUM(CanonicalQuantity) AS total FROM Nutrient GROUP BY NutrientTypeID"
+          ") AS per_type JOIN NutrientType t ON t.ID = per_type.NutrientTypeID", ())),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--days', type=int, default=30, help='dashboard window')
+    args = parser.parse_args()
+
+    from backend.db import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        create_string_copy(conn)
+        sizes = table_sizes(conn, [SCRATCH_TABLE, 'Nutrient', 'NutrientType'])
+        rows, before = sizes[SCRATCH_TABLE]
+        after = sizes['Nutrient'][1] + sizes['NutrientType'][1]
+        print(f"{'size':13} strings {before / 2 ** 20:9.1f} MiB  catalog {after / 2 ** 20:9.1f} MiB "
+              f"({sizes['NutrientType'][0]} types, ~{rows:,} nutrient rows, {after / max(before, 1):.0%})")
+
+        for name, (string_query, string_params), (id_query, id_params) in aggregate_queries(conn, args.days):
+            strings = time_query(conn, string_query, string_params, args.runs)
+            ids = time_query(conn, id_query, id_params, args.runs)
+            print(f"{name:13} strings p50={percentile(strings, 50):8.1f}ms p95={percentile(strings, 95):8.1f}ms  "
+                  f"catalog p50={percentile(ids, 50):8.1f}ms p95={percentile(ids, 95):8.1f}ms")
+    finally:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
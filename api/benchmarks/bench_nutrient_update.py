@@ -0,0 +1,165 @@
+"""
+Cost of correcting one nutrient on meals that carry many micronutrients:
+the previous delete-all-and-reinsert update against the diff-based PUT and
+PATCH /api/meal-logs/<id>.
+
+Seeds one client (email ending in @bench.invalid) with --meals meals of 4
+macronutrients plus --micronutrients micronutrients each, then for every
+meal changes a single quantity and reports per update the latency, SQL
+statements and Nutrient IDs consumed (auto-increment churn):
+
+  - delete+insert: DELETE all of the meal's nutrients, INSERT them again
+  - put diff:      PUT with the full nutrient list, one quantity changed
+  - patch:         PATCH with only the changed nutrient
+
+Run from the api/ folder:
+
+    python benchmarks/bench_nutrient_update.py --meals 200 --micronutrients 40
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import dispatch, percentile
+
+BENCH_EMAIL = 'nutrient-update@bench.invalid'
+
+MACROS = ['Protein', 'Carbohydrates', 'Fat', 'Fiber']
+
+
+def meal_nutrients(n_micro, rng):
+    nutrients = [{'name': name, 'category': 'Macronutrient', 'quantity': round(rng.uniform(5, 80), 2), 'unit': 'g'}
+                 for name in MACROS]
+    nutrients += [{'name': f'Micronutrient {i:02d}', 'category': 'Vitamin' if i % 2 else 'Mineral',
+                   'quantity': round(rng.uniform(0.1, 50), 2), 'unit': 'mg' if i % 3 else 'mcg'}
+                  for i in range(n_micro)]
+    return nutrients
+
+
+def seed(conn, n_meals, n_micro, rng):
+    """Insert the bench client and its meals; returns {meal_id: nutrients}"""
+    from backend.meals.nutrient_catalog import insert_nutrients, nutrient_catalog
+
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Client (Name, DOB, Email, is_archived) VALUES (%s, %s, %s, FALSE)",
+                   ('Bench Nutrient Update', datetime(1990, 1, 1).date(), BENCH_EMAIL))
+    client_id = cursor.lastrowid
+    meals = {}
+    start = datetime.now() - timedelta(days=n_meals)
+    for i in range(n_meals):
+        cursor.execute("INSERT INTO MealLog (Datetime, Notes, ClientID) VALUES (%s, %s, %s)",
+                       (start + timedelta(days=i), 'bench meal', client_id))
+        meal_id = cursor.lastrowid
+        meals[meal_id] = meal_nutrients(n_micro, rng)
+        rows = [(n['name'], n['category'], n['quantity'], n['unit'], meal_id) for n in meals[meal_id]]
+        nutrient_catalog.resolve(rows)
+        insert_nutrients(cursor, rows)
+    conn.commit()
+    cursor.close()
+    return meals
+
+
+def cleanup(conn):
+    cursor = conn.cursor()
+    bench_client = "SELECT ID FROM Client WHERE Email = %s"
+    cursor.execute(
+        f"DELETE n FROM Nutrient n JOIN MealLog ml ON ml.ID = n.MealLogID "
+        f"WHERE ml.ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute(f"DELETE FROM MealLog WHERE ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute(f"DELETE FROM DailyNutrientTotals WHERE ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute(f"DELETE FROM DailyMealCounts WHERE ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute("DELETE FROM Client WHERE Email = %s", (BENCH_EMAIL,))
+    conn.commit()
+    cursor.close()
+
+
+def max_nutrient_id(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(ID), 0) AS max_id FROM Nutrient")
+    max_id = cursor.fetchone()['max_id']
+    conn.commit()  # end the read so the next one sees other connections' inserts
+    cursor.close()
+    return max_id
+
+
+def delete_and_reinsert(conn, meal_id, nutrients):
+    """The update path as it was: drop every nutrient, insert the list again"""
+    from backend.meals.nutrient_catalog import insert_nutrients
+
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Nutrient WHERE MealLogID = %s", (meal_id,))
+    insert_nutrients(cursor, [(n['name'], n['category'], n['quantity'], n['unit'], meal_id) for n in nutrients])
+    conn.commit()
+    cursor.close()
+    return 2
+
+
+def statements_for(method, rule='/api/meal-logs/<int:meal_id>'):
+    from backend.metrics import registry
+    values = registry.snapshot().get((rule, method))
+    return values[4] if values else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--meals', type=int, default=200)
+    parser.add_argument('--micronutrients', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    rng = random.Random(args.seed)
+    app = create_app()
+    conn = get_db_connection()
+    try:
+        print(f"Seeding {args.meals} meals with {4 + args.micronutrients} nutrients each...")
+        meals = seed(conn, args.meals, args.micronutrients, rng)
+
+        def one_change(nutrients):
+            changed = [dict(n) for n in nutrients]
+            target = rng.randrange(len(changed))
+            changed[target]['quantity'] = round(changed[target]['quantity'] + 1.25, 2)
+            return changed, changed[target]
+
+        def run_put(meal_id, nutrients, changed):
+            before = statements_for('PUT')
+            status, body = dispatch(app, f'/api/meal-logs/{meal_id}', 'PUT', {'nutrients': nutrients})
+            if status != 200:
+                raise SystemExit(f"PUT failed: {body[:500]}")
+            return statements_for('PUT') - before
+
+        def run_patch(meal_id, nutrients, changed):
+            before = statements_for('PATCH')
+            status, body = dispatch(app, f'/api/meal-logs/{meal_id}', 'PATCH', {'nutrients': [changed]})
+            if status != 200:
+                raise SystemExit(f"PATCH failed: {body[:500]}")
+            return statements_for('PATCH') - before
+
+        cases = [
+            ('delete+insert', lambda meal_id, nutrients, changed: delete_and_reinsert(conn, meal_id, nutrients)),
+            ('put diff', run_put),
+            ('patch', run_patch),
+        ]
+        for name, run in cases:
+            timings, statements = [], []
+            first_id = max_nutrient_id(conn)
+            for meal_id, nutrients in meals.items():
+                nutrients, changed = one_change(nutrients)
+                meals[meal_id] = nutrients
+                start = time.perf_counter()
+                statements.append(run(meal_id, nutrients, changed))
+                timings.append((time.perf_counter() - start) * 1000)
+            ids_used = max_nutrient_id(conn) - first_id
+            timings.sort()
+            print(f"{name:14} p50={percentile(timings, 50):7.2f}ms p95={percentile(timings, 95):7.2f}ms "
+                  f"statements/update={max(statements):3} nutrient IDs used/update={ids_used / len(meals):6.1f}")
+    finally:
+        cleanup(conn)
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
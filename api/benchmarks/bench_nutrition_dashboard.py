@@ -0,0 +1,110 @@
+"""
+Time GET /api/clients/nutrition-dashboard over a synthetic client base.
+
+Seeds --clients synthetic clients (emails ending in @bench.invalid), each with
+a nutrition plan and a few recent meals, times the endpoint and removes the
+synthetic rows again. Run from the api/ folder against a live database:
+
+    python benchmarks/bench_nutrition_dashboard.py --clients 10000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from common import dispatch, percentile
+
+BENCH_EMAIL_SUFFIX = '@bench.invalid'
+
+
+def seed(conn, n_clients, meals_per_client, rng):
+    from backend.meals.nutrient_catalog import insert_nutrients, nutrient_catalog
+
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO Client (Name, DOB, Email, is_archived) VALUES (%s, %s, %s, FALSE)",
+        [(f"Bench Client {i}", datetime(1970 + i % 40, 1 + i % 12, 1).date(),
+          f"client{i}{BENCH_EMAIL_SUFFIX}") for i in range(n_clients)]
+    )
+    cursor.execute("SELECT ID FROM Client WHERE Email LIKE %s", (f"%{BENCH_EMAIL_SUFFIX}",))
+    client_ids = [row['ID'] for row in cursor.fetchall()]
+
+    today = datetime.now().date()
+    cursor.executemany(
+        "INSERT INTO NutritionPlan (StartDate, EndDate, CaloriesGoal, ClientID) VALUES (%s, %s, %s, %s)",
+        [(today - timedelta(days=60), today + timedelta(days=30), rng.choice([1800, 2200, 2600]), cid)
+         for cid in client_ids]
+    )
+
+    now = datetime.now()
+    cursor.executemany(
+        "INSERT INTO MealLog (Datetime, Notes, ClientID) VALUES (%s, %s, %s)",
+        [(now - timedelta(hours=rng.randint(1, 24 * 30)), 'bench meal', cid)
+         for cid in client_ids for _ in range(meals_per_client)]
+    )
+    cursor.execute(
+        "SELECT ml.ID FROM MealLog ml JOIN Client c ON c.ID = ml.ClientID WHERE c.Email LIKE %s",
+        (f"%{BENCH_EMAIL_SUFFIX}",)
+    )
+    meal_ids = [row['ID'] for row in cursor.fetchall()]
+    rows = [(name, 'Macronutrient', round(rng.uniform(5, 80), 2), 'g', mid)
+            for mid in meal_ids for name in ('Protein', 'Carbohydrates', 'Fat', 'Fiber')]
+    nutrient_catalog.resolve(rows)
+    insert_nutrients(cursor, rows)
+    conn.commit()
+    cursor.close()
+
+
+def cleanup(conn):
+    cursor = conn.cursor()
+    bench_clients = "SELECT ID FROM Client WHERE Email LIKE %s"
+    pattern = (f"%{BENCH_EMAIL_SUFFIX}",)
+    cursor.execute(
+        f"DELETE n FROM Nutrient n JOIN MealLog ml ON ml.ID = n.MealLogID "
+        f"WHERE ml.ClientID IN ({bench_clients})", pattern)
+    cursor.execute(f"DELETE FROM MealLog WHERE ClientID IN ({bench_clients})", pattern)
+    cursor.execute(f"DELETE FROM NutritionPlan WHERE ClientID IN ({bench_clients})", pattern)
+    cursor.execute("DELETE FROM Client WHERE Email LIKE %s", pattern)
+    conn.commit()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--meals-per-client', type=int, default=5)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic rows afterwards')
+    args = parser.parse_args()
+
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        print(f"Seeding {args.clients} clients...")
+        seed(conn, args.clients, args.meals_per_client, random.Random(args.seed))
+
+        app = create_app()
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            status, body = dispatch(app, '/api/clients/nutrition-dashboard?days=30')
+            timings.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                raise SystemExit(f"Request failed: {body[:500]}")
+
+        timings.sort()
+        print(f"nutrition-dashboard over {args.clients} clients: "
+              f"mean={statistics.mean(timings):.1f}ms p50={percentile(timings, 50):.1f}ms "
+              f"max={timings[-1]:.1f}ms response={len(body) / 1024:.0f}KiB")
+    finally:
+        if not args.keep:
+            cleanup(conn)
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
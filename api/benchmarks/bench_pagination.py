@@ -0,0 +1,132 @@
+"""
+Compare the full GET /api/meal-logs response against keyset pages for one
+large client, reporting latency, response size and peak Python memory.
+
+Seeds one synthetic client (email ending in @bench.invalid) with --meals meal
+logs of four nutrients each, then measures:
+
+  - full:      the unpaginated list, as returned before pagination existed
+  - page:      the first page (limit=--limit)
+  - deep page: a page taken from the middle of the history via its cursor
+  - projected: the first page with fields=id,datetime (no nutrient query)
+
+and removes the synthetic rows again. Run from the api/ folder:
+
+    python benchmarks/bench_pagination.py --meals 100000 --limit 100
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from common import dispatch, percentile
+
+BENCH_EMAIL = 'pagination@bench.invalid'
+
+
+def seed(conn, n_meals, rng):
+    from backend.meals.nutrient_catalog import insert_nutrients, nutrient_catalog
+
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Client (Name, DOB, Email, is_archived) VALUES (%s, %s, %s, FALSE)",
+                   ('Bench Pagination', datetime(1990, 1, 1).date(), BENCH_EMAIL))
+    client_id = cursor.lastrowid
+
+    start = datetime.now() - timedelta(days=3 * 365)
+    for offset in range(0, n_meals, 5000):
+        batch = min(5000, n_meals - offset)
+        cursor.executemany(
+            "INSERT INTO MealLog (Datetime, Notes, ClientID) VALUES (%s, %s, %s)",
+            [(start + timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)), 'bench meal', client_id)
+             for _ in range(batch)]
+        )
+        first_id = cursor.lastrowid
+        rows = [(name, 'Macronutrient', round(rng.uniform(5, 80), 2), 'g', meal_id)
+                for meal_id in range(first_id, first_id + batch)
+                for name in ('Protein', 'Carbohydrates', 'Fat', 'Fiber')]
+        nutrient_catalog.resolve(rows)
+        insert_nutrients(cursor, rows)
+        conn.commit()
+    cursor.close()
+    return client_id
+
+
+def cleanup(conn):
+    cursor = conn.cursor()
+    bench_client = "SELECT ID FROM Client WHERE Email = %s"
+    cursor.execute(
+        f"DELETE n FROM Nutrient n JOIN MealLog ml ON ml.ID = n.MealLogID "
+        f"WHERE ml.ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute(f"DELETE FROM MealLog WHERE ClientID IN ({bench_client})", (BENCH_EMAIL,))
+    cursor.execute("DELETE FROM Client WHERE Email = %s", (BENCH_EMAIL,))
+    conn.commit()
+    cursor.close()
+
+
+def measure(app, path, runs):
+    """Return (timings in ms, peak traced memory in bytes, response size in bytes)"""
+    timings = []
+    peak = 0
+    for _ in range(runs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        status, body = dispatch(app, path)
+        timings.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if status != 200:
+            raise SystemExit(f"{path} failed: {body[:500]}")
+    return sorted(timings), peak, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meals', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic rows afterwards')
+    args = parser.parse_args()
+
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        print(f"Seeding one client with {args.meals} meals...")
+        client_id = seed(conn, args.meals, random.Random(args.seed))
+
+        app = create_app()
+        base = f'/api/meal-logs?client_id={client_id}'
+
+        # Walk to a page in the middle of the history to get a deep cursor
+        depth = args.meals // 2
+        cursor_path = f'{base}&limit={min(depth, 1000)}&fields=id,datetime'
+        status, body = dispatch(app, cursor_path)
+        next_cursor = json.loads(body)['next_cursor']
+        for _ in range(depth // 1000 - 1):
+            status, body = dispatch(app, f'{cursor_path}&cursor={next_cursor}')
+            next_cursor = json.loads(body)['next_cursor']
+
+        cases = [
+            ('full', base),
+            ('page', f'{base}&limit={args.limit}'),
+            ('deep page', f'{base}&limit={args.limit}&cursor={next_cursor}'),
+            ('projected', f'{base}&limit={args.limit}&fields=id,datetime'),
+        ]
+        for name, path in cases:
+            runs = 1 if name == 'full' else args.runs
+            timings, peak, size = measure(app, path, runs)
+            print(f"{name:10} mean={statistics.mean(timings):8.1f}ms p50={percentile(timings, 50):8.1f}ms "
+                  f"peak_mem={peak / 1024 / 1024:7.1f}MiB response={size / 1024:8.0f}KiB")
+    finally:
+        if not args.keep:
+            cleanup(conn)
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Microbenchmark of response serialization per 10k rows, without a database.
+
+Builds synthetic DictCursor-style rows for clients and meal logs with
+nutrients and compares:
+
+  - manual:        the old per-row dict copying with strftime/float and
+                   Flask's default encoder
+  - mapper+stdlib: RowMapper output through APIJSONEncoder on the json module
+  - mapper+orjson: RowMapper output through APIJSONEncoder on orjson
+
+Run from the api/ folder:
+
+    python benchmarks/bench_serialization.py --rows 10000 --runs 5
+"""
+import argparse
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import common  # noqa: F401  (puts the api/ folder on sys.path)
+
+
+def make_rows(n):
+    start = datetime(2024, 1, 1, 7, 30)
+    clients = [{'ID': i, 'Name': f'Client {i}', 'DOB': date(1970 + i % 40, 1 + i % 12, 1 + i % 28),
+                'Email': f'client{i}@example.com', 'is_archived': i % 10 == 0} for i in range(n)]
+    meals = [{'ID': i, 'Datetime': start + timedelta(minutes=37 * i), 'Notes': 'Lunch', 'ClientID': 1 + i % 50}
+             for i in range(n)]
+    nutrients = [[{'ID': i * 4 + j, 'Name': name, 'Category': 'Macronutrient',
+                   'Quantity': Decimal(f'{10 + (i * 7 + j) % 90}.25'), 'Unit': 'g', 'MealLogID': i}
+                  for j, name in enumerate(('Protein', 'Carbohydrates', 'Fat', 'Fiber'))] for i in range(n)]
+    return clients, meals, nutrients
+
+
+def manual_clients(clients):
+    return [{
+        'id': client['ID'],
+        'name': client['Name'],
+        'dob': client['DOB'].strftime('%Y-%m-%d') if client['DOB'] else None,
+        'email': client['Email'],
+        'is_archived': bool(client['is_archived'])
+    } for client in clients]
+
+
+def manual_meals(meals, nutrients):
+    return [{
+        'id': meal['ID'],
+        'datetime': meal['Datetime'].strftime('%Y-%m-%d %H:%M:%S'),
+        'notes': meal['Notes'],
+        'client_id': meal['ClientID'],
+        'nutrients': [{
+            'id': n['ID'],
+            'name': n['Name'],
+            'category': n['Category'],
+            'quantity': float(n['Quantity']),
+            'unit': n['Unit']
+        } for n in meal_nutrients]
+    } for meal, meal_nutrients in zip(meals, nutrients)]
+
+
+def mapped_clients(clients):
+    from backend.serialization import CLIENT
+    return CLIENT.many(clients)
+
+
+def mapped_meals(meals, nutrients):
+    from backend.serialization import MEAL_LOG, NUTRIENT
+    result = MEAL_LOG.many(meals)
+    for item, meal_nutrients in zip(result, nutrients):
+        item['nutrients'] = NUTRIENT.many(meal_nutrients)
+    return result
+
+
+def time_case(app, encoder, build, runs):
+    """Return (build ms, encode ms) medians for one way of producing the response"""
+    from flask import jsonify
+    app.json_encoder = encoder
+    build_times, encode_times = [], []
+    with app.app_context():
+        for _ in range(runs):
+            start = time.perf_counter()
+            data = build()
+            built = time.perf_counter()
+            jsonify(data).get_data()
+            build_times.append((built - start) * 1000)
+            encode_times.append((time.perf_counter() - built) * 1000)
+    return statistics.median(build_times), statistics.median(encode_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    from flask import Flask
+    from flask.json import JSONEncoder
+    from backend import serialization
+    from backend.serialization import APIJSONEncoder
+
+    class StdlibAPIJSONEncoder(APIJSONEncoder):
+        def encode(self, o):
+            return JSONEncoder.encode(self, o)
+
+    app = Flask(__name__)
+    clients, meals, nutrients = make_rows(args.rows)
+    resources = [
+        ('clients', lambda: manual_clients(clients), lambda: mapped_clients(clients)),
+        ('meal-logs', lambda: manual_meals(meals, nutrients), lambda: mapped_meals(meals, nutrients)),
+    ]
+
+    print(f"{args.rows} rows, median of {args.runs} runs")
+    for resource, manual, mapped in resources:
+        cases = [('manual', JSONEncoder, manual), ('mapper+stdlib', StdlibAPIJSONEncoder, mapped)]
+        if serialization.orjson is not None:
+            cases.append(('mapper+orjson', APIJSONEncoder, mapped))
+        for name, encoder, build in cases:
+            build_ms, encode_ms = time_case(app, encoder, build, args.runs)
+            print(f"{resource:10} {name:14} build={build_ms:7.1f}ms encode={encode_ms:7.1f}ms "
+                  f"total={build_ms + encode_ms:7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
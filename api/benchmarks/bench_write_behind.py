@@ -0,0 +1,244 @@
+"""
+Meal-time burst of POST /api/meal-logs: direct inserts against the
+write-behind queue (MEAL_WRITE_BEHIND), plus a crash-recovery check.
+
+Creates --clients clients (emails ending in @write-behind.bench.invalid),
+then for each mode fires --threads threads that each submit
+--meals-per-thread meals as fast as they can, while one reader thread keeps
+requesting a daily summary. Per mode it reports:
+
+  - ack latency p50/p95/p99 and acknowledged meals per second
+  - reader latency p50/p95 during the burst
+  - for write-behind: time until the journal was drained into MySQL, and
+    drained meals per second
+
+Every submitted meal must end up as exactly one MealLog row.
+
+The recovery check simulates a drainer that died after committing a batch
+to MySQL but before marking it in the journal, and a second one that died
+holding claimed entries, then replays the journal with a fresh queue and
+verifies no meal is lost or inserted twice. The script exits 1 on any
+mismatch.
+
+Run from the api/ folder:
+
+    python benchmarks/bench_write_behind.py --threads 64 --meals-per-thread 20
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from common import dispatch, percentile
+
+BENCH_DOMAIN = 'write-behind.bench.invalid'
+
+
+def seed_clients(conn, count):
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO Client (Name, DOB, Email, is_archived) VALUES (%s, %s, %s, FALSE)",
+        [(f'Bench Write Behind {i}', datetime(1990, 1, 1).date(), f'client{i}@{BENCH_DOMAIN}')
+         for i in range(count)])
+    cursor.execute("SELECT ID FROM Client WHERE Email LIKE %s ORDER BY ID", (f'%@{BENCH_DOMAIN}',))
+    client_ids = [row['ID'] for row in cursor.fetchall()]
+    conn.commit()
+    cursor.close()
+    return client_ids
+
+
+def meal_count(conn, client_ids):
+    cursor = conn.cursor()
+    placeholders = ', '.join(['%s'] * len(client_ids))
+    cursor.execute(f"SELECT COUNT(*) AS meals FROM MealLog WHERE ClientID IN ({placeholders})", client_ids)
+    meals = cursor.fetchone()['meals']
+    conn.commit()  # end the read so the next one sees other connections' inserts
+    cursor.close()
+    return meals
+
+
+def cleanup(conn):
+    from backend.clients.counters import rebuild_client_counts
+
+    cursor = conn.cursor()
+    bench_clients = "SELECT ID FROM Client WHERE Email LIKE %s"
+    pattern = (f'%@{BENCH_DOMAIN}',)
+    cursor.execute(
+        f"DELETE r FROM MealLogQueueReceipt r JOIN MealLog ml ON ml.ID = r.MealLogID "
+        f"WHERE ml.ClientID IN ({bench_clients})", pattern)
+    cursor.execute(
+        f"DELETE n FROM Nutrient n JOIN MealLog ml ON ml.ID = n.MealLogID "
+        f"WHERE ml.ClientID IN ({bench_clients})", pattern)
+    cursor.execute(f"DELETE FROM MealLog WHERE ClientID IN ({bench_clients})", pattern)
+    cursor.execute(f"DELETE FROM DailyNutrientTotals WHERE ClientID IN ({bench_clients})", pattern)
+    cursor.execute(f"DELETE FROM DailyMealCounts WHERE ClientID IN ({bench_clients})", pattern)
+    cursor.execute("DELETE FROM Client WHERE Email LIKE %s", pattern)
+    rebuild_client_counts(cursor)
+    conn.commit()
+    cursor.close()
+
+
+def meal_body(client_id, n):
+    return {
+        'client_id': client_id,
+        'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'notes': f'burst meal {n}',
+        'nutrients': [
+            {'name': 'Protein', 'category': 'Macronutrient', 'quantity': 25 + n % 10, 'unit': 'g'},
+            {'name': 'Carbohydrates', 'category': 'Macronutrient', 'quantity': 60, 'unit': 'g'},
+            {'name': 'Fat', 'category': 'Macronutrient', 'quantity': 15, 'unit': 'g'},
+        ],
+    }
+
+
+def burst(app, client_ids, threads, meals_per_thread, expected_status):
+    """Fire the burst with a concurrent reader; returns (ack timings, reader timings, seconds, provisional ids)"""
+    barrier = threading.Barrier(threads + 1)
+    acks, provisional_ids, errors = [], [], []
+    lock = threading.Lock()
+    done = threading.Event()
+    reader = []
+    today = datetime.now().date()
+
+    def submit(worker):
+        timings, ids = [], []
+        barrier.wait()
+        for n in range(meals_per_thread):
+            body = meal_body(client_ids[(worker * meals_per_thread + n) % len(client_ids)], n)
+            start = time.perf_counter()
+            status, response = dispatch(app, '/api/meal-logs', 'POST', body)
+            timings.append((time.perf_counter() - start) * 1000)
+            if status != expected_status:
+                errors.append(f"{status}: {response[:200]}")
+            elif status == 202:
+                ids.append(json.loads(response)['provisional_id'])
+        with lock:
+            acks.extend(timings)
+            provisional_ids.extend(ids)
+
+    def read():
+        barrier.wait()
+        while not done.is_set():
+            start = time.perf_counter()
+            dispatch(app, f'/api/meal-logs/daily-summary?client_id={client_ids[0]}&date={today}')
+            reader.append((time.perf_counter() - start) * 1000)
+
+    workers = [threading.Thread(target=submit, args=(i,)) for i in range(threads)]
+    reader_thread = threading.Thread(target=read)
+    for thread in workers + [reader_thread]:
+        thread.start()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    seconds = time.perf_counter() - start
+    done.set()
+    reader_thread.join()
+    if errors:
+        raise SystemExit(f"{len(errors)} unexpected responses, first: {errors[0]}")
+    return sorted(acks), sorted(reader), seconds, provisional_ids
+
+
+def report(name, acks, reader, seconds):
+    print(f"{name:13} ack p50={percentile(acks, 50):7.2f}ms p95={percentile(acks, 95):7.2f}ms "
+          f"p99={percentile(acks, 99):7.2f}ms  {len(acks) / seconds:8.0f} meals/s acknowledged  "
+          f"reader p50={percentile(reader, 50):6.2f}ms p95={percentile(reader, 95):6.2f}ms")
+
+
+def recovery_check(conn, client_ids, journal_path, batch_size):
+    """Replay a journal left behind by two crashed drainers"""
+    from backend.meals.write_behind import MealQueue
+
+    class CrashedQueue(MealQueue):
+        def start(self):
+            pass  # no drainer thread; this queue is driven by hand
+
+    crashed = CrashedQueue(journal_path, enabled=True, batch_size=batch_size, claim_timeout=0.5)
+    before = meal_count(conn, client_ids)
+    total = batch_size * 3
+    for n in range(total):
+        crashed.enqueue({'client_id': client_ids[n % len(client_ids)], 'notes': f'recovery meal {n}',
+                         'datetime': datetime.now(), 'nutrients': meal_body(0, n)['nutrients']})
+
+    # Drainer 1 commits a batch to MySQL, then dies before updating the journal
+    def crash(*args):
+        raise RuntimeError("simulated crash")
+    crashed._finish = crash
+    try:
+        crashed.drain_once()
+    except RuntimeError:
+        pass
+    # Drainer 2 dies right after claiming a batch
+    crashed._claim()
+
+    time.sleep(crashed.claim_timeout)
+    replay = MealQueue(journal_path, enabled=True, batch_size=batch_size, claim_timeout=0.5)
+    replay.drain()
+
+    created = meal_count(conn, client_ids) - before
+    statuses = [replay.status(entry_id) for entry_id in range(1, total + 1)]
+    meal_ids = [status['id'] for status in statuses if status and status['status'] == 'created']
+    print(f"recovery      {total} journaled, {created} meals created, "
+          f"{len(set(meal_ids))} distinct ids, {replay.stats()['pending']} pending")
+    if created != total or len(set(meal_ids)) != total:
+        raise SystemExit("recovery check failed: meals lost or inserted twice")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--meals-per-thread', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+    from backend_app import create_app
+    from backend.db import get_db_connection
+    from backend.meals.write_behind import meal_queue
+
+    journal_dir = tempfile.mkdtemp(prefix='meal-queue-bench-')
+    meal_queue.path = os.path.join(journal_dir, 'burst.sqlite3')
+    meal_queue.batch_size = args.batch_size
+
+    app = create_app()
+    conn = get_db_connection()
+    try:
+        client_ids = seed_clients(conn, args.clients)
+        submitted = args.threads * args.meals_per_thread
+        print(f"{args.threads} threads x {args.meals_per_thread} meals = {submitted} meals per burst")
+
+        meal_queue.enabled = False
+        before = meal_count(conn, client_ids)
+        acks, reader, seconds, _ = burst(app, client_ids, args.threads, args.meals_per_thread, 201)
+        report('direct', acks, reader, seconds)
+        if meal_count(conn, client_ids) - before != submitted:
+            raise SystemExit("direct burst: MealLog count does not match the submitted meals")
+
+        meal_queue.enabled = True
+        before = meal_count(conn, client_ids)
+        acks, reader, seconds, provisional_ids = burst(app, client_ids, args.threads, args.meals_per_thread, 202)
+        report('write-behind', acks, reader, seconds)
+
+        start = time.perf_counter()
+        while meal_queue.stats()['pending']:
+            time.sleep(0.01)
+        drained = time.perf_counter() - start + seconds
+        created = meal_count(conn, client_ids) - before
+        statuses = {meal_queue.status(entry_id)['status'] for entry_id in provisional_ids}
+        print(f"{'':13} drained {created} meals {drained * 1000:8.0f}ms after the burst started "
+              f"({created / drained:.0f} meals/s), entry statuses: {sorted(statuses)}")
+        if created != submitted or statuses != {'created'}:
+            raise SystemExit("write-behind burst: not every queued meal was created exactly once")
+
+        meal_queue.enabled = False
+        recovery_check(conn, client_ids, os.path.join(journal_dir, 'recovery.sqlite3'), min(args.batch_size, 100))
+    finally:
+        cleanup(conn)
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def dispatch(app, path, method='GET', json=None, headers=None):
+    """
+    Run one request through the full Flask stack without a network hop.
+    (flask 2.0's test_client is not compatible with the pinned werkzeug,
+    so we dispatch inside a request context instead.)
+    """
+    with app.test_request_context(path, method=method, json=json, headers=headers):
+        response = app.full_dispatch_request()
+        return response.status_code, response.get_data()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
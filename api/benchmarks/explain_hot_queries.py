@@ -0,0 +1,126 @@
+"""
+Run EXPLAIN on the hot read queries and fail if any of them falls back to a
+full table scan on the large tables.
+
+Run from the api/ folder against a live database (exit code 1 on failure):
+
+    python benchmarks/explain_hot_queries.py
+"""
+import sys
+
+import common  # noqa: F401  (puts the api/ folder on sys.path)
+
+# Tables that grow with usage; a full scan on these is a regression
+LARGE_TABLES = {'Client', 'MealLog', 'Nutrient', 'DailyNutrientTotals', 'DailyMealCounts', 'SystemPerformance'}
+
+HOT_QUERIES = [
+    (
+        'meal-logs by date range',
+        "SELECT * FROM MealLog WHERE ClientID = %s AND Datetime >= %s AND Datetime < %s "
+        "ORDER BY Datetime DESC",
+        (1, '2024-01-01', '2024-04-01'),
+    ),
+    (
+        'meal-logs keyset page',
+        "SELECT ID, Datetime, Notes, ClientID FROM MealLog WHERE ClientID = %s "
+        "AND (Datetime < %s OR (Datetime = %s AND ID < %s)) ORDER BY Datetime DESC, ID DESC LIMIT %s",
+        (1, '2024-03-01 12:00:00', '2024-03-01 12:00:00', 500, 101),
+    ),
+    (
+        'meal-logs nutrients batch',
+        "SELECT n.ID, t.Name, t.Category, n.Quantity, t.Unit, n.MealLogID FROM Nutrient n "
+        "JOIN NutrientType t ON t.ID = n.NutrientTypeID "
+        "WHERE n.MealLogID IN (%s, %s, %s) ORDER BY n.MealLogID, n.ID",
+        (1, 2, 3),
+    ),
+    (
+        'daily-summary rollup',
+        "SELECT c.Meals, d.Category, d.Name, d.Total as total, d.Unit FROM DailyMealCounts c "
+        "LEFT JOIN DailyNutrientTotals d ON d.ClientID = c.ClientID AND d.Day = c.Day "
+        "WHERE c.ClientID = %s AND c.Day = %s ORDER BY d.Category, d.Name",
+        (1, '2024-01-01'),
+    ),
+    (
+        'daily-summary range rollup',
+        "SELECT c.Day, c.Meals, d.Category, d.Name, d.Total as total, d.Unit FROM DailyMealCounts c "
+        "LEFT JOIN DailyNutrientTotals d ON d.ClientID = c.ClientID AND d.Day = c.Day "
+        "WHERE c.ClientID = %s AND c.Day >= %s AND c.Day <= %s ORDER BY c.Day, d.Category, d.Name",
+        (1, '2024-01-01', '2024-01-31'),
+    ),
+    (
+        'trend-analysis nutrients',
+        "SELECT DATE(ml.Datetime) as day, n.NutrientTypeID, SUM(n.CanonicalQuantity) as Quantity, "
+        "COUNT(*) as logged FROM MealLog ml "
+        "JOIN Nutrient n ON n.MealLogID = ml.ID "
+        "WHERE ml.ClientID = %s AND ml.Datetime >= %s AND ml.Datetime < %s AND n.NutrientTypeID IN (%s, %s) "
+        "GROUP BY DATE(ml.Datetime), n.NutrientTypeID",
+        (1, '2024-01-01', '2024-04-01', 1, 3),
+    ),
+    (
+        'clients name substring',
+        "SELECT ID, Name, DOB, Email, is_archived FROM Client "
+        "WHERE (MATCH(Name, Email) AGAINST (%s IN BOOLEAN MODE) AND Name LIKE %s) AND is_archived = FALSE "
+        "ORDER BY ID",
+        ('"ann"', '%ann%'),
+    ),
+    (
+        'clients search prefix',
+        "SELECT ID FROM Client WHERE (Name LIKE %s OR Email LIKE %s) AND is_archived = FALSE",
+        ('ann%', 'ann%'),
+    ),
+    (
+        'clients age range',
+        "SELECT ID, Name, DOB, Email, is_archived, TIMESTAMPDIFF(YEAR, DOB, CURDATE()) AS age FROM Client "
+        "WHERE DOB <= CURDATE() - INTERVAL %s YEAR AND DOB > CURDATE() - INTERVAL %s YEAR "
+        "AND is_archived = FALSE ORDER BY ID LIMIT %s",
+        (30, 33, 101),
+    ),
+    (
+        'clients stats trend',
+        "SELECT DATE(Timestamp) as date, Existing_Clients as existing_clients, New_Clients as new_clients "
+        "FROM SystemPerformance WHERE Timestamp >= %s AND Timestamp < %s ORDER BY Timestamp",
+        ('2024-03-01', '2024-04-01'),
+    ),
+    (
+        'clients search fuzzy',
+        "SELECT ID FROM Client WHERE MATCH(Name, Email) AGAINST (%s IN NATURAL LANGUAGE MODE) LIMIT 100",
+        ('jonh',),
+    ),
+]
+
+
+def check(cursor, name, sql, params):
+    """Return the list of problems found in the plan of one query"""
+    cursor.execute("EXPLAIN " + sql, params)
+    problems = []
+    aliases = {'ml': 'MealLog', 'n': 'Nutrient', 't': 'NutrientType', 'c': 'DailyMealCounts',
+               'd': 'DailyNutrientTotals'}
+    for row in cursor.fetchall():
+        table = aliases.get(row['table'], row['table'])
+        if table in LARGE_TABLES and row['type'] == 'ALL':
+            problems.append(f"{name}: full scan on {table} (possible_keys={row['possible_keys']})")
+    return problems
+
+
+def main():
+    from backend.db import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        problems = []
+        for name, sql, params in HOT_QUERIES:
+            found = check(cursor, name, sql, params)
+            print(f"{'FAIL' if found else 'ok  '} {name}")
+            problems.extend(found)
+    finally:
+        cursor.close()
+        conn.close()
+
+    for problem in problems:
+        print(problem)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
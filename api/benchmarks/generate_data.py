@@ -0,0 +1,345 @@
+"""
+Generate synthetic NutritionBuddy data at production scale.
+
+Produces Nutritionist, Client, NutritionPlan, MealLog, Nutrient, Athlete,
+Workout_Plan, Meal_Log and SystemPerformance rows. The output is fully
+determined by the arguments: the same --seed, scale and --end-date always
+give the same rows. Rows are generated as a stream, so memory stays flat
+even at tens of millions of nutrient rows.
+
+Two output modes:
+
+  files   tab-separated files plus a load.sql that bulk-loads them with
+          LOAD DATA LOCAL INFILE (fastest for large volumes):
+
+              python benchmarks/generate_data.py files --out /tmp/nb-data --clients 100000
+              cd /tmp/nb-data && mysql --local-infile=1 -u root -p NutritionBuddy < load.sql
+
+  insert  batched multi-row INSERTs straight into the database configured in
+          .env (IDs continue after the current maximum of each table):
+
+              python benchmarks/generate_data.py insert --clients 10000
+
+Rows get explicit IDs so foreign keys line up without reading IDs back;
+client and nutritionist emails end in @synthetic.invalid. Afterwards rebuild
+the daily rollup with `python -m backend.meals.rollup` and the client counts
+with `python -m backend.clients.counters`.
+
+Rough volume: clients x meals-per-client x (4 macros + micronutrients-per-meal)
+nutrient rows, e.g. 100k clients x 20 meals x 7 = 14M.
+"""
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import common  # noqa: F401  (puts the api/ folder on sys.path)
+from backend.meals.nutrient_catalog import nutrient_catalog
+from backend.meals.units import canonical_nutrient, canonical_unit
+
+EMAIL_DOMAIN = 'synthetic.invalid'
+
+# Column order of every generated table; the first column is the explicit ID
+COLUMNS = {
+    'Nutritionist': ['ID', 'Name', 'Email'],
+    'Client': ['ID', 'Name', 'DOB', 'Email', 'is_archived'],
+    'NutritionPlan': ['ID', 'StartDate', 'EndDate', 'CaloriesGoal', 'NutritionistID', 'ClientID'],
+    'MealLog': ['ID', 'Datetime', 'Notes', 'ClientID'],
+    'Nutrient': ['ID', 'NutrientTypeID', 'Quantity', 'CanonicalQuantity', 'MealLogID'],
+    'Athlete': ['athlete_id', 'name', 'weight_kg', 'height_cm', 'age', 'activity_level'],
+    'Workout_Plan': ['plan_id', 'athlete_id', 'goal', 'start_date', 'end_date'],
+    'Meal_Log': ['log_id', 'athlete_id', 'log_date', 'day_of_week', 'meal_type', 'meal_time',
+                 'calories', 'protein_g', 'carbs_g', 'fats_g', 'daily_caloric_total'],
+    'SystemPerformance': ['PerformanceID', 'Performance_Metric', 'System_Status', 'Existing_Clients',
+                          'New_Clients', 'Timestamp'],
+}
+
+FIRST_NAMES = ['Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Elijah', 'Sophia', 'James', 'Isabella', 'Lucas',
+               'Mia', 'Mason', 'Amelia', 'Ethan', 'Harper', 'Logan', 'Evelyn', 'Aiden', 'Abigail', 'Jackson',
+               'Priya', 'Wei', 'Fatima', 'Mateo', 'Aisha', 'Hiroshi', 'Sofia', 'Kwame', 'Elena', 'Omar']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore',
+              'Patel', 'Nguyen', 'Kim', 'Chen', 'Okafor', 'Rossi', 'Silva', 'Kowalski', 'Haddad', 'Sato']
+
+# (meal type, first hour, last hour, share of the daily calories)
+MEAL_SLOTS = [('Breakfast', 6, 9, 0.25), ('Lunch', 11, 14, 0.35), ('Dinner', 17, 20, 0.3), ('Snack', 15, 22, 0.1)]
+MEAL_NOTES = {
+    'Breakfast': ['Oatmeal with berries and walnuts', 'Greek yogurt with granola and banana',
+                  'Scrambled eggs with spinach on whole grain toast', 'Protein smoothie with oats'],
+    'Lunch': ['Grilled chicken salad with olive oil dressing', 'Quinoa bowl with roasted vegetables and feta',
+              'Turkey wrap with avocado', 'Lentil soup with whole grain bread', 'Salmon poke bowl'],
+    'Dinner': ['Baked salmon with broccoli and brown rice', 'Steak with sweet potato and asparagus',
+               'Chicken stir-fry with mixed vegetables', 'Turkey meatballs with zucchini noodles',
+               'Vegetable curry with chickpeas and rice'],
+    'Snack': ['Apple with almond butter', 'Protein bar', 'Hummus with carrot sticks', 'Mixed nuts'],
+}
+
+# (name, category, unit, low, high) per meal
+MACRONUTRIENTS = [('Protein', 'Macronutrient', 'g', 5, 55), ('Carbohydrates', 'Macronutrient', 'g', 10, 95),
+                  ('Fat', 'Macronutrient', 'g', 3, 40), ('Fiber', 'Macronutrient', 'g', 0.5, 14)]
+MICRONUTRIENTS = [('Vitamin C', 'Vitamin', 'mg', 2, 90), ('Vitamin D', 'Vitamin', 'mcg', 0.1, 8),
+                  ('Vitamin A', 'Vitamin', 'mcg', 20, 400), ('Vitamin B12', 'Vitamin', 'mcg', 0.1, 3),
+                  ('Vitamin K', 'Vitamin', 'mcg', 5, 150), ('Folate', 'Vitamin', 'mcg', 10, 200),
+                  ('Iron', 'Mineral', 'mg', 0.5, 6), ('Calcium', 'Mineral', 'mg', 20, 400),
+                  ('Magnesium', 'Mineral', 'mg', 10, 120), ('Zinc', 'Mineral', 'mg', 0.5, 5),
+                  ('Selenium', 'Mineral', 'mcg', 2, 40), ('Potassium', 'Electrolyte', 'mg', 100, 900),
+                  ('Sodium', 'Electrolyte', 'mg', 50, 1200), ('Omega-3', 'Fatty Acid', 'g', 0.1, 2.5)]
+NUTRIENT_TYPES = [(name, category, unit) for name, category, unit, _, _ in MACRONUTRIENTS + MICRONUTRIENTS]
+
+WORKOUT_GOALS = ['Weight loss', 'Muscle gain', 'Endurance', 'Maintenance', 'Strength']
+PERFORMANCE_METRICS = [('CPU Usage', ['Optimal', 'Optimal', 'Warning']), ('Memory Usage', ['Optimal', 'Good']),
+                       ('Response Time', ['Good', 'Good', 'Degraded']), ('Disk Usage', ['Optimal', 'Good'])]
+
+
+def sql_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+class FileSink:
+    """Writes one tab-separated file per table and a load.sql that loads them"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self._files = {}
+        self.counts = dict.fromkeys(COLUMNS, 0)
+
+    def nutrient_type_id(self, name, category, unit):
+        # Local position in NUTRIENT_TYPES; load.sql maps it to the catalog ID
+        return NUTRIENT_TYPES.index((name, category, unit)) + 1
+
+    def write(self, table, row):
+        handle = self._files.get(table)
+        if handle is None:
+            handle = self._files[table] = open(os.path.join(self.out_dir, f'{table}.tsv'), 'w', newline='\n')
+        handle.write('\t'.join('\\N' if value is None else str(sql_value(value)) for value in row))
+        handle.write('\n')
+        self.counts[table] += 1
+
+    def close(self):
+        for handle in self._files.values():
+            handle.close()
+        with open(os.path.join(self.out_dir, 'load.sql'), 'w') as script:
+            script.write("-- Generated by api/benchmarks/generate_data.py; run from this folder with\n"
+                         "-- mysql --local-infile=1 NutritionBuddy < load.sql\n"
+                         "SET foreign_key_checks = 0;\nSET unique_checks = 0;\n")
+            # Catalog the generated nutrient types and keep their IDs in @type1, @type2, ...
+            for position, (name, category, unit) in enumerate(NUTRIENT_TYPES, start=1):
+                canonical, factor = canonical_unit(name, unit)
+                script.write(f"INSERT IGNORE INTO NutrientType (Name, Category, Unit, CanonicalUnit, ToCanonical) "
+                             f"VALUES ('{name}', '{category}', '{unit}', '{canonical}', {factor});\n"
+                             f"SELECT ID INTO @type{position} FROM NutrientType "
+                             f"WHERE Name = '{name}' AND Category = '{category}' AND Unit = '{unit}';\n")
+            type_ids = ', '.join(f'@type{position}' for position in range(1, len(NUTRIENT_TYPES) + 1))
+            for table, columns in COLUMNS.items():
+                if table in self._files:
+                    script.write(f"LOAD DATA LOCAL INFILE '{table}.tsv' INTO TABLE {table}\n"
+                                 f"  FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'\n")
+                    if table == 'Nutrient':
+                        script.write(f"  (ID, @local_type, Quantity, CanonicalQuantity, MealLogID)\n"
+                                     f"  SET NutrientTypeID = ELT(@local_type, {type_ids});\n")
+                    else:
+                        script.write(f"  ({', '.join(columns)});\n")
+            script.write("SET unique_checks = 1;\nSET foreign_key_checks = 1;\n")
+
+
+class InsertSink:
+    """Buffers rows per table and writes them with batched multi-row INSERTs"""
+
+    def __init__(self, conn, batch_size):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch_size = batch_size
+        self._buffers = {table: [] for table in COLUMNS}
+        self.counts = dict.fromkeys(COLUMNS, 0)
+        nutrient_catalog.resolve([(name, category, None, unit) for name, category, unit in NUTRIENT_TYPES])
+        # Parents and children are flushed independently, so skip FK checks for this session
+        self.cursor.execute("SET foreign_key_checks = 0")
+
+    def write(self, table, row):
+        buffer = self._buffers[table]
+        buffer.append([sql_value(value) for value in row])
+        if len(buffer) >= self.batch_size:
+            self._flush(table)
+
+    def _flush(self, table):
+        buffer = self._buffers[table]
+        if not buffer:
+            return
+        columns = COLUMNS[table]
+        # pymysql turns executemany on INSERT ... VALUES into multi-row statements
+        self.cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})", buffer)
+        self.conn.commit()
+        self.counts[table] += len(buffer)
+        buffer.clear()
+
+    def nutrient_type_id(self, name, category, unit):
+        return nutrient_catalog.type_id(name, category, unit)
+
+    def close(self):
+        for table in COLUMNS:
+            self._flush(table)
+        self.cursor.execute("SET foreign_key_checks = 1")
+        self.cursor.close()
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate(sink, args, start_ids, rng):
+    """Stream every table's rows into the sink"""
+    next_id = dict(start_ids)
+
+    def take_id(table):
+        value = next_id[table]
+        next_id[table] += 1
+        return value
+
+    end = args.end_date
+    first_day = end - timedelta(days=args.days - 1)
+
+    # Nutritionists
+    nutritionist_ids = []
+    for _ in range(args.nutritionists):
+        nutritionist_id = take_id('Nutritionist')
+        nutritionist_ids.append(nutritionist_id)
+        sink.write('Nutritionist', (nutritionist_id, person_name(rng),
+                                    f"nutritionist{nutritionist_id}@{EMAIL_DOMAIN}"))
+
+    # Clients with their plans, meals and nutrients
+    signups_per_day = [0] * args.days
+    for _ in range(args.clients):
+        client_id = take_id('Client')
+        age_days = rng.randint(16 * 365, 80 * 365)
+        sink.write('Client', (client_id, person_name(rng), end - timedelta(days=age_days),
+                              f"client{client_id}@{EMAIL_DOMAIN}", int(rng.random() < args.archived_share)))
+        signup_offset = rng.randrange(args.days)
+        signups_per_day[signup_offset] += 1
+
+        # Back-to-back plans covering the client's time on the platform
+        plan_start = first_day + timedelta(days=signup_offset)
+        while plan_start <= end:
+            plan_end = plan_start + timedelta(days=rng.choice([30, 60, 90]))
+            sink.write('NutritionPlan', (take_id('NutritionPlan'), plan_start, plan_end,
+                                         rng.randrange(1400, 3250, 50),
+                                         rng.choice(nutritionist_ids) if nutritionist_ids else None, client_id))
+            plan_start = plan_end + timedelta(days=1)
+
+        active_days = args.days - signup_offset
+        meals = max(0, round(rng.gauss(args.meals_per_client, args.meals_per_client * 0.3)))
+        for _ in range(meals):
+            meal_type, first_hour, last_hour, _share = rng.choice(MEAL_SLOTS)
+            meal_day = first_day + timedelta(days=signup_offset + rng.randrange(active_days))
+            meal_time = datetime(meal_day.year, meal_day.month, meal_day.day,
+                                 rng.randint(first_hour, last_hour), rng.randrange(0, 60, 5))
+            meal_id = take_id('MealLog')
+            sink.write('MealLog', (meal_id, meal_time, f"{meal_type}: {rng.choice(MEAL_NOTES[meal_type])}",
+                                   client_id))
+
+            micros = rng.sample(MICRONUTRIENTS, min(len(MICRONUTRIENTS),
+                                                    rng.randint(0, 2 * args.micronutrients_per_meal)))
+            for name, category, unit, low, high in MACRONUTRIENTS + micros:
+                quantity = round(rng.uniform(low, high), 2)
+                sink.write('Nutrient', (take_id('Nutrient'), sink.nutrient_type_id(name, category, unit),
+                                        quantity, canonical_nutrient(name, quantity, unit)[0], meal_id))
+
+    # Student athletes with workout plans and daily meal logs
+    for _ in range(args.athletes):
+        athlete_id = take_id('Athlete')
+        weight = round(rng.uniform(50, 110), 2)
+        height = round(rng.uniform(150, 205), 2)
+        activity = rng.choice(['low', 'moderate', 'moderate', 'high'])
+        age = rng.randint(17, 26)
+        sink.write('Athlete', (athlete_id, person_name(rng), weight, height, age, activity))
+
+        daily_target = round((10 * weight + 6.25 * height - 5 * age + 5)
+                             * {'low': 1.2, 'moderate': 1.55, 'high': 1.9}[activity])
+        plan_length = min(args.days, rng.choice([28, 42, 56]))
+        plan_start = end - timedelta(days=plan_length - 1)
+        sink.write('Workout_Plan', (take_id('Workout_Plan'), athlete_id, rng.choice(WORKOUT_GOALS),
+                                    plan_start, end))
+
+        for offset in range(plan_length):
+            day = plan_start + timedelta(days=offset)
+            slots = MEAL_SLOTS if rng.random() < 0.6 else MEAL_SLOTS[:3]
+            calories = [round(daily_target * share * rng.uniform(0.8, 1.2)) for *_, share in slots]
+            for (meal_type, first_hour, last_hour, _share), meal_calories in zip(slots, calories):
+                meal_time = f"{rng.randint(first_hour, last_hour):02d}:{rng.randrange(0, 60, 15):02d}:00"
+                sink.write('Meal_Log', (take_id('Meal_Log'), athlete_id, day, day.strftime('%A'), meal_type,
+                                        meal_time, meal_calories, round(meal_calories * 0.3 / 4, 2),
+                                        round(meal_calories * 0.45 / 4, 2), round(meal_calories * 0.25 / 9, 2),
+                                        sum(calories)))
+
+    # One system performance sample per day, tracking the client base
+    existing = 0
+    for offset, new_clients in enumerate(signups_per_day):
+        metric, statuses = PERFORMANCE_METRICS[offset % len(PERFORMANCE_METRICS)]
+        day = first_day + timedelta(days=offset)
+        sink.write('SystemPerformance', (take_id('SystemPerformance'), metric, rng.choice(statuses),
+                                         existing, new_clients, datetime(day.year, day.month, day.day, 8)))
+        existing += new_clients
+
+
+def current_start_ids(conn):
+    """Next free ID of every table, so inserted rows never collide with existing ones"""
+    cursor = conn.cursor()
+    start_ids = {}
+    for table, columns in COLUMNS.items():
+        cursor.execute(f"SELECT COALESCE(MAX({columns[0]}), 0) + 1 AS next_id FROM {table}")
+        start_ids[table] = cursor.fetchone()['next_id']
+    cursor.close()
+    return start_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['files', 'insert'])
+    parser.add_argument('--out', default='synthetic-data', help='output folder (files mode)')
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--meals-per-client', type=int, default=20)
+    parser.add_argument('--micronutrients-per-meal', type=int, default=3, help='average, on top of 4 macros')
+    parser.add_argument('--nutritionists', type=int, help='default: one per 50 clients')
+    parser.add_argument('--athletes', type=int, default=200)
+    parser.add_argument('--days', type=int, default=365, help='length of the generated history')
+    parser.add_argument('--end-date', type=lambda v: datetime.strptime(v, '%Y-%m-%d').date(),
+                        default=date.today(), help='last day of the history (default: today)')
+    parser.add_argument('--archived-share', type=float, default=0.05)
+    parser.add_argument('--start-id', type=int,
+                        help='first ID for every table (files default: 1000000, insert default: after MAX(ID))')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per INSERT (insert mode)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if args.nutritionists is None:
+        args.nutritionists = max(1, args.clients // 50)
+
+    rng = random.Random(args.seed)
+    if args.mode == 'files':
+        start_ids = dict.fromkeys(COLUMNS, args.start_id or 1000000)
+        sink = FileSink(args.out)
+        generate(sink, args, start_ids, rng)
+        sink.close()
+        destination = os.path.join(args.out, 'load.sql')
+    else:
+        from backend.db import get_db_connection
+        conn = get_db_connection()
+        try:
+            start_ids = dict.fromkeys(COLUMNS, args.start_id) if args.start_id else current_start_ids(conn)
+            sink = InsertSink(conn, args.batch_size)
+            generate(sink, args, start_ids, rng)
+            sink.close()
+        finally:
+            conn.close()
+        destination = 'the database'
+
+    for table, count in sink.counts.items():
+        print(f"{table:18} {count:>12,} rows")
+    print(f"Written to {destination}. Rebuild the daily rollup and client counts with: "
+          "python -m backend.meals.rollup && python -m backend.clients.counters")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Measure requests/second of the production server (gunicorn, see
+gunicorn.conf.py) as the number of worker processes grows.
+
+For each worker count the script starts gunicorn on --port, waits until it
+answers, drives the given read routes from --concurrency client threads for
+--duration seconds and reports throughput, latency percentiles and errors.
+The response cache is disabled by default so every request reaches MySQL.
+Run from the api/ folder with the database up:
+
+    python benchmarks/load_test.py --workers 1,2,4 --threads 4 --duration 20
+"""
+import argparse
+import os
+import signal
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from common import percentile
+
+DEFAULT_ROUTES = [
+    '/api/clients',
+    '/api/clients/nutrition-dashboard',
+    '/api/meal-logs?client_id=1',
+    '/api/ceo/dashboard',
+    '/api/system-performance',
+]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise SystemExit(f"Server did not come up at {url}")
+
+
+def drive(base_url, routes, concurrency, duration):
+    """Hammer the routes round-robin; returns (latencies in ms, error count)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        local, failed, i = [], 0, offset
+        while time.monotonic() < stop_at:
+            url = base_url + routes[i % len(routes)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                local.append((time.perf_counter() - start) * 1000)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated worker counts to test')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker')
+    parser.add_argument('--concurrency', type=int, default=32, help='concurrent client connections')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per worker count')
+    parser.add_argument('--port', type=int, default=4100)
+    parser.add_argument('--route', action='append', dest='routes', help='route to request (repeatable)')
+    parser.add_argument('--with-cache', action='store_true', help='keep the response cache enabled')
+    args = parser.parse_args()
+
+    routes = args.routes or DEFAULT_ROUTES
+    base_url = f'http://127.0.0.1:{args.port}'
+    api_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"{len(routes)} routes, {args.concurrency} clients, {args.duration:.0f}s per run")
+    for workers in [int(n) for n in args.workers.split(',')]:
+        env = dict(os.environ, PORT=str(args.port), API_WORKERS=str(workers), API_THREADS=str(args.threads))
+        if not args.with_cache:
+            env['RESPONSE_CACHE_ENABLED'] = 'false'
+        server = subprocess.Popen(
+            ['gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null', 'wsgi:app'],
+            cwd=api_dir, env=env
+        )
+        try:
+            wait_until_up(base_url + '/')
+            latencies, errors = drive(base_url, routes, args.concurrency, args.duration)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+        print(f"workers={workers:2d} threads={args.threads}: {len(latencies) / args.duration:8.1f} req/s "
+              f"p50={percentile(latencies, 50):7.1f}ms p95={percentile(latencies, 95):7.1f}ms "
+              f"p99={percentile(latencies, 99):7.1f}ms errors={errors}")
+
+
+if __name__ == '__main__':
+    main()
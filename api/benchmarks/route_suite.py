@@ -0,0 +1,411 @@
+"""
+Route-level benchmark and regression check for every registered API route.
+
+Boots create_app() against the database configured in .env (optionally
+loading synthetic data first with generate_data.py), runs each route
+--runs times through the full Flask stack and records per route:
+
+  - p50 / p95 latency in ms
+  - SQL statements per request (from the request metrics in backend.metrics)
+  - response size in bytes
+
+Results are written to benchmarks/results/route-suite-<timestamp>.json. When
+benchmarks/route_baseline.json exists every route is compared against it
+using the budgets in benchmarks/route_budgets.json, and the script exits with
+code 1 when a route is over budget, returns an unexpected status, or has no
+scenario below. Run from the api/ folder:
+
+    python benchmarks/route_suite.py --generate-clients 2000   # fresh database
+    python benchmarks/route_suite.py --runs 30
+    python benchmarks/route_suite.py --runs 30 --save-baseline
+
+Read routes run against the client with the most meals. Write routes run
+against rows the suite creates itself (emails ending in
+@route-suite.bench.invalid, datasets named route-suite), which are removed
+again at the end. The response cache is switched off so every run reaches
+the database.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from common import dispatch, percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_PATH = os.path.join(HERE, 'route_budgets.json')
+BASELINE_PATH = os.path.join(HERE, 'route_baseline.json')
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+BENCH_DOMAIN = 'route-suite.bench.invalid'
+BENCH_DATASET = 'route-suite'
+
+MEAL_NUTRIENTS = [
+    {'name': 'Protein', 'category': 'Macronutrient', 'quantity': 32.5, 'unit': 'g'},
+    {'name': 'Carbohydrates', 'category': 'Macronutrient', 'quantity': 61.0, 'unit': 'g'},
+    {'name': 'Fat', 'category': 'Macronutrient', 'quantity': 18.25, 'unit': 'g'},
+    {'name': 'Fiber', 'category': 'Macronutrient', 'quantity': 7.0, 'unit': 'g'},
+]
+
+
+########################################################
+# Fixtures
+########################################################
+
+class Fixtures:
+    """IDs the scenarios run against: existing data for reads, suite-owned rows for writes"""
+
+    def __init__(self, app, conn):
+        self.app = app
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ClientID, DATE(MAX(Datetime)) AS last_day, COUNT(*) AS meals
+            FROM MealLog
+            GROUP BY ClientID
+            ORDER BY meals DESC
+            LIMIT 1
+        """)
+        busiest = cursor.fetchone()
+        if not busiest:
+            raise SystemExit("No meal logs found; load data first, e.g. with --generate-clients 2000")
+        self.client_id = busiest['ClientID']
+        self.last_day = busiest['last_day']
+        self.first_day = self.last_day - timedelta(days=30)
+        cursor.execute("SELECT ID FROM MealLog WHERE ClientID = %s ORDER BY Datetime DESC LIMIT 1",
+                       (self.client_id,))
+        self.meal_id = cursor.fetchone()['ID']
+        cursor.close()
+
+        # Suite-owned rows the update routes work on
+        self.bench_client_id = self.create_client()
+        self.bench_meal_id = self.create_meal()
+        self.bench_dataset_id = self.create_dataset()
+
+    def _create(self, path, body):
+        status, response = dispatch(self.app, path, 'POST', body)
+        if status != 201:
+            raise SystemExit(f"Fixture POST {path} failed with {status}: {response[:500]}")
+        return json.loads(response)['id']
+
+    def client_body(self, archived=False):
+        return {'name': 'Route Suite', 'dob': '1990-05-17', 'email': f'{uuid.uuid4().hex}@{BENCH_DOMAIN}',
+                'is_archived': archived}
+
+    def meal_body(self):
+        return {'client_id': self.bench_client_id, 'datetime': f'{self.last_day} 12:30:00',
+                'notes': 'route suite meal', 'nutrients': MEAL_NUTRIENTS}
+
+    def dataset_body(self):
+        return {'dataset_name': BENCH_DATASET, 'data_description': 'route suite', 'status': 'Active'}
+
+    def create_client(self, archived=False):
+        return self._create('/api/clients', self.client_body(archived))
+
+    def create_meal(self):
+        return self._create('/api/meal-logs', self.meal_body())
+
+    def create_dataset(self):
+        return self._create('/api/datasets', self.dataset_body())
+
+
+def cleanup(conn):
+    from backend.clients.counters import rebuild_client_counts
+    cursor = conn.cursor()
+    bench_clients = "SELECT ID FROM Client WHERE Email LIKE %s"
+    pattern = f'%@{BENCH_DOMAIN}'
+    cursor.execute(
+        f"DELETE n FROM Nutrient n JOIN MealLog ml ON ml.ID = n.MealLogID "
+        f"WHERE ml.ClientID IN ({bench_clients})", (pattern,))
+    cursor.execute(f"DELETE FROM MealLog WHERE ClientID IN ({bench_clients})", (pattern,))
+    cursor.execute(f"DELETE FROM DailyNutrientTotals WHERE ClientID IN ({bench_clients})", (pattern,))
+    cursor.execute(f"DELETE FROM DailyMealCounts WHERE ClientID IN ({bench_clients})", (pattern,))
+    cursor.execute("DELETE FROM Client WHERE Email LIKE %s", (pattern,))
+    cursor.execute("DELETE FROM Dataset WHERE Dataset_Name = %s", (BENCH_DATASET,))
+    # The rows above bypassed the routes that maintain ClientCounts
+    rebuild_client_counts(cursor)
+    conn.commit()
+    cursor.close()
+
+
+########################################################
+# Scenarios
+########################################################
+
+# (method, rule) -> function(fixtures) returning (path, json body, expected status).
+# Runs once per measured request; anything it does itself is not timed.
+SCENARIOS = {
+    ('GET', '/'): lambda f: ('/', None, 200),
+    ('GET', '/api/metrics'): lambda f: ('/api/metrics', None, 200),
+
+    # Clients
+    ('GET', '/api/clients'): lambda f: ('/api/clients?limit=100', None, 200),
+    ('GET', '/api/clients/<int:client_id>'): lambda f: (f'/api/clients/{f.client_id}', None, 200),
+    ('POST', '/api/clients'): lambda f: ('/api/clients', f.client_body(), 201),
+    ('PUT', '/api/clients/<int:client_id>'): lambda f: (
+        f'/api/clients/{f.bench_client_id}', {'name': 'Route Suite Updated'}, 200),
+    ('DELETE', '/api/clients/<int:client_id>'): lambda f: (
+        f'/api/clients/{f.create_client()}', None, 200),
+    ('PUT', '/api/clients/<int:client_id>/archive'): lambda f: (
+        f'/api/clients/{f.create_client()}/archive', None, 200),
+    ('PUT', '/api/clients/<int:client_id>/restore'): lambda f: (
+        f'/api/clients/{f.create_client(archived=True)}/restore', None, 200),
+    ('GET', '/api/clients/search'): lambda f: ('/api/clients/search?name=a&min_age=25&max_age=45', None, 200),
+    ('GET', '/api/clients/stats'): lambda f: (
+        f'/api/clients/stats?from_date={f.first_day}&to_date={f.last_day}', None, 200),
+    ('GET', '/api/clients/nutrition-dashboard'): lambda f: ('/api/clients/nutrition-dashboard?days=30', None, 200),
+
+    # Meals
+    ('GET', '/api/meal-logs'): lambda f: (f'/api/meal-logs?client_id={f.client_id}&limit=100', None, 200),
+    ('GET', '/api/meal-logs/export'): lambda f: (
+        f'/api/meal-logs/export?client_id={f.client_id}&date_from={f.first_day}&date_to={f.last_day}',
+        None, 200),
+    ('GET', '/api/meal-logs/<int:meal_id>'): lambda f: (f'/api/meal-logs/{f.meal_id}', None, 200),
+    ('POST', '/api/meal-logs'): lambda f: ('/api/meal-logs', f.meal_body(), 201),
+    ('POST', '/api/meal-logs/bulk'): lambda f: ('/api/meal-logs/bulk', {'meals': [f.meal_body()] * 10}, 201),
+    ('PUT', '/api/meal-logs/<int:meal_id>'): lambda f: (
+        f'/api/meal-logs/{f.bench_meal_id}', {'notes': 'route suite update', 'nutrients': MEAL_NUTRIENTS}, 200),
+    ('PATCH', '/api/meal-logs/<int:meal_id>'): lambda f: (
+        f'/api/meal-logs/{f.bench_meal_id}', {'nutrients': [dict(MEAL_NUTRIENTS[0], quantity=33.0)]}, 200),
+    ('DELETE', '/api/meal-logs/<int:meal_id>'): lambda f: (f'/api/meal-logs/{f.create_meal()}', None, 200),
+    ('GET', '/api/meal-logs/queued/<int:provisional_id>'): lambda f: ('/api/meal-logs/queued/0', None, 404),
+    ('GET', '/api/meal-logs/daily-summary'): lambda f: (
+        f'/api/meal-logs/daily-summary?client_id={f.client_id}&date={f.last_day}', None, 200),
+    ('GET', '/api/meal-logs/daily-summary/range'): lambda f: (
+        f'/api/meal-logs/daily-summary/range?client_id={f.client_id}'
+        f'&date_from={f.first_day}&date_to={f.last_day}', None, 200),
+    ('GET', '/api/trend-analysis'): lambda f: (
+        f'/api/trend-analysis?client_id={f.client_id}&period=weekly'
+        f'&start_date={f.last_day - timedelta(days=90)}&end_date={f.last_day}', None, 200),
+
+    # CEO dashboard
+    ('GET', '/api/ceo/dashboard'): lambda f: ('/api/ceo/dashboard', None, 200),
+    ('GET', '/api/ceo/key_metrics'): lambda f: ('/api/ceo/key_metrics', None, 200),
+    ('GET', '/api/ceo/growth_trend'): lambda f: ('/api/ceo/growth_trend', None, 200),
+    ('GET', '/api/ceo/engagement_indicators'): lambda f: ('/api/ceo/engagement_indicators', None, 200),
+    ('GET', '/api/ceo/daily_active_users'): lambda f: ('/api/ceo/daily_active_users', None, 200),
+    ('GET', '/api/ceo/client_activity'): lambda f: ('/api/ceo/client_activity', None, 200),
+    ('GET', '/api/ceo/financial_indicators'): lambda f: ('/api/ceo/financial_indicators', None, 200),
+    ('GET', '/api/ceo/revenue_trend'): lambda f: ('/api/ceo/revenue_trend', None, 200),
+    ('GET', '/api/ceo/expense_breakdown'): lambda f: ('/api/ceo/expense_breakdown', None, 200),
+    ('GET', '/api/ceo/performance_indicators'): lambda f: ('/api/ceo/performance_indicators', None, 200),
+    ('GET', '/api/ceo/api_response_time'): lambda f: ('/api/ceo/api_response_time', None, 200),
+    ('GET', '/api/ceo/user_traffic'): lambda f: ('/api/ceo/user_traffic', None, 200),
+
+    # Student athletes
+    ('GET', '/api/athlete/bmi'): lambda f: ('/api/athlete/bmi', None, 200),
+    ('GET', '/api/athlete/maintenance_calories'): lambda f: ('/api/athlete/maintenance_calories', None, 200),
+    ('GET', '/api/athlete/weight_change'): lambda f: ('/api/athlete/weight_change', None, 200),
+    ('GET', '/api/athlete/daily_macro_breakdown'): lambda f: ('/api/athlete/daily_macro_breakdown', None, 200),
+    ('GET', '/api/athlete/workout_plan_intake'): lambda f: ('/api/athlete/workout_plan_intake', None, 200),
+    ('GET', '/api/athlete/reminders'): lambda f: ('/api/athlete/reminders', None, 200),
+
+    # System admin
+    ('GET', '/api/system-performance'): lambda f: ('/api/system-performance', None, 200),
+    ('GET', '/api/datasets'): lambda f: ('/api/datasets', None, 200),
+    ('POST', '/api/datasets'): lambda f: ('/api/datasets', f.dataset_body(), 201),
+    ('PUT', '/api/datasets/<int:dataset_id>'): lambda f: (
+        f'/api/datasets/{f.bench_dataset_id}', {'data_description': 'route suite update'}, 200),
+    ('DELETE', '/api/datasets/<int:dataset_id>'): lambda f: (f'/api/datasets/{f.create_dataset()}', None, 200),
+    ('GET', '/api/db-pool/stats'): lambda f: ('/api/db-pool/stats', None, 200),
+    ('GET', '/api/cache/stats'): lambda f: ('/api/cache/stats', None, 200),
+    ('GET', '/api/profiles'): lambda f: ('/api/profiles', None, 200),
+    ('GET', '/api/profiles/<name>'): lambda f: ('/api/profiles/20000101-000000-00000000.json', None, 404),
+}
+
+
+def registered_routes(app):
+    """(method, rule) for every route the app serves, ignoring HEAD/OPTIONS and static files"""
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            routes.add((method, rule.rule))
+    return sorted(routes, key=lambda route: (route[1], route[0]))
+
+
+def route_key(method, rule):
+    return f'{method} {rule}'
+
+
+########################################################
+# Measuring
+########################################################
+
+def statements_for(method, rule):
+    """(requests, SQL statements) recorded so far for one route"""
+    from backend.metrics import registry
+    values = registry.snapshot().get((rule, method))
+    return (values[1], values[4]) if values else (0, 0)
+
+
+def measure(app, fixtures, method, rule, scenario, runs, warmup):
+    timings = []
+    statements = []
+    size = 0
+    for i in range(warmup + runs):
+        path, body, expected = scenario(fixtures)
+        before = statements_for(method, rule)
+        start = time.perf_counter()
+        status, response = dispatch(app, path, method, body)
+        elapsed = (time.perf_counter() - start) * 1000
+        after = statements_for(method, rule)
+        if status != expected:
+            return {'error': f'{method} {path} returned {status}, expected {expected}: '
+                             f'{response[:200].decode(errors="replace")}'}
+        if i < warmup:
+            continue
+        timings.append(elapsed)
+        statements.append(after[1] - before[1])
+        size = max(size, len(response))
+    timings.sort()
+    return {
+        'runs': runs,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': max(statements),
+        'response_bytes': size,
+    }
+
+
+########################################################
+# Budgets
+########################################################
+
+def budget_for(budgets, key):
+    return {**budgets['defaults'], **budgets.get('routes', {}).get(key, {})}
+
+
+def check(results, baseline, budgets):
+    """Return a list of human-readable budget violations"""
+    violations = []
+    for key, result in results.items():
+        if 'error' in result:
+            violations.append(f'{key}: {result["error"]}')
+            continue
+        base = baseline.get('routes', {}).get(key)
+        if base is None or 'error' in base:
+            continue
+        budget = budget_for(budgets, key)
+        p95_limit = base['p95_ms'] * budget['p95_ratio'] + budget['p95_slack_ms']
+        if result['p95_ms'] > p95_limit:
+            violations.append(f'{key}: p95 {result["p95_ms"]:.1f}ms > {p95_limit:.1f}ms '
+                              f'(baseline {base["p95_ms"]:.1f}ms)')
+        query_limit = base['queries'] + budget['queries_delta']
+        if result['queries'] > query_limit:
+            violations.append(f'{key}: {result["queries"]} queries > {query_limit} '
+                              f'(baseline {base["queries"]})')
+        size_limit = base['response_bytes'] * budget['size_ratio'] + budget['size_slack_bytes']
+        if result['response_bytes'] > size_limit:
+            violations.append(f'{key}: response {result["response_bytes"]}B > {size_limit:.0f}B '
+                              f'(baseline {base["response_bytes"]}B)')
+    return violations
+
+
+def load_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+########################################################
+# Main
+########################################################
+
+def generate(clients, seed):
+    """Insert synthetic data with generate_data.py and rebuild the rollup and client counts"""
+    api_dir = os.path.dirname(HERE)
+    subprocess.run([sys.executable, os.path.join(HERE, 'generate_data.py'), 'insert',
+                    '--clients', str(clients), '--seed', str(seed)], check=True, cwd=api_dir)
+    subprocess.run([sys.executable, '-m', 'backend.meals.rollup'], check=True, cwd=api_dir)
+    subprocess.run([sys.executable, '-m', 'backend.clients.counters'], check=True, cwd=api_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--routes', help='only run routes whose rule contains this text')
+    parser.add_argument('--generate-clients', type=int,
+                        help='insert this many synthetic clients with generate_data.py first')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--budgets', default=BUDGETS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='write the results as the new baseline instead of checking against it')
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+    # Budgets cover the direct write path; bench_write_behind.py measures the queue
+    os.environ['MEAL_WRITE_BEHIND'] = 'false'
+    if args.generate_clients:
+        generate(args.generate_clients, args.seed)
+
+    from backend_app import create_app
+    from backend.db import get_db_connection
+
+    app = create_app()
+    conn = get_db_connection()
+    results = {}
+    try:
+        fixtures = Fixtures(app, conn)
+        for method, rule in registered_routes(app):
+            if args.routes and args.routes not in rule:
+                continue
+            key = route_key(method, rule)
+            scenario = SCENARIOS.get((method, rule))
+            if scenario is None:
+                results[key] = {'error': 'no scenario in benchmarks/route_suite.py'}
+            else:
+                results[key] = measure(app, fixtures, method, rule, scenario, args.runs, args.warmup)
+            result = results[key]
+            if 'error' in result:
+                print(f"{key:55} ERROR {result['error']}")
+            else:
+                print(f"{key:55} p50={result['p50_ms']:8.1f}ms p95={result['p95_ms']:8.1f}ms "
+                      f"queries={result['queries']:3} size={result['response_bytes']:9}B")
+    finally:
+        cleanup(conn)
+        conn.close()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'runs': args.runs,
+        'routes': results,
+    }
+    result_path = os.path.join(RESULTS_DIR, f"route-suite-{datetime.now():%Y%m%d-%H%M%S}.json")
+    write_json(result_path, report)
+    print(f"\nResults written to {result_path}")
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+        violations = [f'{key}: {result["error"]}' for key, result in results.items() if 'error' in result]
+    else:
+        baseline = load_json(args.baseline)
+        if baseline is None:
+            print("No baseline yet; run with --save-baseline to record one")
+            baseline = {}
+        violations = check(results, baseline, load_json(args.budgets))
+
+    if violations:
+        print(f"\n{len(violations)} budget violation(s):")
+        for violation in violations:
+            print(f"  {violation}")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
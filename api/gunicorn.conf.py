@@ -0,0 +1,62 @@
+###
+# Gunicorn settings for the production API
+###
+#
+# Started by `python backend_app.py` when API_MODE=production, or directly:
+#
+#     gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Pre-fork workers, each serving requests on a pool of threads. Everything is
+# configurable through the environment (defaults shown in .env.template).
+#
+# Every worker has its own DB connection pool and response cache, so the
+# database sees up to API_WORKERS * DB_POOL_MAX_SIZE connections; keep
+# DB_POOL_MAX_SIZE >= API_THREADS so threads do not wait on the pool.
+#
+# Graceful reload: `kill -HUP <master pid>` starts new workers with freshly
+# loaded code and lets the old ones finish their in-flight requests (up to
+# API_GRACEFUL_TIMEOUT seconds) before they exit. This reloads code only
+# when API_PRELOAD is false (the default); with preloading, workers are
+# forked from the app the master imported at startup.
+
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+# Same .env as the app, so the serving settings can live next to the DB settings
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '4000')}"
+
+worker_class = 'gthread'
+workers = int(os.getenv('API_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('API_THREADS', 4))
+
+# Requests slower than this get their worker restarted
+timeout = int(os.getenv('API_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('API_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers after this many requests (0 = never), staggered by the jitter
+max_requests = int(os.getenv('API_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+# Import the app once in the master and fork it into the workers. Saves
+# memory and startup time; the DB pool, caches, metrics and the CEO panel
+# executor re-initialize themselves in each worker via os.register_at_fork.
+preload_app = os.getenv('API_PRELOAD', 'false').lower() == 'true'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('API_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s started (%s threads)", worker.pid, threads)
+
+
+def worker_exit(server, worker):
+    # Close this worker's pooled connections instead of leaving them to time out on the server
+    from backend.db import pool_enabled, get_pool
+    if pool_enabled():
+        get_pool().close_all()
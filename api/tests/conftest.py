@@ -0,0 +1,172 @@
+"""
+Shared fixtures for the API tests. They need no MySQL server: fake_db
+swaps get_db_connection() for fake connections whose cursors record every
+statement and answer from a handler. Run from the api/ folder:
+
+    python -m pytest -q
+"""
+import itertools
+import os
+import sys
+import threading
+
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+# Every request reaches the (fake) database and meal writes are synchronous
+os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+os.environ['MEAL_WRITE_BEHIND'] = 'false'
+os.environ['METRICS_SAMPLE_RATE'] = '0'
+
+
+class FakeCursor:
+    """
+    DictCursor stand-in. handler(query, params) gets the query with its
+    whitespace collapsed and returns the rows it produces: any iterable, and
+    a generator is only consumed as rows are fetched.
+    """
+
+    def __init__(self, database, cursor_class=None):
+        self.database = database
+        self.cursor_class = cursor_class
+        self.executed = []
+        self.rows = iter(())
+        self.lastrowid = None
+        self.rowcount = 0
+        self.closed = False
+
+    def execute(self, query, params=None):
+        query = ' '.join(query.split())
+        self.database.record(query, params)
+        self.executed.append(query)
+        rows = self.database.handler(query, params) or []
+        if query.upper().startswith('INSERT'):
+            self.lastrowid = self.database.next_id()
+        self.rowcount = len(rows) if hasattr(rows, '__len__') else -1
+        self.rows = iter(rows)
+        return self.rowcount
+
+    def executemany(self, query, seq_of_params):
+        query = ' '.join(query.split())
+        seq_of_params = list(seq_of_params)
+        self.database.record(query, seq_of_params)
+        self.executed.append(query)
+        self.rows = iter(())
+        self.rowcount = len(seq_of_params)
+        return self.rowcount
+
+    def fetchone(self):
+        return next(self.rows, None)
+
+    def fetchmany(self, size=1):
+        return list(itertools.islice(self.rows, size))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def __iter__(self):
+        return self.rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+        self.cursors = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self, cursor_class=None):
+        cursor = FakeCursor(self.database, cursor_class)
+        self.cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDatabase:
+    """Hands out FakeConnections and keeps the log of (query, params) they ran"""
+
+    def __init__(self):
+        self.handler = lambda query, params: []
+        self.statements = []
+        self.connections = []
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def record(self, query, params):
+        with self._lock:
+            self.statements.append((query, params))
+
+    def next_id(self):
+        """Auto-increment id for an INSERT's lastrowid"""
+        with self._lock:
+            self._last_id += 1
+            return self._last_id
+
+    def connect(self):
+        conn = FakeConnection(self)
+        with self._lock:
+            self.connections.append(conn)
+        return conn
+
+    def queries(self, fragment=''):
+        """Normalized statements containing fragment"""
+        return [query for query, _ in self.statements if fragment in query]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Route every get_db_connection() of the backend to a FakeDatabase"""
+    import backend.db
+
+    database = FakeDatabase()
+    monkeypatch.setattr(backend.db, 'get_db_connection', database.connect)
+    for name, module in list(sys.modules.items()):
+        if name.startswith('backend.') and getattr(module, 'get_db_connection', None) is not None:
+            monkeypatch.setattr(module, 'get_db_connection', database.connect)
+    return database
+
+
+@pytest.fixture(scope='session')
+def app():
+    from backend_app import create_app
+    return create_app()
+
+
+class ApiClient:
+    """
+    Runs requests through the full Flask stack. (flask 2.0's test_client is
+    not compatible with the pinned werkzeug, see benchmarks/common.py.)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method, path, json=None, headers=None):
+        with self.app.test_request_context(path, method=method, json=json, headers=headers):
+            return self.app.full_dispatch_request()
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+
+@pytest.fixture
+def client(app, fake_db):
+    return ApiClient(app)
@@ -0,0 +1,85 @@
+import threading
+
+import pymysql
+import pytest
+
+from backend.cache import ResponseCache
+
+
+class TagVersionTable:
+    """The CacheTagVersion table, answering the statements ResponseCache runs"""
+
+    def __init__(self):
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.down = False
+
+    def handle(self, query, params):
+        if self.down:
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        with self.lock:
+            if query.startswith('INSERT INTO CacheTagVersion'):
+                for tag in params:
+                    self.versions[tag] = self.versions.get(tag, 0) + 1
+            elif query.startswith('SELECT Tag, Version FROM CacheTagVersion'):
+                return [{'Tag': tag, 'Version': version} for tag, version in self.versions.items()]
+        return []
+
+
+@pytest.fixture
+def tag_versions(fake_db):
+    table = TagVersionTable()
+    fake_db.handler = table.handle
+    return table
+
+
+def ok(body):
+    return lambda: (body, 200, 'application/json')
+
+
+def test_invalidation_reaches_other_processes(tag_versions):
+    # One cache per API process; they only share the CacheTagVersion table
+    reader, writer = ResponseCache(sync_interval=0), ResponseCache(sync_interval=0)
+    reader.sync()
+    reader.get_or_compute('/api/clients', 60, ('clients',), ok('old'))
+    reader.get_or_compute('/api/athletes', 60, ('athletes',), ok('athletes'))
+
+    writer.invalidate('clients')
+    reader.sync()
+
+    assert reader.get_or_compute('/api/clients', 60, ('clients',), ok('new')) == (('new', 200, 'application/json'),
+                                                                                   False)
+    assert reader.get_or_compute('/api/athletes', 60, ('athletes',), ok('other'))[1] is True
+    assert reader.stats()['remote_invalidations'] == 1
+
+
+def test_sync_reads_the_table_once_per_interval(fake_db, tag_versions):
+    cache = ResponseCache(sync_interval=60)
+
+    cache.sync()
+    cache.sync()
+
+    assert len(fake_db.queries('FROM CacheTagVersion')) == 1
+
+
+def test_database_outage_keeps_the_cache_and_the_write(tag_versions):
+    cache = ResponseCache(sync_interval=0)
+    cache.sync()
+    cache.get_or_compute('/api/clients', 60, ('clients',), ok('cached'))
+    tag_versions.down = True
+
+    cache.sync()
+    assert cache.get_or_compute('/api/clients', 60, ('clients',), ok('new'))[1] is True
+    cache.invalidate('clients')  # does not raise
+    assert cache.get_or_compute('/api/clients', 60, ('clients',), ok('new'))[1] is False
+
+
+@pytest.mark.parametrize('enabled, versions_written', [('true', 1), ('false', 0)])
+def test_writes_publish_invalidations_only_with_the_cache_enabled(client, fake_db, monkeypatch, enabled,
+                                                                  versions_written):
+    monkeypatch.setenv('RESPONSE_CACHE_ENABLED', enabled)
+
+    response = client.post('/api/clients', json={'name': 'Ada', 'email': 'ada@example.com'})
+
+    assert response.status_code == 201
+    assert len(fake_db.queries('INSERT INTO CacheTagVersion')) == versions_written
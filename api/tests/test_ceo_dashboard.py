@@ -0,0 +1,56 @@
+import pymysql
+import pytest
+
+from backend.cache import response_cache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setenv('RESPONSE_CACHE_ENABLED', 'true')
+    response_cache.clear()
+    yield response_cache
+    response_cache.clear()
+
+
+def panel_rows(failing=()):
+    def handler(query, params):
+        if 'CEO' not in query:
+            return []  # the cache's CacheTagVersion sync
+        if any(table in query for table in failing):
+            raise pymysql.err.OperationalError(1146, "Table doesn't exist")
+        return [{'Metric': 'clients', 'Value': 10}]
+    return handler
+
+
+def test_partial_dashboard_is_not_cached(client, fake_db, cache):
+    fake_db.handler = panel_rows(failing=('CEORevenueTrend',))
+    path = '/api/ceo/dashboard?panels=key_metrics,revenue_trend'
+
+    first = client.get(path)
+    second = client.get(path)
+
+    assert first.status_code == 207
+    assert first.get_json()['errors'].keys() == {'revenue_trend'}
+    assert first.get_json()['panels'].keys() == {'key_metrics'}
+    assert [first.headers['X-Cache'], second.headers['X-Cache']] == ['MISS', 'MISS']
+    assert len(fake_db.queries('FROM CEO')) == 4
+
+
+def test_complete_dashboard_is_cached(client, fake_db, cache):
+    fake_db.handler = panel_rows()
+    path = '/api/ceo/dashboard?panels=key_metrics,revenue_trend'
+
+    first = client.get(path)
+    second = client.get(path)
+
+    assert first.status_code == 200 and first.get_json()['errors'] == {}
+    assert [first.headers['X-Cache'], second.headers['X-Cache']] == ['MISS', 'HIT']
+    assert len(fake_db.queries('FROM CEO')) == 2
+
+
+def test_dashboard_without_any_panel_fails(client, fake_db, cache):
+    fake_db.handler = panel_rows(failing=('CEO',))
+
+    response = client.get('/api/ceo/dashboard?panels=key_metrics')
+
+    assert response.status_code == 500
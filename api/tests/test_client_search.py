@@ -0,0 +1,34 @@
+import pytest
+
+from backend.clients.search import ranked_search, substring_filter
+
+
+def test_substring_filter_uses_the_fulltext_index():
+    sql, params = substring_filter('Name', 'ann')
+
+    assert sql == "(MATCH(Name, Email) AGAINST (%s IN BOOLEAN MODE) AND Name LIKE %s)"
+    assert params == ['"ann"', '%ann%']
+
+
+@pytest.mark.parametrize('term', ['a', ' a', '_'])
+def test_substring_filter_matches_short_terms_anywhere(term):
+    sql, params = substring_filter('Email', term)
+
+    assert sql == "Email LIKE %s"
+    assert params == ['%' + term.replace('_', '\\_') + '%']
+
+
+@pytest.mark.parametrize('mode, pattern', [('prefix', 'a%'), ('substring', '%a%'), ('fuzzy', '%a%')])
+def test_ranked_search_short_terms(mode, pattern):
+    where_sql, where_params, _, _ = ranked_search('a', mode)
+
+    assert where_sql == "(Name LIKE %s OR Email LIKE %s)"
+    assert where_params == [pattern, pattern]
+
+
+def test_client_list_name_filter_finds_short_terms_inside_names(client, fake_db):
+    client.get('/api/clients?name=n')
+
+    query, params = fake_db.statements[0]
+    assert 'Name LIKE %s' in query
+    assert '%n%' in params
@@ -0,0 +1,123 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from backend.db import PoolTimeoutError
+from backend.meals import meal_routes
+from backend.meals.rollup import apply_rollup_deltas, meal_contributions
+
+
+def rollup_rows(rows):
+    return lambda query, params: rows if 'FROM DailyMealCounts' in query else []
+
+
+def test_daily_summary_reads_count_and_totals_in_one_query(client, fake_db):
+    fake_db.handler = rollup_rows([
+        {'Meals': 3, 'Category': 'Macronutrient', 'Name': 'Protein', 'total': Decimal('42.50'), 'Unit': 'g'},
+        {'Meals': 3, 'Category': 'Mineral', 'Name': 'Iron', 'total': Decimal('8.00000000'), 'Unit': 'mg'},
+    ])
+
+    response = client.get('/api/meal-logs/daily-summary?client_id=1&date=2024-01-31')
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['meals_count'] == 3
+    assert body['nutrients_summary'].keys() == {'Macronutrient', 'Mineral'}
+    (query, params), = fake_db.statements
+    assert 'MealLog' not in query
+    assert params == ('1', date(2024, 1, 31))
+
+
+def test_daily_summary_counts_meals_without_nutrients(client, fake_db):
+    fake_db.handler = rollup_rows([{'Meals': 2, 'Category': None, 'Name': None, 'total': None, 'Unit': None}])
+
+    body = client.get('/api/meal-logs/daily-summary?client_id=1&date=2024-01-31').get_json()
+
+    assert body['meals_count'] == 2
+    assert body['nutrients_summary'] == {}
+
+
+def test_daily_summary_of_a_day_without_meals(client, fake_db):
+    body = client.get('/api/meal-logs/daily-summary?client_id=1&date=2024-01-31').get_json()
+
+    assert body['meals_count'] == 0
+    assert body['message'] == "No meals recorded for this day"
+
+
+@pytest.mark.parametrize('path', [
+    '/api/meal-logs/daily-summary',
+    '/api/meal-logs/daily-summary?client_id=1',
+    '/api/meal-logs/daily-summary?client_id=1&date=bad',
+])
+def test_daily_summary_rejects_missing_or_bad_params(client, fake_db, path):
+    response = client.get(path)
+
+    assert response.status_code == 400
+    assert fake_db.connections == []
+
+
+def test_daily_summary_without_a_connection_fails_cleanly(client, fake_db, monkeypatch):
+    def pool_timeout():
+        raise PoolTimeoutError('No database connection available after 5s')
+    monkeypatch.setattr(meal_routes, 'get_db_connection', pool_timeout)
+
+    response = client.get('/api/meal-logs/daily-summary?client_id=1&date=2024-01-31')
+
+    assert response.status_code == 500
+    assert 'No database connection' in response.get_json()['error']
+
+
+def test_range_summary_reads_every_day_in_one_query(client, fake_db):
+    fake_db.handler = rollup_rows([
+        {'Day': date(2024, 1, 1), 'Meals': 1, 'Category': None, 'Name': None, 'total': None, 'Unit': None},
+        {'Day': date(2024, 1, 2), 'Meals': 2, 'Category': 'Macronutrient', 'Name': 'Fat',
+         'total': Decimal('10.00'), 'Unit': 'g'},
+    ])
+
+    body = client.get('/api/meal-logs/daily-summary/range?client_id=1&date_from=2024-01-01&date_to=2024-01-07')\
+        .get_json()
+
+    assert [(day['date'], day['meals_count']) for day in body['days']] == [('2024-01-01', 1), ('2024-01-02', 2)]
+    assert body['days'][0]['nutrients_summary'] == {}
+    assert len(fake_db.statements) == 1
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), params))
+
+
+def test_meals_count_towards_their_day_with_or_without_nutrients():
+    deltas = meal_contributions(1, datetime(2024, 1, 1, 8), [])
+    meal_contributions(1, datetime(2024, 1, 1, 12), [('Protein', 'Macronutrient', 20, 'g')], into=deltas)
+
+    assert deltas.meals == {(1, date(2024, 1, 1)): 2}
+    assert deltas.nutrients[(1, date(2024, 1, 1), 'Macronutrient', 'Protein', 'g')] == [Decimal('20.00000000'), 1]
+
+
+def test_moving_a_meal_to_another_day_moves_its_count():
+    deltas = meal_contributions(1, datetime(2024, 1, 1, 8), [], sign=-1)
+    meal_contributions(1, datetime(2024, 1, 2, 8), [], into=deltas)
+    cursor = RecordingCursor()
+
+    apply_rollup_deltas(cursor, deltas)
+
+    (upsert, upsert_params), (delete, delete_params) = cursor.statements
+    assert upsert.startswith('INSERT INTO DailyMealCounts')
+    assert upsert_params == [1, date(2024, 1, 1), -1, 1, date(2024, 1, 2), 1]
+    assert delete.startswith('DELETE FROM DailyMealCounts') and 'Meals <= 0' in delete
+    assert delete_params == [1, date(2024, 1, 1)]
+
+
+def test_editing_a_meal_within_its_day_leaves_the_count_alone():
+    deltas = meal_contributions(1, datetime(2024, 1, 1, 8), [], sign=-1)
+    meal_contributions(1, datetime(2024, 1, 1, 9), [], into=deltas)
+    cursor = RecordingCursor()
+
+    apply_rollup_deltas(cursor, deltas)
+
+    assert cursor.statements == []
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from backend.db import ConnectionPool, PoolTimeoutError
+
+
+class RawConnection:
+    server_status = 0
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ConnectionPool({}, min_size=0, max_size=1, checkout_timeout=5)
+    monkeypatch.setattr(pool, '_connect', RawConnection)
+    return pool
+
+
+def test_a_checkout_that_wakes_up_several_times_counts_one_wait(pool):
+    held = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+
+    # Wake the waiter without freeing a connection, as notify races and spurious wakeups do
+    for _ in range(5):
+        time.sleep(0.02)
+        with pool._cond:
+            pool._cond.notify_all()
+    held.close()
+    waiter.join(timeout=5)
+
+    assert len(acquired) == 1
+    assert pool.stats()['waits'] == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_a_checkout_that_times_out_counts_one_wait(pool):
+    pool.checkout_timeout = 0.05
+    held = pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    assert pool.stats()['waits'] == 1 and pool.stats()['timeouts'] == 1
+    held.close()
@@ -0,0 +1,84 @@
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pymysql
+
+from backend.meals.meal_routes import EXPORT_CHUNK_LINES, EXPORT_FETCH_SIZE
+
+NUTRIENTS_PER_MEAL = 5
+
+
+def export_history(meal_count, produced):
+    """Handler serving a client's joined (meal, nutrient) rows from a generator, counting rows read"""
+    start = datetime(2020, 1, 1)
+
+    def rows():
+        for meal_id in range(1, meal_count + 1):
+            for n in range(NUTRIENTS_PER_MEAL):
+                produced[0] += 1
+                yield {'MealID': meal_id, 'Datetime': start + timedelta(minutes=meal_id), 'Notes': 'lunch',
+                       'ClientID': 1, 'NutrientID': meal_id * 10 + n, 'Name': f'nutrient {n}',
+                       'Category': 'Macronutrient', 'Quantity': Decimal('12.50'), 'Unit': 'g'}
+
+    def handler(query, params):
+        if query.startswith('SELECT ID FROM Client'):
+            return [{'ID': 1}]
+        if 'FROM MealLog ml' in query:
+            return rows()
+        return []
+    return handler
+
+
+def export_cursor(fake_db):
+    conn, = fake_db.connections
+    cursor, = [cursor for cursor in conn.cursors if any('FROM MealLog' in q for q in cursor.executed)]
+    return conn, cursor
+
+
+def test_export_streams_rows_from_an_unbuffered_cursor(client, fake_db):
+    produced = [0]
+    meal_count = 10000
+    fake_db.handler = export_history(meal_count, produced)
+
+    response = client.get('/api/meal-logs/export?client_id=1')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    conn, cursor = export_cursor(fake_db)
+    assert cursor.cursor_class is pymysql.cursors.SSDictCursor
+    # Nothing is read before the body is consumed
+    assert produced[0] == 0
+
+    chunks = iter(response.response)
+    first = next(chunks)
+    # The first chunk only needs its own meals' rows (plus the rest of one fetch)
+    assert produced[0] <= EXPORT_CHUNK_LINES * NUTRIENTS_PER_MEAL + EXPORT_FETCH_SIZE
+    assert not conn.closed
+
+    lines = (first + ''.join(chunks)).splitlines()
+    assert len(lines) == meal_count
+    assert produced[0] == meal_count * NUTRIENTS_PER_MEAL
+    assert len(json.loads(lines[-1])['nutrients']) == NUTRIENTS_PER_MEAL
+    assert cursor.closed and conn.closed
+
+
+def test_export_memory_does_not_grow_with_the_history(client, fake_db):
+    def peak_bytes(meal_count):
+        fake_db.connections.clear()
+        fake_db.handler = export_history(meal_count, [0])
+        tracemalloc.start()
+        try:
+            response = client.get('/api/meal-logs/export?client_id=1&format=csv')
+            lines = sum(chunk.count('\n') for chunk in response.response)
+            assert lines == meal_count * NUTRIENTS_PER_MEAL + 1
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small = peak_bytes(1000)
+    large = peak_bytes(10000)
+    # Ten times the rows (50k lines) stays within the same couple of chunks of memory
+    assert large < small * 2
@@ -0,0 +1,150 @@
+import threading
+import time
+
+import pymysql
+import pytest
+
+import backend.idempotency
+from backend.idempotency import IdempotencyStore
+
+THREADS = 8
+
+
+class KeyTable:
+    """The IdempotencyKey table, answering the statements IdempotencyStore runs"""
+
+    def __init__(self):
+        self.rows = {}
+        self.lock = threading.Lock()
+        self.failing_updates = 0
+
+    def handle(self, query, params):
+        with self.lock:
+            if query.startswith('INSERT INTO IdempotencyKey'):
+                key_hash, request_hash, _ = params
+                if key_hash in self.rows:
+                    raise pymysql.err.IntegrityError(1062, "Duplicate entry for key 'PRIMARY'")
+                self.rows[key_hash] = {'RequestHash': request_hash, 'Status': None, 'ContentType': None,
+                                       'Body': None, 'ttl_left': 86400, 'expired': 0, 'abandoned': 0}
+            elif query.startswith('SELECT RequestHash'):
+                row = self.rows.get(params[1])
+                return [dict(row)] if row else []
+            elif query.startswith('UPDATE IdempotencyKey SET Status'):
+                if self.failing_updates:
+                    self.failing_updates -= 1
+                    raise pymysql.err.OperationalError(2013, 'Lost connection to MySQL server during query')
+                status, content_type, body, key_hash = params
+                self.rows[key_hash].update(Status=status, ContentType=content_type, Body=body)
+            elif query.startswith('DELETE FROM IdempotencyKey WHERE KeyHash'):
+                if self.rows.get(params[0], {}).get('Status', 0) is None:
+                    del self.rows[params[0]]
+        return []
+
+
+def run_together(target, count=THREADS):
+    """Start count threads on target(i) at the same moment; return their results in order"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def run(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.fixture
+def keys(fake_db, monkeypatch):
+    table = KeyTable()
+    monkeypatch.setattr(backend.idempotency, 'idempotency_store', IdempotencyStore(wait_timeout=5))
+    return table
+
+
+def test_concurrent_meal_posts_with_one_key_insert_one_meal(client, fake_db, keys):
+    def handler(query, params):
+        if 'IdempotencyKey' in query:
+            return keys.handle(query, params)
+        if query.startswith('SELECT ID FROM Client'):
+            return [{'ID': 1}]
+        if query.startswith('INSERT INTO MealLog'):
+            time.sleep(0.05)  # keep the first request in flight while the others arrive
+        return []
+    fake_db.handler = handler
+    body = {'client_id': 1, 'notes': 'oatmeal', 'datetime': '2024-01-01 08:00:00'}
+
+    responses = run_together(lambda i: client.post(
+        '/api/meal-logs', json=body, headers={'Idempotency-Key': 'meal-1'}))
+
+    assert len(fake_db.queries('INSERT INTO MealLog')) == 1
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.get_data() for response in responses}) == 1
+    replayed = [response.headers.get('Idempotent-Replayed') == 'true' for response in responses]
+    assert replayed.count(False) == 1
+
+
+def test_processes_sharing_the_key_table_run_the_handler_once(app, fake_db, keys):
+    fake_db.handler = keys.handle
+    # One store per API process; they only share the key table
+    stores = [IdempotencyStore(wait_timeout=5), IdempotencyStore(wait_timeout=5)]
+    runs = []
+
+    def handler():
+        runs.append(1)
+        time.sleep(0.1)
+        return app.response_class('{"id": 7}', status=201, content_type='application/json')
+
+    def post(i):
+        with app.test_request_context('/api/meal-logs', method='POST'):
+            response = app.make_response(stores[i % 2].run(b'key', b'request', handler))
+            return response.status_code, response.get_data()
+
+    results = run_together(post)
+
+    assert len(runs) == 1
+    assert set(results) == {(201, b'{"id": 7}')}
+
+
+def test_failed_request_releases_the_key(app, fake_db, keys):
+    fake_db.handler = keys.handle
+    store = IdempotencyStore(wait_timeout=5)
+    statuses = iter([503, 201])
+
+    def handler():
+        return app.response_class('{}', status=next(statuses), content_type='application/json')
+
+    with app.test_request_context('/api/meal-logs', method='POST'):
+        assert store.run(b'key', b'request', handler).status_code == 503
+        assert store.run(b'key', b'request', handler).status_code == 201
+        assert store.run(b'key', b'request', handler).headers['Idempotent-Replayed'] == 'true'
+
+
+def test_response_is_kept_when_storing_it_fails(app, fake_db, keys):
+    fake_db.handler = keys.handle
+    keys.failing_updates = 1
+    # One store per API process; they only share the key table
+    first, other = IdempotencyStore(wait_timeout=5), IdempotencyStore(wait_timeout=5)
+    runs = []
+
+    def handler():
+        runs.append(1)
+        return app.response_class('{"id": 7}', status=201, content_type='application/json')
+
+    with app.test_request_context('/api/meal-logs', method='POST'):
+        # The meal is committed, so the client gets its 201 even though the key row was not updated
+        assert first.run(b'key', b'request', handler).status_code == 201
+        assert keys.rows[b'key']['Status'] is None
+        assert first.run(b'key', b'request', handler).headers['Idempotent-Replayed'] == 'true'
+
+        # The process writes the row on its next claim, so other processes replay it too
+        first.run(b'next key', b'request', handler)
+        assert keys.rows[b'key']['Status'] == 201
+        replayed = other.run(b'key', b'request', handler)
+
+    assert replayed.headers['Idempotent-Replayed'] == 'true' and replayed.get_data() == b'{"id": 7}'
+    assert len(runs) == 2  # the first key and the next one, never the first key again
+    assert first.stats()['unsaved_keys'] == 0
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+
+def meal_history(meal_count, nutrients_per_meal=3):
+    """Handler answering the meal-log list queries for one client's history"""
+    start = datetime(2024, 1, 1, 8)
+    meals = [{'ID': meal_id, 'Datetime': start + timedelta(hours=meal_id), 'Notes': f'meal {meal_id}',
+              'ClientID': 1} for meal_id in range(meal_count, 0, -1)]
+
+    def handler(query, params):
+        if 'FROM MealLog' in query:
+            return meals[:params[-1]] if 'LIMIT' in query else meals
+        if 'FROM Nutrient' in query:
+            return [{'ID': meal_id * 10 + n, 'Name': f'nutrient {n}', 'Category': 'Macronutrient',
+                     'Quantity': Decimal('1.50'), 'Unit': 'g', 'MealLogID': meal_id}
+                    for meal_id in sorted(params) for n in range(nutrients_per_meal)]
+        return []
+    return handler
+
+
+@pytest.mark.parametrize('meal_count', [1, 40, 400])
+def test_nutrients_are_fetched_in_one_query(client, fake_db, meal_count):
+    fake_db.handler = meal_history(meal_count)
+
+    response = client.get('/api/meal-logs?client_id=1')
+
+    assert response.status_code == 200
+    meals = response.get_json()
+    assert len(meals) == meal_count
+    assert all(len(meal['nutrients']) == 3 for meal in meals)
+    # One query for the meals and one for all of their nutrients, however many meals
+    assert len(fake_db.statements) == 2
+    assert len(fake_db.queries('FROM Nutrient')) == 1
+
+
+def test_page_of_meals_costs_two_queries(client, fake_db):
+    fake_db.handler = meal_history(400)
+
+    response = client.get('/api/meal-logs?client_id=1&limit=50')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['items']) == 50
+    assert len(fake_db.statements) == 2
+    nutrient_query, nutrient_params = fake_db.statements[1]
+    assert 'FROM Nutrient' in nutrient_query and len(nutrient_params) == 50
+
+
+def test_projection_without_nutrients_skips_the_nutrient_query(client, fake_db):
+    fake_db.handler = meal_history(400)
+
+    response = client.get('/api/meal-logs?client_id=1&fields=id,datetime')
+
+    assert response.status_code == 200
+    assert set(response.get_json()[0]) == {'id', 'datetime'}
+    assert len(fake_db.statements) == 1
+
+
+def stored_meal(query, params):
+    if query.startswith('SELECT * FROM MealLog'):
+        return [{'ID': 5, 'Datetime': datetime(2024, 1, 1, 8), 'Notes': 'lunch', 'ClientID': 1}]
+    return []
+
+
+@pytest.mark.parametrize('method', ['PUT', 'PATCH'])
+@pytest.mark.parametrize('body', [
+    {'nutrients': [{'name': 'Protein', 'category': 'Macronutrient', 'quantity': 'nan', 'unit': 'g'}]},
+    {'nutrients': [{'name': 'Protein', 'category': 'Macronutrient', 'quantity': 'inf', 'unit': 'g'}]},
+    {'nutrients': [{'name': 'Protein', 'category': 'Macronutrient', 'quantity': '1e12', 'unit': 'g'}]},
+    {'nutrients': [{'name': 'Protein', 'category': 'Macronutrient', 'quantity': True, 'unit': 'g'}]},
+    {'datetime': '2040-01-01 08:00:00'},
+    {'datetime': '1969-12-31 08:00:00'},
+    {'datetime': None},
+], ids=['nan', 'inf', 'too-large', 'bool', 'after-2038', 'before-1970', 'null-datetime'])
+def test_update_rejects_values_the_columns_cannot_store(client, fake_db, method, body):
+    fake_db.handler = stored_meal
+
+    response = client.request(method, '/api/meal-logs/5', json=body)
+
+    assert response.status_code == 400
+    assert not fake_db.queries('UPDATE') and not fake_db.queries('INSERT')
+
+
+@pytest.mark.parametrize('method', ['PUT', 'PATCH'])
+def test_update_accepts_a_valid_datetime(client, fake_db, method):
+    fake_db.handler = stored_meal
+
+    response = client.request(method, '/api/meal-logs/5', json={'datetime': '2024-01-02 09:00:00'})
+
+    assert response.status_code == 200
+    (update, params), = [s for s in fake_db.statements if s[0].startswith('UPDATE MealLog')]
+    assert params == [datetime(2024, 1, 2, 9), 5]
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from backend.metrics import ResponseTimeSampler
+
+
+def test_sampler_flush_adds_sums_and_counts_per_minute(fake_db):
+    sampler = ResponseTimeSampler(rate=1, flush_interval=60)
+    sampler._buffer = [
+        (datetime(2024, 1, 1, 10, 0, 5), 0.100),
+        (datetime(2024, 1, 1, 10, 0, 40), 0.200),
+        (datetime(2024, 1, 1, 10, 0, 59), 0.600),
+        (datetime(2024, 1, 1, 10, 1, 0), 0.050),
+    ]
+
+    assert sampler.flush() == 2
+
+    (query, params), = fake_db.statements
+    assert params == [datetime(2024, 1, 1, 10, 0), 300, 900.0, 3,
+                      datetime(2024, 1, 1, 10, 1), 50, 50.0, 1]
+    # A minute flushed again (or by another process) is weighted by its sample count, not halved
+    assert ("ResponseTime = ROUND((CEOAPIResponseTime.TotalMs + sample.TotalMs) "
+            "/ (CEOAPIResponseTime.Samples + sample.Samples))") in query
+    assert "Samples = CEOAPIResponseTime.Samples + sample.Samples" in query
+
+
+def test_sampler_flush_without_samples_writes_nothing(fake_db):
+    assert ResponseTimeSampler(rate=1, flush_interval=60).flush() == 0
+    assert fake_db.statements == []
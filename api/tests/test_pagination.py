@@ -0,0 +1,59 @@
+import base64
+
+import pytest
+
+from backend.pagination import encode_cursor
+
+
+def raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('path', ['/api/clients', '/api/clients/search'])
+@pytest.mark.parametrize('token', [
+    'not a cursor',
+    raw_cursor('[[1]]'),
+    raw_cursor('[{"id": 1}]'),
+    raw_cursor('[null]'),
+    raw_cursor('[1e999]'),
+    raw_cursor('["x"]'),
+    raw_cursor('{"0": 1}'),
+])
+def test_client_lists_reject_tampered_cursors(client, fake_db, path, token):
+    response = client.get(f'{path}?limit=10&cursor={token}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+    assert fake_db.statements == []
+
+
+@pytest.mark.parametrize('token', [
+    'not a cursor',
+    raw_cursor('[null, 1]'),
+    raw_cursor('[["2024-01-01 00:00:00"], 1]'),
+    raw_cursor('["2024-01-01 00:00:00", [1]]'),
+    raw_cursor('["2024-01-01 00:00:00", 1e999]'),
+    raw_cursor('["yesterday", 1]'),
+    raw_cursor('["2024-01-01 00:00:00"]'),
+])
+def test_meal_log_list_rejects_tampered_cursors(client, fake_db, token):
+    response = client.get(f'/api/meal-logs?client_id=1&limit=10&cursor={token}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+    assert fake_db.statements == []
+
+
+def test_valid_cursor_continues_after_the_last_row(client, fake_db):
+    response = client.get(f"/api/clients?limit=10&cursor={encode_cursor(42)}")
+
+    assert response.status_code == 200
+    query, params = fake_db.statements[0]
+    assert 'ID > %s' in query and params[-2:] == [42, 11]
+
+
+def test_bad_limit_keeps_its_message(client, fake_db):
+    response = client.get('/api/meal-logs?client_id=1&limit=0')
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "limit must be between 1 and 1000"}
@@ -0,0 +1,79 @@
+import os
+import re
+import sys
+from datetime import datetime
+
+import pymysql
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from explain_hot_queries import HOT_QUERIES, check  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def live_cursor():
+    """Cursor on the MySQL database from the environment (the tests skip without one)"""
+    from backend.db import _connect_kwargs
+
+    try:
+        conn = pymysql.connect(connect_timeout=2, **_connect_kwargs())
+    except pymysql.err.OperationalError as e:
+        pytest.skip(f"EXPLAIN checks need the MySQL database: {e}")
+    cursor = conn.cursor()
+    yield cursor
+    cursor.close()
+    conn.close()
+
+
+@pytest.mark.parametrize('name, sql, params', HOT_QUERIES, ids=[name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_an_index(live_cursor, name, sql, params):
+    assert check(live_cursor, name, sql, params) == []
+
+
+class PlanCursor:
+    def __init__(self, plan):
+        self.plan = plan
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+
+    def fetchall(self):
+        return self.plan
+
+
+def test_check_reports_full_scans_on_large_tables():
+    cursor = PlanCursor([
+        {'table': 'ml', 'type': 'ALL', 'possible_keys': None},
+        {'table': 't', 'type': 'ALL', 'possible_keys': None},
+        {'table': 'n', 'type': 'ref', 'possible_keys': 'idx_nutrient_meallog_type'},
+    ])
+
+    problems = check(cursor, 'meals', "SELECT 1", ())
+
+    assert cursor.executed == ["EXPLAIN SELECT 1"]
+    # NutrientType is a small catalog; only the MealLog scan counts
+    assert problems == ["meals: full scan on MealLog (possible_keys=None)"]
+
+
+def where_clause(query):
+    match = re.search(r'\bWHERE\b(.*?)(\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)', query)
+    return match.group(1) if match else ''
+
+
+@pytest.mark.parametrize('path', [
+    '/api/meal-logs?client_id=1&date_from=2024-01-01&date_to=2024-01-31',
+    '/api/meal-logs/export?client_id=1&date_from=2024-01-01&date_to=2024-01-31',
+])
+def test_meal_date_filters_compare_the_indexed_column(client, fake_db, path):
+    fake_db.handler = lambda query, params: [{'ID': 1}] if query.startswith('SELECT ID FROM Client') else []
+    response = client.get(path)
+    response.get_data()  # runs a streamed export to the end
+
+    meal_queries = [(query, params) for query, params in fake_db.statements if 'FROM MealLog' in query]
+    assert meal_queries
+    for query, params in meal_queries:
+        # A function around Datetime would hide the (ClientID, Datetime) index
+        assert 'DATE(' not in where_clause(query)
+        assert 'Datetime >=' in query and 'Datetime <' in query
+        assert datetime(2024, 2, 1) in params  # half-open: before the day after the last one
@@ -0,0 +1,159 @@
+from datetime import datetime
+from decimal import InvalidOperation
+
+import pymysql
+import pytest
+
+from backend.db import PoolTimeoutError
+from backend.meals import meal_routes
+from backend.meals.write_behind import MAX_ATTEMPTS, MealQueue, is_transient
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = MealQueue(str(tmp_path / 'meal_queue.sqlite3'), enabled=True, batch_size=10)
+    monkeypatch.setattr(queue, 'start', lambda: None)  # drained by the test, not a thread
+    return queue
+
+
+@pytest.fixture
+def mysql(fake_db, monkeypatch):
+    """Every client exists; insert_meal_batch raises whatever errors[notes] holds"""
+    state = {'errors': {}, 'inserted': [], 'next_id': 100}
+
+    def handler(query, params):
+        if query.startswith('SELECT ID FROM Client'):
+            return [{'ID': client_id} for client_id in params]
+        return []
+
+    def insert_meal_batch(cursor, meals, now):
+        for meal in meals:
+            error = state['errors'].get(meal['notes'])
+            if isinstance(error, list):
+                error = error.pop(0) if error else None
+            if error is not None:
+                raise error
+        first_id = state['next_id']
+        state['next_id'] += len(meals)
+        state['inserted'].extend(meal['notes'] for meal in meals)
+        return first_id
+
+    fake_db.handler = handler
+    monkeypatch.setattr(meal_routes, 'insert_meal_batch', insert_meal_batch)
+    monkeypatch.setattr(meal_routes, 'resolve_meal_nutrients', lambda meals: None)
+    return state
+
+
+def enqueue(queue, *notes):
+    return [queue.enqueue({'client_id': 1, 'notes': note, 'datetime': datetime(2024, 1, 1, 12),
+                           'nutrients': []}) for note in notes]
+
+
+def test_bad_entry_fails_alone(queue, mysql):
+    mysql['errors']['bad'] = pymysql.err.DataError(1406, "Data too long for column 'Notes'")
+    first, bad, last = enqueue(queue, 'first', 'bad', 'last')
+
+    assert queue.drain_once() == 3
+
+    assert queue.status(first)['status'] == 'created'
+    assert queue.status(last)['status'] == 'created'
+    assert queue.status(bad) == {'provisional_id': bad, 'status': 'failed',
+                                 'error': "Database error: (1406, \"Data too long for column 'Notes'\")"}
+    assert mysql['inserted'] == ['first', 'last']
+
+
+def test_python_error_does_not_block_the_queue(queue, mysql):
+    mysql['errors']['nan'] = InvalidOperation()
+    bad, = enqueue(queue, 'nan')
+
+    assert queue.drain_once() == 1
+    assert queue.status(bad)['status'] == 'failed'
+
+    later, = enqueue(queue, 'later')
+    assert queue.drain_once() == 1
+    assert queue.status(later)['status'] == 'created'
+
+
+def test_outage_retries_without_using_attempts(queue, mysql):
+    outage = [pymysql.err.OperationalError(2003, "Can't connect to MySQL server")] * (MAX_ATTEMPTS * 2)
+    mysql['errors']['meal'] = outage
+    entries = enqueue(queue, 'meal', 'meal')
+
+    for _ in range(MAX_ATTEMPTS * 2):
+        with pytest.raises(pymysql.err.OperationalError):
+            queue.drain_once()
+        assert queue.stats()['pending'] == 2
+
+    assert queue.drain_once() == 2
+    assert [queue.status(entry)['status'] for entry in entries] == ['created', 'created']
+
+
+def test_other_server_errors_fail_after_max_attempts(queue, mysql):
+    mysql['errors']['meal'] = pymysql.err.InternalError(1030, "Got error from storage engine")
+    entry, = enqueue(queue, 'meal')
+
+    for _ in range(MAX_ATTEMPTS - 1):
+        queue.drain_once()
+        assert queue.status(entry)['status'] == 'queued'
+    queue.drain_once()
+    assert queue.status(entry)['status'] == 'failed'
+
+
+@pytest.mark.parametrize('error, transient', [
+    (pymysql.err.OperationalError(2013, 'Lost connection to MySQL server during query'), True),
+    (pymysql.err.OperationalError(1213, 'Deadlock found when trying to get lock'), True),
+    (pymysql.err.OperationalError(1205, 'Lock wait timeout exceeded'), True),
+    (pymysql.err.InterfaceError(0, ''), True),
+    (PoolTimeoutError('No database connection available after 5s'), True),
+    (pymysql.err.OperationalError(1292, 'Incorrect datetime value'), False),
+    (pymysql.err.IntegrityError(1452, 'Cannot add or update a child row'), False),
+    (InvalidOperation(), False),
+    (KeyError('client_id'), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_keyed_posts_are_deduplicated_in_the_journal_while_mysql_is_down(client, fake_db, queue, mysql,
+                                                                        monkeypatch):
+    monkeypatch.setattr(meal_routes, 'meal_queue', queue)
+    drained_handler = fake_db.handler
+
+    def down(query, params):
+        raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+    fake_db.handler = down
+    body = {'client_id': 1, 'notes': 'oatmeal', 'datetime': '2024-01-01 08:00:00'}
+
+    responses = [client.post('/api/meal-logs', json=body, headers={'Idempotency-Key': 'meal-1'})
+                 for _ in range(3)]
+    reused = client.post('/api/meal-logs', json={**body, 'notes': 'toast'}, headers={'Idempotency-Key': 'meal-1'})
+
+    assert [response.status_code for response in responses] == [202, 202, 202]
+    assert len({response.get_json()['provisional_id'] for response in responses}) == 1
+    assert [response.headers.get('Idempotent-Replayed') for response in responses] == [None, 'true', 'true']
+    assert reused.status_code == 422
+    assert fake_db.connections == []  # acknowledged without MySQL
+
+    fake_db.handler = drained_handler
+    assert queue.drain_once() == 1
+    assert mysql['inserted'] == ['oatmeal']
+
+
+@pytest.mark.parametrize('write_behind', [False, True], ids=['synchronous', 'queued'])
+@pytest.mark.parametrize('body', [
+    {'client_id': 1, 'notes': 'x', 'nutrients': [{'name': 'Fat', 'category': 'Macronutrient',
+                                                  'quantity': 'nan', 'unit': 'g'}]},
+    {'client_id': 1, 'notes': 'x', 'nutrients': [{'name': 'Fat', 'category': 'Macronutrient',
+                                                  'quantity': '1e12', 'unit': 'g'}]},
+    {'client_id': 1, 'notes': 'x', 'datetime': '2040-01-01 08:00:00'},
+    {'client_id': 'one', 'notes': 'x'},
+    {'notes': 'x'},
+], ids=['nan', 'too-large', 'after-2038', 'client-id', 'missing-client'])
+def test_both_modes_reject_the_same_meals(client, fake_db, queue, monkeypatch, write_behind, body):
+    queue.enabled = write_behind
+    monkeypatch.setattr(meal_routes, 'meal_queue', queue)
+
+    response = client.post('/api/meal-logs', json=body)
+
+    assert response.status_code == 400
+    assert fake_db.statements == [] and queue.stats()['pending'] == 0
@@ -0,0 +1,12 @@
+###
+# WSGI entry point for production serving
+###
+#
+#     gunicorn -c gunicorn.conf.py wsgi:app
+#
+# backend_app.py's __main__ block runs Flask's single-process debug server
+# for development (or execs the command above when API_MODE=production).
+
+from backend_app import create_app
+
+app = create_app()
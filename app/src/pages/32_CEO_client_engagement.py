@@ -18,14 +18,21 @@ This page provides detailed analytics on client engagement with the MacroMates p
 
 API_BASE_URL = "http://host.docker.internal:4000/api" 
 
+# Load every panel on this page with a single request
 try:
-    response = requests.get(f"{API_BASE_URL}/ceo/engagement_indicators") 
+    response = requests.get(f"{API_BASE_URL}/ceo/dashboard",
+                            params={"panels": "engagement_indicators,daily_active_users,client_activity"})
     response.raise_for_status()
-    engagement_data = response.json()
-    engagement_df = pd.DataFrame(engagement_data)
+    dashboard = response.json()
 except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching engagement indicators: {e}")
-    engagement_df = pd.DataFrame()
+    st.error(f"Error fetching client engagement data: {e}")
+    dashboard = {"panels": {}, "errors": {}}
+
+panels = dashboard["panels"]
+for panel, error in dashboard["errors"].items():
+    st.error(f"Error fetching {panel.replace('_', ' ')}: {error}")
+
+engagement_df = pd.DataFrame(panels.get("engagement_indicators", []))
 
 st.subheader("Key Engagement Indicators")
 if not engagement_df.empty:
@@ -35,13 +42,7 @@ else:
 
 st.markdown("""---""")
 
-try:
-    response = requests.get(f"{API_BASE_URL}/ceo/daily_active_users")
-    response.raise_for_status()
-    chart_data = pd.DataFrame(response.json())
-except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching daily active users: {e}")
-    chart_data = pd.DataFrame()
+chart_data = pd.DataFrame(panels.get("daily_active_users", []))
 
 st.subheader("Daily Active Users Trend")
 if not chart_data.empty:
@@ -54,14 +55,7 @@ if not chart_data.empty:
 else:
     st.warning("Daily active users data not available.")
 
-try:
-    response = requests.get(f"{API_BASE_URL}/ceo/client_activity")
-    response.raise_for_status()
-    client_data = response.json()
-    client_df = pd.DataFrame(client_data)
-except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching client activity data: {e}")
-    client_df = pd.DataFrame()
+client_df = pd.DataFrame(panels.get("client_activity", []))
 
 st.subheader("Client Activity")
 if not client_df.empty:
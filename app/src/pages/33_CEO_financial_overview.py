@@ -18,14 +18,21 @@ This page provides insights into MacroMates' financial performance.
 
 API_BASE_URL = "http://host.docker.internal:4000/api"
 
+# Load every panel on this page with a single request
 try:
-    response = requests.get(f"{API_BASE_URL}/ceo/financial_indicators") 
+    response = requests.get(f"{API_BASE_URL}/ceo/dashboard",
+                            params={"panels": "financial_indicators,revenue_trend,expense_breakdown"})
     response.raise_for_status()
-    financial_data = response.json()
-    financial_df = pd.DataFrame(financial_data)
+    dashboard = response.json()
 except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching financial indicators: {e}")
-    financial_df = pd.DataFrame()
+    st.error(f"Error fetching financial overview data: {e}")
+    dashboard = {"panels": {}, "errors": {}}
+
+panels = dashboard["panels"]
+for panel, error in dashboard["errors"].items():
+    st.error(f"Error fetching {panel.replace('_', ' ')}: {error}")
+
+financial_df = pd.DataFrame(panels.get("financial_indicators", []))
 
 ## Display Financial Metrics
 st.subheader("Key Financial Indicators")
@@ -39,13 +46,7 @@ else:
 
 st.markdown("""---""")
 
-try:
-    response = requests.get(f"{API_BASE_URL}/ceo/revenue_trend") 
-    response.raise_for_status()
-    revenue_data = pd.DataFrame(response.json())
-except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching revenue trend: {e}")
-    revenue_data = pd.DataFrame()
+revenue_data = pd.DataFrame(panels.get("revenue_trend", []))
 
 st.subheader("Monthly Revenue Trend")
 if not revenue_data.empty:
@@ -58,14 +59,7 @@ if not revenue_data.empty:
 else:
     st.warning("Revenue trend data not available.")
 
-try:
-    response = requests.get(f"{API_BASE_URL}/ceo/expense_breakdown")
-    response.raise_for_status()
-    expenses_data = response.json()
-    expenses_df = pd.DataFrame(expenses_data)
-except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching expense breakdown: {e}")
-    expenses_df = pd.DataFrame()
+expenses_df = pd.DataFrame(panels.get("expense_breakdown", []))
 
 st.subheader("Expense Breakdown")
 if not expenses_df.empty:
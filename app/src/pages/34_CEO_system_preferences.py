@@ -18,14 +18,21 @@ This page provides insights into the performance and health of the MacroMates sy
 
 API_BASE_URL = "http://host.docker.internal:4000/api"
 
+# Load every panel on this page with a single request
 try:
-    response = requests.get(f"{API_BASE_URL}/ceo/performance_indicators")  
+    response = requests.get(f"{API_BASE_URL}/ceo/dashboard",
+                            params={"panels": "performance_indicators,api_response_time,user_traffic"})
     response.raise_for_status()
-    performance_data = response.json()
-    performance_df = pd.DataFrame(performance_data)
+    dashboard = response.json()
 except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching performance indicators: {e}")
-    performance_df = pd.DataFrame()
+    st.error(f"Error fetching system performance data: {e}")
+    dashboard = {"panels": {}, "errors": {}}
+
+panels = dashboard["panels"]
+for panel, error in dashboard["errors"].items():
+    st.error(f"Error fetching {panel.replace('_', ' ')}: {error}")
+
+performance_df = pd.DataFrame(panels.get("performance_indicators", []))
 
 st.subheader("Key Performance Indicators")
 if not performance_df.empty:
@@ -38,13 +45,7 @@ else:
 
 st.markdown("""---""")
 
-try:
-    response = requests.get(f"{API_BASE_URL}/ceo/api_response_time")
-    response.raise_for_status()
-    response_time_data = pd.DataFrame(response.json())
-except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching API response time: {e}")
-    response_time_data = pd.DataFrame()
+response_time_data = pd.DataFrame(panels.get("api_response_time", []))
 
 st.subheader("API Response Time (Last 24 Hours)")
 if not response_time_data.empty:
@@ -57,13 +58,7 @@ if not response_time_data.empty:
 else:
     st.warning("API response time data not available.")
 
-try:
-    response = requests.get(f"{API_BASE_URL}/ceo/user_traffic") 
-    response.raise_for_status()
-    traffic_data = pd.DataFrame(response.json())
-except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching user traffic data: {e}")
-    traffic_data = pd.DataFrame()
+traffic_data = pd.DataFrame(panels.get("user_traffic", []))
 
 st.subheader("User Traffic by Hour")
 if not traffic_data.empty:
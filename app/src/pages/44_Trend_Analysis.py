@@ -15,6 +15,8 @@ if 'authenticated' not in st.session_state or not st.session_state['authenticate
 # Set up the sidebar navigation
 SideBarLinks()
 
+API_BASE_URL = "http://host.docker.internal:4000/api"
+
 # Page header
 st.title('Trend Analysis Tools')
 st.write('Analyze dietary habits over time (weekly/monthly/yearly)')
@@ -23,7 +25,7 @@ st.write('Analyze dietary habits over time (weekly/monthly/yearly)')
 @st.cache_data(ttl=300)  # Cache for 5 minutes
 def fetch_clients():
     try:
-        response = requests.get('http://api:5000/clients')
+        response = requests.get(f'{API_BASE_URL}/clients')
         if response.status_code == 200:
             return response.json()
         else:
@@ -38,7 +40,7 @@ def fetch_clients():
 def fetch_trend_analysis(client_id, period, start_date, end_date, nutrients):
     try:
         response = requests.get(
-            'http://api:5000/trend-analysis',
+            f'{API_BASE_URL}/trend-analysis',
             params={
                 'client_id': client_id,
                 'period': period,
@@ -0,0 +1,10 @@
+-- Migration 07: composite indexes for the meal log read paths
+USE NutritionBuddy;
+
+-- Meal history, daily summaries and dashboards filter a client's meals by time range:
+--   WHERE ClientID = ? AND Datetime >= ? AND Datetime < ?
+CREATE INDEX idx_meallog_client_datetime ON MealLog (ClientID, Datetime);
+
+-- Nutrients are always looked up through their meal, often for specific nutrient names:
+--   WHERE MealLogID IN (...) [AND Name = ?]
+CREATE INDEX idx_nutrient_meallog_name ON Nutrient (MealLogID, Name);
@@ -0,0 +1,27 @@
+-- Migration 08: daily nutrient rollup maintained by the meal log routes
+USE NutritionBuddy;
+
+-- One row per client, day and nutrient. The meal create/update/delete routes
+-- apply deltas to it; backend/meals/rollup.py can rebuild it from MealLog/Nutrient.
+CREATE TABLE IF NOT EXISTS DailyNutrientTotals (
+ ClientID INT NOT NULL,
+ Day DATE NOT NULL,
+ Category VARCHAR(255) NOT NULL DEFAULT '',
+ Name VARCHAR(255) NOT NULL DEFAULT '',
+ Unit VARCHAR(50) NOT NULL DEFAULT '',
+ Total DECIMAL(14,2) NOT NULL DEFAULT 0,
+ MealCount INT NOT NULL DEFAULT 0,
+ PRIMARY KEY (ClientID, Day, Category, Name, Unit),
+ FOREIGN KEY (ClientID) REFERENCES Client(ID)
+);
+
+-- Backfill from the existing meal logs
+INSERT INTO DailyNutrientTotals (ClientID, Day, Category, Name, Unit, Total, MealCount)
+SELECT ml.ClientID, DATE(ml.Datetime),
+       COALESCE(n.Category, ''), COALESCE(n.Name, ''), COALESCE(n.Unit, ''),
+       SUM(n.Quantity), COUNT(DISTINCT ml.ID)
+FROM MealLog ml
+JOIN Nutrient n ON n.MealLogID = ml.ID
+WHERE ml.Datetime IS NOT NULL AND ml.ClientID IS NOT NULL
+GROUP BY ml.ClientID, DATE(ml.Datetime),
+         COALESCE(n.Category, ''), COALESCE(n.Name, ''), COALESCE(n.Unit, '');
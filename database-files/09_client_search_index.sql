@@ -0,0 +1,14 @@
+-- Migration 09: search indexes for client name/email lookups
+USE NutritionBuddy;
+
+-- The ngram parser indexes every 2-character sequence (MySQL's default
+-- ngram_token_size) of Name and Email, so any substring of two or more
+-- characters can be looked up instead of scanning with LIKE '%...%':
+--   WHERE MATCH(Name, Email) AGAINST ('"ann"' IN BOOLEAN MODE)
+-- The default stopword list would drop bigrams such as "an", "in" or "on",
+-- so the index is built without it. InnoDB keeps it current on every write.
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX ft_client_name_email ON Client (Name, Email) WITH PARSER ngram;
+
+-- Prefix matches (Name LIKE 'ann%'); Email already has its UNIQUE index
+CREATE INDEX idx_client_name ON Client (Name);
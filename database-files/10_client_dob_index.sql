@@ -0,0 +1,9 @@
+-- Migration 10: index for client age-range searches
+USE NutritionBuddy;
+
+-- /api/clients/search turns min_age/max_age into a DOB range:
+--   WHERE is_archived = FALSE AND DOB <= CURDATE() - INTERVAL 25 YEAR
+--                             AND DOB >  CURDATE() - INTERVAL 46 YEAR
+-- With is_archived first the default (non-archived) search is a single range
+-- scan; include_archived=true searches reach DOB through a skip scan.
+CREATE INDEX idx_client_archived_dob ON Client (is_archived, DOB);
@@ -0,0 +1,24 @@
+-- Migration 11: maintained client counts and a Timestamp index for /api/clients/stats
+USE NutritionBuddy;
+
+-- One row per Client.is_archived value. The client create/update/delete/
+-- archive/restore routes adjust it in the same transaction as their write;
+-- backend/clients/counters.py can recount it from Client.
+CREATE TABLE IF NOT EXISTS ClientCounts (
+ is_archived BOOLEAN NOT NULL PRIMARY KEY,
+ Total INT NOT NULL DEFAULT 0
+);
+
+-- Backfill from the existing clients
+INSERT INTO ClientCounts (is_archived, Total)
+SELECT * FROM (
+    SELECT states.is_archived, COUNT(c.ID) AS counted
+    FROM (SELECT FALSE AS is_archived UNION ALL SELECT TRUE) states
+    LEFT JOIN Client c ON c.is_archived = states.is_archived
+    GROUP BY states.is_archived
+) AS recount
+ON DUPLICATE KEY UPDATE Total = recount.counted;
+
+-- The stats trend reads a date window:
+--   WHERE Timestamp >= ? AND Timestamp < ?
+CREATE INDEX idx_systemperformance_timestamp ON SystemPerformance (Timestamp);
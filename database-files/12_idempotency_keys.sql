@@ -0,0 +1,18 @@
+-- Migration 12: idempotency keys for the meal write routes
+USE NutritionBuddy;
+
+-- One row per Idempotency-Key seen on a write route (see
+-- api/backend/idempotency.py). KeyHash is sha256(method, path, key), so the
+-- primary key is what lets only one request claim a key. Status stays NULL
+-- while the first request runs; afterwards Status/ContentType/Body hold the
+-- response that repeats of the key get back.
+CREATE TABLE IF NOT EXISTS IdempotencyKey (
+ KeyHash BINARY(32) NOT NULL PRIMARY KEY,
+ RequestHash BINARY(32) NOT NULL,
+ Status SMALLINT NULL,
+ ContentType VARCHAR(100) NULL,
+ Body MEDIUMBLOB NULL,
+ CreatedAt DATETIME NOT NULL,
+ ExpiresAt DATETIME NOT NULL,
+ INDEX idx_idempotencykey_expires (ExpiresAt)
+);
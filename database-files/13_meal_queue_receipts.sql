@@ -0,0 +1,14 @@
+-- Migration 13: receipts for meals drained from the write-behind journal
+USE NutritionBuddy;
+
+-- One row per journal entry inserted by the meal write-behind drainer
+-- (api/backend/meals/write_behind.py), written in the same transaction as
+-- the meal. After a crash the drainer looks entries up here so a batch that
+-- already committed is not inserted again. QueueName identifies the journal
+-- file; rows are deleted once their entry is finished.
+CREATE TABLE IF NOT EXISTS MealLogQueueReceipt (
+ QueueName VARCHAR(64) NOT NULL,
+ EntryID BIGINT NOT NULL,
+ MealLogID INT NOT NULL,
+ PRIMARY KEY (QueueName, EntryID)
+);
@@ -0,0 +1,44 @@
+-- Migration 14: NutrientType catalog; Nutrient rows reference it by a small integer ID
+USE NutritionBuddy;
+
+-- One row per distinct (Name, Category, Unit). Binary collation keeps names
+-- that differ only in case or accents apart, exactly as they were logged.
+-- backend/meals/nutrient_catalog.py caches it and adds new types on write.
+CREATE TABLE IF NOT EXISTS NutrientType (
+ ID MEDIUMINT UNSIGNED NOT NULL PRIMARY KEY AUTO_INCREMENT,
+ Name VARCHAR(255) COLLATE utf8mb4_bin NOT NULL,
+ Category VARCHAR(255) COLLATE utf8mb4_bin NOT NULL,
+ Unit VARCHAR(50) COLLATE utf8mb4_bin NOT NULL,
+ UNIQUE KEY uq_nutrienttype (Name, Category, Unit)
+);
+
+-- Backfill the catalog from the existing nutrients (missing values become '')
+INSERT IGNORE INTO NutrientType (Name, Category, Unit)
+SELECT DISTINCT COALESCE(Name, '') COLLATE utf8mb4_bin,
+                COALESCE(Category, '') COLLATE utf8mb4_bin,
+                COALESCE(Unit, '') COLLATE utf8mb4_bin
+FROM Nutrient;
+
+-- Point every nutrient at its type
+ALTER TABLE Nutrient ADD COLUMN NutrientTypeID MEDIUMINT UNSIGNED NULL AFTER ID;
+
+UPDATE Nutrient n
+JOIN NutrientType t
+  ON t.Name = COALESCE(n.Name, '') COLLATE utf8mb4_bin
+ AND t.Category = COALESCE(n.Category, '') COLLATE utf8mb4_bin
+ AND t.Unit = COALESCE(n.Unit, '') COLLATE utf8mb4_bin
+SET n.NutrientTypeID = t.ID;
+
+-- Drop the repeated strings. Nutrients are still looked up through their meal,
+-- now by type: WHERE MealLogID = ? AND NutrientTypeID IN (...)
+ALTER TABLE Nutrient
+ MODIFY NutrientTypeID MEDIUMINT UNSIGNED NOT NULL,
+ ADD CONSTRAINT fk_nutrient_type FOREIGN KEY (NutrientTypeID) REFERENCES NutrientType(ID),
+ ADD INDEX idx_nutrient_meallog_type (MealLogID, NutrientTypeID),
+ DROP INDEX idx_nutrient_meallog_name,
+ DROP COLUMN Name,
+ DROP COLUMN Category,
+ DROP COLUMN Unit;
+
+-- Rebuild so the space of the dropped columns is given back
+OPTIMIZE TABLE Nutrient;
@@ -0,0 +1,100 @@
+-- Migration 15: canonical-unit nutrient quantities for cross-meal aggregation
+USE NutritionBuddy;
+
+-- Every nutrient type converts to one canonical unit: quantity x ToCanonical.
+-- The meal write routes store the converted quantity next to the original one
+-- and the aggregates sum it (conversion table: backend/meals/units.py).
+ALTER TABLE NutrientType
+ ADD COLUMN CanonicalUnit VARCHAR(50) COLLATE utf8mb4_bin NULL,
+ ADD COLUMN ToCanonical DECIMAL(20,10) NULL;
+
+ALTER TABLE Nutrient ADD COLUMN CanonicalQuantity DECIMAL(24,8) NULL AFTER Quantity;
+
+-- mcg amounts converted to g need more than two decimals
+ALTER TABLE DailyNutrientTotals MODIFY Total DECIMAL(26,8) NOT NULL DEFAULT 0;
+
+-- Backfill with the same table as backend/meals/units.py. Rows written by API
+-- processes that were still running the previous version are converted with
+-- `python -m backend.meals.units` from the api/ folder.
+CREATE TEMPORARY TABLE UnitAlias (
+ Alias VARCHAR(20) COLLATE utf8mb4_bin PRIMARY KEY,
+ Unit VARCHAR(10) NOT NULL,
+ Grams DECIMAL(20,10) NULL,
+ Kcal DECIMAL(20,10) NULL
+);
+INSERT INTO UnitAlias (Alias, Unit, Grams, Kcal) VALUES
+ ('g', 'g', 1, NULL), ('gram', 'g', 1, NULL), ('grams', 'g', 1, NULL),
+ ('mg', 'mg', 0.001, NULL), ('milligram', 'mg', 0.001, NULL), ('milligrams', 'mg', 0.001, NULL),
+ ('mcg', 'mcg', 0.000001, NULL), ('ug', 'mcg', 0.000001, NULL), ('µg', 'mcg', 0.000001, NULL),
+ ('μg', 'mcg', 0.000001, NULL), ('microgram', 'mcg', 0.000001, NULL), ('micrograms', 'mcg', 0.000001, NULL),
+ ('iu', 'IU', NULL, NULL),
+ ('kcal', 'kcal', NULL, 1), ('kilocalorie', 'kcal', NULL, 1), ('kilocalories', 'kcal', NULL, 1),
+ ('kj', 'kJ', NULL, 0.2390057361), ('kilojoule', 'kJ', NULL, 0.2390057361), ('kilojoules', 'kJ', NULL, 0.2390057361);
+
+-- Nutrients reported in mg or mcg (everything else by mass is reported in g),
+-- with the mass of one IU where it is defined
+CREATE TEMPORARY TABLE ReportingUnit (
+ Name VARCHAR(50) COLLATE utf8mb4_bin PRIMARY KEY,
+ Unit VARCHAR(10) NOT NULL,
+ Grams DECIMAL(20,10) NOT NULL,
+ IUGrams DECIMAL(20,10) NULL
+);
+INSERT INTO ReportingUnit (Name, Unit, Grams, IUGrams) VALUES
+ ('vitamin c', 'mg', 0.001, NULL), ('vitamin e', 'mg', 0.001, 0.00067), ('vitamin b1', 'mg', 0.001, NULL),
+ ('vitamin b2', 'mg', 0.001, NULL), ('vitamin b3', 'mg', 0.001, NULL), ('vitamin b5', 'mg', 0.001, NULL),
+ ('vitamin b6', 'mg', 0.001, NULL), ('thiamin', 'mg', 0.001, NULL), ('riboflavin', 'mg', 0.001, NULL),
+ ('niacin', 'mg', 0.001, NULL), ('pantothenic acid', 'mg', 0.001, NULL), ('choline', 'mg', 0.001, NULL),
+ ('calcium', 'mg', 0.001, NULL), ('chloride', 'mg', 0.001, NULL), ('cholesterol', 'mg', 0.001, NULL),
+ ('copper', 'mg', 0.001, NULL), ('iron', 'mg', 0.001, NULL), ('magnesium', 'mg', 0.001, NULL),
+ ('manganese', 'mg', 0.001, NULL), ('phosphorus', 'mg', 0.001, NULL), ('potassium', 'mg', 0.001, NULL),
+ ('sodium', 'mg', 0.001, NULL), ('zinc', 'mg', 0.001, NULL),
+ ('vitamin a', 'mcg', 0.000001, 0.0000003), ('vitamin d', 'mcg', 0.000001, 0.000000025),
+ ('vitamin k', 'mcg', 0.000001, NULL), ('vitamin b7', 'mcg', 0.000001, NULL), ('vitamin b9', 'mcg', 0.000001, NULL),
+ ('vitamin b12', 'mcg', 0.000001, NULL), ('biotin', 'mcg', 0.000001, NULL), ('folate', 'mcg', 0.000001, NULL),
+ ('folic acid', 'mcg', 0.000001, NULL), ('chromium', 'mcg', 0.000001, NULL), ('iodine', 'mcg', 0.000001, NULL),
+ ('molybdenum', 'mcg', 0.000001, NULL), ('selenium', 'mcg', 0.000001, NULL);
+
+UPDATE NutrientType t
+LEFT JOIN UnitAlias a ON a.Alias = LOWER(TRIM(t.Unit))
+LEFT JOIN ReportingUnit r ON r.Name = LOWER(TRIM(t.Name))
+SET t.CanonicalUnit = CASE
+      WHEN a.Grams IS NOT NULL OR (a.Unit = 'IU' AND r.IUGrams IS NOT NULL) THEN COALESCE(r.Unit, 'g')
+      WHEN a.Kcal IS NOT NULL THEN 'kcal'
+      ELSE COALESCE(a.Unit, t.Unit)
+    END,
+    t.ToCanonical = CASE
+      WHEN a.Grams IS NOT NULL THEN ROUND(a.Grams / COALESCE(r.Grams, 1), 10)
+      WHEN a.Unit = 'IU' AND r.IUGrams IS NOT NULL THEN ROUND(r.IUGrams / r.Grams, 10)
+      WHEN a.Kcal IS NOT NULL THEN a.Kcal
+      ELSE 1
+    END
+WHERE t.CanonicalUnit IS NULL;
+
+DROP TEMPORARY TABLE UnitAlias;
+DROP TEMPORARY TABLE ReportingUnit;
+
+UPDATE Nutrient n
+JOIN NutrientType t ON t.ID = n.NutrientTypeID
+SET n.CanonicalQuantity = ROUND(n.Quantity * t.ToCanonical, 8)
+WHERE n.Quantity IS NOT NULL;
+
+-- Rebuild the daily rollup in canonical units (as backend/meals/rollup.py does)
+DELETE FROM DailyNutrientTotals;
+
+INSERT INTO DailyNutrientTotals (ClientID, Day, Category, Name, Unit, Total, MealCount)
+SELECT * FROM (
+    SELECT per_type.ClientID, per_type.Day, t.Category, t.Name, t.CanonicalUnit,
+           per_type.Total, per_type.MealCount
+    FROM (
+        SELECT ml.ClientID, DATE(ml.Datetime) AS Day, n.NutrientTypeID,
+               SUM(n.CanonicalQuantity) AS Total, COUNT(DISTINCT ml.ID) AS MealCount
+        FROM MealLog ml
+        JOIN Nutrient n ON n.MealLogID = ml.ID
+        WHERE ml.Datetime IS NOT NULL AND ml.ClientID IS NOT NULL
+        GROUP BY ml.ClientID, DATE(ml.Datetime), n.NutrientTypeID
+    ) per_type
+    JOIN NutrientType t ON t.ID = per_type.NutrientTypeID
+) AS rebuilt
+ON DUPLICATE KEY UPDATE
+    Total = DailyNutrientTotals.Total + rebuilt.Total,
+    MealCount = DailyNutrientTotals.MealCount + rebuilt.MealCount;
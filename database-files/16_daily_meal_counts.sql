@@ -0,0 +1,24 @@
+-- Migration 16: per-day meal counts next to the daily nutrient rollup
+USE NutritionBuddy;
+
+-- One row per client and day with a logged meal. The meal write routes apply
+-- +1/-1 deltas in the same transaction as DailyNutrientTotals, so the daily
+-- summaries read the meal count and the nutrient totals in one query instead
+-- of counting MealLog rows. backend/meals/rollup.py rebuilds both tables.
+CREATE TABLE IF NOT EXISTS DailyMealCounts (
+ ClientID INT NOT NULL,
+ Day DATE NOT NULL,
+ Meals INT NOT NULL DEFAULT 0,
+ PRIMARY KEY (ClientID, Day),
+ FOREIGN KEY (ClientID) REFERENCES Client(ID)
+);
+
+-- Backfill from the existing meal logs (meals without nutrients count too)
+INSERT INTO DailyMealCounts (ClientID, Day, Meals)
+SELECT * FROM (
+    SELECT ClientID, DATE(Datetime) AS Day, COUNT(*) AS counted
+    FROM MealLog
+    WHERE Datetime IS NOT NULL AND ClientID IS NOT NULL
+    GROUP BY ClientID, DATE(Datetime)
+) AS recount
+ON DUPLICATE KEY UPDATE Meals = recount.counted;
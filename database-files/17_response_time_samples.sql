@@ -0,0 +1,14 @@
+-- Migration 17: exact per-minute API response time averages
+USE NutritionBuddy;
+
+-- The metrics sampler flushes from every API process, several times a
+-- minute. Each flush adds its latency sum and sample count to the minute's
+-- row, and ResponseTime is recomputed as TotalMs / Samples, so the average
+-- covers every sample of the minute with equal weight.
+ALTER TABLE CEOAPIResponseTime
+ ADD COLUMN TotalMs DECIMAL(20,3) NOT NULL DEFAULT 0,
+ ADD COLUMN Samples INT NOT NULL DEFAULT 0;
+
+-- Minutes recorded before this migration count as one sample of their stored average
+UPDATE CEOAPIResponseTime SET TotalMs = ResponseTime, Samples = 1
+WHERE ResponseTime IS NOT NULL AND Samples = 0;
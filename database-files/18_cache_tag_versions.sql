@@ -0,0 +1,11 @@
+-- Migration 18: response cache invalidation shared by every API process
+USE NutritionBuddy;
+
+-- One row per cache tag (e.g. 'clients'). A write route that invalidates a
+-- tag bumps its Version; every API process reads this table at most once per
+-- RESPONSE_CACHE_SYNC_INTERVAL seconds and drops its cached responses for the
+-- tags whose Version moved (backend/cache.py).
+CREATE TABLE IF NOT EXISTS CacheTagVersion (
+ Tag VARCHAR(64) NOT NULL PRIMARY KEY,
+ Version BIGINT NOT NULL DEFAULT 0
+);